@@ -0,0 +1,229 @@
+# Serial/captura.py
+"""
+Grabación y reproducción de sesiones serie.
+
+Formato de captura (binario, compacto, solo-append):
+    cabecera  b"LVCAP1\\n" + struct "<d" (epoch de inicio)
+    registro  struct "<BIH" (dirección 0=host->ESP32 / 1=ESP32->host,
+              µs desde el registro anterior, largo) + bytes
+    hueco     dirección 2, largo 0: solo suma µs. Un silencio de más de
+              ~71 min (tope de 32 bits) se graba como varios huecos
+              seguidos del registro real, así el replay conserva el tiempo.
+Se escribe en streaming con un buffer fijo: memoria acotada aunque se grabe
+un turno entero.
+
+PuertoReplay imita a serial.Serial (write/readline/close) leyendo una
+captura: devuelve las respuestas grabadas con su latencia original (escalada
+por `velocidad`) y anota cualquier divergencia en la secuencia de comandos.
+Tras un comando de más o de menos se resincroniza buscando el comando
+enviado entre los próximos grabados, así un solo cambio no marca como
+divergente todo lo que sigue.
+"""
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Tuple
+
+MAGIA = b"LVCAP1\n"
+_CAB = struct.Struct("<d")
+_REG = struct.Struct("<BIH")
+SALIDA, ENTRADA, HUECO = 0, 1, 2
+_MAX_US = 0xFFFFFFFF
+VENTANA_RESYNC = 8      # comandos grabados que se miran hacia adelante al divergir
+
+
+class GrabadorCaptura:
+    def __init__(self, ruta: str, buffer: int = 64 * 1024):
+        self.ruta = ruta
+        self._f = open(ruta, "wb", buffering=buffer)
+        self._f.write(MAGIA + _CAB.pack(time.time()))
+        self._ultimo = time.monotonic_ns()
+
+    def registrar(self, direccion: int, data: bytes):
+        ahora = time.monotonic_ns()
+        delta_us = (ahora - self._ultimo) // 1000
+        self._ultimo = ahora
+        while delta_us > _MAX_US:
+            self._f.write(_REG.pack(HUECO, _MAX_US, 0))
+            delta_us -= _MAX_US
+        for i in range(0, max(1, len(data)), 0xFFFF):
+            trozo = data[i:i + 0xFFFF]
+            self._f.write(_REG.pack(direccion, delta_us, len(trozo)))
+            self._f.write(trozo)
+            delta_us = 0
+
+    def flush(self):
+        self._f.flush()
+
+    def cerrar(self):
+        if not self._f.closed:
+            self._f.close()
+
+
+def leer_captura(ruta: str) -> Iterator[Tuple[float, int, bytes]]:
+    """Itera (segundos desde el inicio, dirección, bytes) sin cargar el archivo entero."""
+    with open(ruta, "rb") as f:
+        if f.read(len(MAGIA)) != MAGIA:
+            raise ValueError(f"{ruta}: no es una captura válida")
+        f.read(_CAB.size)
+        t_us = 0
+        while True:
+            cab = f.read(_REG.size)
+            if len(cab) < _REG.size:
+                return
+            direccion, delta_us, n = _REG.unpack(cab)
+            t_us += delta_us
+            data = f.read(n)
+            if direccion != HUECO:
+                yield t_us / 1e6, direccion, data
+
+
+@dataclass
+class Divergencia:
+    indice: int               # número de comando enviado
+    esperado: Optional[bytes] # None = comando de más (no estaba grabado ahí)
+    recibido: bytes           # b"" = comando grabado que no se envió
+
+
+class PuertoReplay:
+    """
+    Sustituto de serial.Serial para SerialManager(ser=PuertoReplay(...)).
+    velocidad=1.0 reproduce en tiempo real; 10.0 diez veces más rápido;
+    0 sin esperas.
+    """
+    def __init__(self, ruta: str, velocidad: float = 1.0,
+                 dormir: Callable[[float], None] = time.sleep,
+                 log: Optional[Callable[[str], None]] = print):
+        self.ruta = ruta
+        self.velocidad = velocidad
+        self.dormir = dormir
+        self.log = log
+        self.divergencias: List[Divergencia] = []
+        self._regs = leer_captura(ruta)
+        self._adelante: deque = deque()     # registros leídos por adelantado (resync)
+        self._t_ultimo = 0.0
+        self._enviados = 0
+
+    def _mirar(self, i: int) -> Optional[Tuple[float, int, bytes]]:
+        while len(self._adelante) <= i:
+            r = next(self._regs, None)
+            if r is None:
+                return None
+            self._adelante.append(r)
+        return self._adelante[i]
+
+    @property
+    def _sig(self) -> Optional[Tuple[float, int, bytes]]:
+        return self._mirar(0)
+
+    def _avanzar(self) -> Optional[Tuple[float, int, bytes]]:
+        r = self._mirar(0)
+        if r is not None:
+            self._adelante.popleft()
+        return r
+
+    def _buscar(self, data: bytes) -> Optional[int]:
+        """Posición (en _adelante) del próximo comando grabado igual a `data`, dentro de la ventana."""
+        vistos, i = 0, 0
+        while vistos < VENTANA_RESYNC:
+            r = self._mirar(i)
+            if r is None:
+                return None
+            if r[1] == SALIDA:
+                if r[2] == data:
+                    return i
+                vistos += 1
+            i += 1
+        return None
+
+    def _divergir(self, esperado: Optional[bytes], recibido: bytes):
+        self.divergencias.append(Divergencia(self._enviados, esperado, recibido))
+        if self.log:
+            self.log(f"⚠️ Divergencia en comando #{self._enviados}: "
+                     f"esperado {esperado!r}, enviado {recibido!r}")
+
+    def _esperar_hasta(self, t: float):
+        if self.velocidad > 0 and t > self._t_ultimo:
+            self.dormir((t - self._t_ultimo) / self.velocidad)
+        self._t_ultimo = max(self._t_ultimo, t)
+
+    def write(self, data: bytes) -> int:
+        self._enviados += 1
+        # respuestas grabadas que el host no llegó a leer se descartan
+        while self._sig and self._sig[1] == ENTRADA:
+            self._avanzar()
+        i = self._buscar(data)
+        if i is None:
+            # comando de más (o captura terminada): lo grabado queda para el próximo envío
+            self._divergir(None, data)
+            return len(data)
+        # los comandos grabados antes del encontrado no se enviaron en esta corrida
+        for _ in range(i):
+            t, direccion, grabado = self._avanzar()
+            if direccion == SALIDA:
+                self._divergir(grabado, b"")
+        t, _, _ = self._avanzar()
+        self._t_ultimo = max(self._t_ultimo, t)
+        return len(data)
+
+    def readline(self) -> bytes:
+        if not self._sig or self._sig[1] != ENTRADA:
+            return b""   # como un timeout del puerto real
+        t, _, data = self._avanzar()
+        self._esperar_hasta(t)
+        return data
+
+    @property
+    def terminado(self) -> bool:
+        return self._sig is None
+
+    def close(self):
+        self._regs.close()
+
+
+class RelojAcelerado:
+    """
+    Reloj/dormir para correr el Executor `factor` veces más rápido que el
+    tiempo real. factor=0 (como velocidad=0 en PuertoReplay) no espera nunca:
+    el reloj es virtual y solo avanza con dormir().
+    """
+    def __init__(self, factor: float = 1.0):
+        self.factor = factor
+        self._t0 = time.monotonic()
+        self._virtual = 0.0
+
+    def __call__(self) -> float:
+        if self.factor <= 0:
+            return self._virtual
+        return (time.monotonic() - self._t0) * self.factor
+
+    def dormir(self, s: float):
+        if self.factor <= 0:
+            self._virtual += max(0.0, s)
+        else:
+            time.sleep(s / self.factor)
+
+
+def reproducir(ruta_captura: str, params, velocidad: float = 1.0) -> List[Divergencia]:
+    """
+    Corre core/executor.Executor contra una captura, `velocidad` veces más
+    rápido (0 = sin esperas), y devuelve las divergencias en la secuencia de
+    comandos.
+    """
+    from Serial.serial_manager import SerialManager
+    from core.executor import Executor
+    from core.backends import SerialBackend
+
+    reloj = RelojAcelerado(velocidad)
+    puerto = PuertoReplay(ruta_captura, velocidad=velocidad)
+    sm = SerialManager(ser=puerto)
+    exe = Executor(backend=SerialBackend(sm), reloj=reloj, dormir=reloj.dormir)
+    exe.ejecutar(params)
+    exe.cerrar()
+    # comandos grabados que el Executor ya no mandó también son divergencia
+    while puerto._sig:
+        t, direccion, data = puerto._avanzar()
+        if direccion == SALIDA:
+            puerto.divergencias.append(Divergencia(puerto._enviados + 1, data, b""))
+    return puerto.divergencias
@@ -1,29 +1,164 @@
-
-import serial
 import time
+from collections import deque
+
+# Líneas que el ESP32 manda por su cuenta (no son respuesta a un comando):
+#   #CREDITS=n       tamaño libre del buffer de comandos del firmware
+#   #TEL;K=V;...     telemetría empujada
+PREFIJO_ASINCRONO = "#"
+SIN_RESPUESTA = "⚠️ Sin respuesta"
+
 
 class SerialManager:
-    def __init__(self, port="COM3", baudrate=115200, timeout=1):
-        try:
-            self.ser = serial.Serial(port, baudrate, timeout=timeout)
-            time.sleep(2)  # esperar a que ESP32 arranque
-            print(f"✅ Conectado al puerto {port}")
-        except Exception as e:
-            print(f"❌ Error abriendo puerto serial: {e}")
-            self.ser = None
+    def __init__(self, port="COM3", baudrate=115200, timeout=1, grabar: str | None = None, ser=None,
+                 espera_arranque: float = 2.0, creditos: int | None = None, al_telemetria=None):
+        """
+        espera_arranque => segundos tras abrir el puerto (el ESP32 se reinicia
+                  al abrir por DTR); 0 si la placa no se reinicia.
+        grabar => ruta de captura: cada byte que entra y sale queda registrado
+                  con marca de tiempo monotónica (ver Serial/captura.py).
+        ser    => objeto tipo serial.Serial ya abierto (p.ej. captura.PuertoReplay).
+        creditos => control de flujo por créditos (comandos que caben en el
+                  buffer del firmware a la vez):
+                    None  un comando en vuelo, como siempre (stop-and-wait)
+                    0     preguntarle al ESP32 con CREDITS? (responde CREDITS=n)
+                    n     tamaño de buffer conocido
+                  Con créditos, enviar_lote() manda varios comandos seguidos
+                  sin pasarse del buffer y recupera un crédito por respuesta.
+        al_telemetria => callback(str) con el cuerpo de las líneas #TEL;K=V;...
+                  empujadas por el ESP32 (sin el "TEL;"). Otras líneas # que
+                  el firmware no documenta (#BOOT, ...) se ignoran.
+        """
+        self.captura = None
+        if grabar:
+            from Serial.captura import GrabadorCaptura
+            self.captura = GrabadorCaptura(grabar)
+
+        self.al_telemetria = al_telemetria
+        self.creditos = 1
+        self.en_vuelo = 0
+        # métricas del control de flujo
+        self.enviados = 0
+        self.sin_respuesta = 0
+        self.cola_max = 0               # comandos máximos esperando crédito en un lote
+        self.espera_credito_s = 0.0     # tiempo total bloqueado por falta de crédito
+        self.espera_credito_max_s = 0.0
+
+        if ser is not None:
+            self.ser = ser
+        else:
+            try:
+                import serial  # pyserial solo hace falta con puerto real
+                self.ser = serial.Serial(port, baudrate, timeout=timeout)
+                if espera_arranque > 0:
+                    time.sleep(espera_arranque)  # esperar a que ESP32 arranque
+                print(f"✅ Conectado al puerto {port}")
+            except Exception as e:
+                print(f"❌ Error abriendo puerto serial: {e}")
+                self.ser = None
+        if self.ser and creditos is not None:
+            self.creditos = creditos if creditos > 0 else self._negociar_creditos()
+
+    # ---------- E/S de bajo nivel ----------
+    def _escribir(self, data: bytes):
+        self.ser.write(data)
+        if self.captura:
+            self.captura.registrar(0, data)
+
+    def _leer_respuesta(self) -> str:
+        """Siguiente respuesta a un comando ('' si vence el timeout); las asíncronas se despachan."""
+        while True:
+            crudo = self.ser.readline()
+            if self.captura:
+                self.captura.registrar(1, crudo)
+            linea = crudo.decode(errors="replace").strip()
+            if not linea.startswith(PREFIJO_ASINCRONO):
+                return linea
+            self._asincrona(linea[len(PREFIJO_ASINCRONO):])
+
+    def _asincrona(self, linea: str):
+        if linea.upper().startswith("CREDITS="):
+            try:
+                self.creditos = max(1, int(linea.split("=", 1)[1]))
+            except ValueError:
+                pass
+        elif linea.upper().startswith("TEL;") and self.al_telemetria:
+            try:
+                self.al_telemetria(linea[len("TEL;"):])
+            except Exception as e:
+                # un callback que falla no puede dejar a medias la cuenta de créditos
+                print(f"⚠️ Telemetría descartada ({e}): {linea!r}")
+
+    def _resincronizar(self):
+        """Tras un timeout: descarta respuestas tardías para no atribuirlas al próximo comando."""
+        limpiar = getattr(self.ser, "reset_input_buffer", None)
+        if limpiar:
+            limpiar()
+            return
+        while self.ser.readline():      # puertos sin reset (réplicas, adaptadores)
+            pass
+
+    def _negociar_creditos(self) -> int:
+        self._escribir(b"CREDITS?\n")
+        resp = self._leer_respuesta()
+        if resp.upper().startswith("CREDITS="):
+            try:
+                return max(1, int(resp.split("=", 1)[1]))
+            except ValueError:
+                pass
+        print(f"⚠️ El ESP32 no anunció créditos ({resp or 'sin respuesta'}); un comando a la vez")
+        return 1
+
+    # ---------- API ----------
+    def enviar_lote(self, comandos) -> list:
+        """
+        Envía varios comandos respetando los créditos del firmware y devuelve
+        las respuestas en orden. Con un crédito es exactamente el stop-and-wait
+        de siempre; con n, hasta n comandos viajan juntos en una sola escritura.
+        """
+        comandos = list(comandos)
+        if not self.ser:
+            return ["⚠️ Puerto no disponible"] * len(comandos)
+        pendientes = deque(comandos)
+        respuestas = []
+        self.cola_max = max(self.cola_max, len(pendientes) - self.creditos)
+        while pendientes or self.en_vuelo:
+            n = min(len(pendientes), self.creditos - self.en_vuelo)
+            if n > 0:
+                self._escribir(b"".join((pendientes.popleft() + "\n").encode() for _ in range(n)))
+                self.en_vuelo += n
+                self.enviados += n
+            t0 = time.monotonic()
+            resp = self._leer_respuesta()
+            if pendientes:
+                esperado = time.monotonic() - t0
+                self.espera_credito_s += esperado
+                self.espera_credito_max_s = max(self.espera_credito_max_s, esperado)
+            if not resp:
+                # timeout: lo que estaba en vuelo se da por perdido y se resincroniza
+                respuestas.extend([SIN_RESPUESTA] * self.en_vuelo)
+                self.sin_respuesta += self.en_vuelo
+                self.en_vuelo = 0
+                self._resincronizar()
+                continue
+            self.en_vuelo -= 1
+            respuestas.append(resp)
+        return respuestas
 
     def enviar_comando(self, comando: str) -> str:
         """
         Envía un comando al ESP32 y devuelve la respuesta
         """
-        if not self.ser:
-            return "⚠️ Puerto no disponible"
+        return self.enviar_lote([comando])[0]
 
-        self.ser.write((comando + "\n").encode())
-        respuesta = self.ser.readline().decode().strip()
-        return respuesta if respuesta else "⚠️ Sin respuesta"
+    def metricas(self) -> dict:
+        return {"creditos": self.creditos, "en_vuelo": self.en_vuelo, "enviados": self.enviados,
+                "sin_respuesta": self.sin_respuesta, "cola_max": self.cola_max,
+                "espera_credito_s": round(self.espera_credito_s, 4),
+                "espera_credito_max_s": round(self.espera_credito_max_s, 4)}
 
     def cerrar(self):
+        if self.captura:
+            self.captura.cerrar()
         if self.ser:
             self.ser.close()
             print("🔌 Conexión serial cerrada")
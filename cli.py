@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# cli.py
+"""
+Entrada no interactiva para cron/systemd (el menú sigue en main.py).
+
+    python cli.py run ciclos/test.txt --port /dev/ttyUSB0
+    python cli.py run test --dry-run
+    python cli.py run --resume --port /dev/ttyUSB0     # sigue donde quedó
+    python cli.py validate ciclos/
+    python cli.py estimate test --eta eta.json --calibracion cal.json
+
+Todo se importa dentro de cada subcomando: validate/estimate nunca tocan
+pyserial, tkinter ni el puerto, y `run --dry-run` no abre hardware.
+PRESUPUESTO_IMPORT_MS es el tiempo máximo de import de este módulo que
+vigila test/test_cli.py.
+
+Códigos de salida: 0 ok, 1 ciclo inválido / error, 2 ciclo interrumpido
+(queda el punto de reanudación).
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PRESUPUESTO_IMPORT_MS = 30
+PUNTO_POR_DEFECTO = os.environ.get("LAVADORA_PUNTO", os.path.join(ROOT, "datos", "reanudar.json"))
+
+
+def _resolver(ciclo: str) -> str:
+    """Ruta a un .txt: tal cual, o por nombre dentro de ciclos/."""
+    if os.path.isfile(ciclo):
+        return ciclo
+    ruta = os.path.join(ROOT, "ciclos", ciclo if ciclo.endswith(".txt") else ciclo + ".txt")
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No existe el ciclo '{ciclo}'")
+    return ruta
+
+
+def _timeline(ciclo: str):
+    """Compila un ciclo (archivo, nombre en ciclos/ o en la biblioteca) y verifica enclavamientos."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from pathlib import Path
+    from core.interlocks import exigir
+    from core.params_parser import formato_de
+    from core.timeline import compilar_archivo
+
+    if os.environ.get("LAVADORA_BIBLIOTECA") and not os.path.isfile(ciclo):
+        from core.cycle_manager import biblioteca
+        bib = biblioteca()
+        if ciclo in bib.listar():
+            tl = bib.timeline(ciclo)
+            exigir(tl)
+            return tl
+    ruta = Path(_resolver(ciclo))
+    texto = ruta.read_text(encoding="utf-8")
+    if formato_de(texto) == "params":
+        return compilar_archivo(ruta)            # cacheado, ya verifica enclavamientos
+    from core.pasos import compile_cycle, leer_pasos
+    ciclo_pasos, problemas = leer_pasos(texto, ruta.stem.replace("_", " "))
+    if problemas:
+        raise ValueError(f"{ruta}: " + "; ".join(problemas))
+    tl = compile_cycle(ciclo_pasos)
+    exigir(tl)
+    return tl
+
+
+# ---------------- run ---------------- #
+
+class _Punto:
+    """Punto de reanudación: fase actual y segundos cumplidos, escrito ~1 vez por segundo."""
+    def __init__(self, ruta: str, origen: str, timeline):
+        self.ruta = ruta
+        self.base = {"ciclo": origen, "timeline": timeline.to_dict()}
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+
+    def __call__(self, ev, engine):
+        import json
+        if ev.tipo == "fin":
+            if os.path.exists(self.ruta):
+                os.remove(self.ruta)
+            return
+        if engine.state not in (engine.RUNNING, engine.PAUSED):
+            return
+        f = engine.fase
+        datos = dict(self.base, idx=engine.idx, transcurrido=max(0.0, f.duracion_s - engine.restante_fase()))
+        tmp = self.ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(datos, fh)
+        os.replace(tmp, self.ruta)
+
+
+def _sigterm(*_):
+    raise KeyboardInterrupt
+
+
+def cmd_run(args) -> int:
+    import json
+    import signal
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from core.engine import CycleEngine
+    from core.interlocks import ErrorInterlock, exigir
+    from core.timeline import Timeline
+
+    # bajo systemd stdout es un pipe con buffer por bloques: línea a línea el journal
+    # muestra cada fase cuando empieza
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=True)
+    desde, transcurrido = None, 0.0
+    try:
+        if args.resume:
+            if not os.path.exists(args.punto):
+                print(f"⚠️ No hay ciclo para reanudar ({args.punto})")
+                return 1
+            with open(args.punto, encoding="utf-8") as fh:
+                punto = json.load(fh)
+            tl = Timeline.from_dict(punto["timeline"])
+            exigir(tl)
+            origen, desde, transcurrido = punto["ciclo"], punto["idx"], punto["transcurrido"]
+            print(f"↻ Reanudando '{tl.nombre}' en la fase {desde + 1} (+{transcurrido:.0f}s)")
+        elif args.ciclo:
+            origen, tl = args.ciclo, _timeline(args.ciclo)
+            if args.solapes:
+                from core.solapes import cargar_reglas, optimizar, reglas_de
+                res = optimizar(tl, reglas_de(cargar_reglas(args.solapes), args.maquina))
+                print(res.resumen())
+                tl = res.timeline
+        else:
+            print("⚠️ Indica un ciclo o --resume")
+            return 1
+    except (ErrorInterlock, ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.dry_run:
+        from core.backends import SimuladorBackend
+        backend = SimuladorBackend()
+    else:
+        from core.backends import SerialBackend
+        backend = SerialBackend(port=args.port, espera_arranque=args.espera_arranque, creditos=args.creditos)
+        if args.sensores_ttl_ms:
+            backend.activar_sensores(args.sensores_ttl_ms / 1000.0)
+
+    eng = CycleEngine(backend, maquina=args.maquina)
+    eng.suscribir(lambda ev: print(f"== {ev.datos['titulo']} ({ev.datos['duracion_s']}s) =="), tipos=("fase",))
+    eng.suscribir(lambda ev: print(ev.datos["texto"]), tipos=("estado",))
+    if not args.dry_run:
+        eng.suscribir(lambda ev: print(f"[CMD] {ev.datos['comando']} -> {ev.datos['respuesta']}"),
+                      tipos=("comando",))
+    trazas = None
+    if args.traza:
+        from core.traza import TrazaCiclos
+        trazas = TrazaCiclos(args.traza)
+        trazas.conectar(eng)
+    punto = _Punto(args.punto, origen, tl)
+    eng.suscribir(lambda ev: punto(ev, eng), tipos=("fase", "tick", "fin"))
+
+    # systemd manda SIGTERM: mismo paro seguro que Ctrl+C
+    signal.signal(signal.SIGTERM, _sigterm)
+    import time
+    eng.cargar(tl)
+    try:
+        eng.iniciar(desde=desde, transcurrido=transcurrido)
+        while eng.state == CycleEngine.RUNNING:
+            eng.tick()
+            prox = eng.proximo_evento()
+            espera = 0.05 if prox is None else min(0.05, prox - eng.reloj())
+            if espera > 0:
+                time.sleep(espera)
+    except KeyboardInterrupt:
+        eng.detener()
+    finally:
+        eng.cerrar()
+        if trazas:
+            trazas.cerrar()
+    return 0 if eng.state == CycleEngine.IDLE else 2
+
+
+# ---------------- validate / estimate ---------------- #
+
+def cmd_validate(args) -> int:
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from core.validacion import main as validar
+    argv = list(args.rutas)
+    if args.json:
+        argv.append("--json")
+    if args.procesos:
+        argv += ["--procesos", str(args.procesos)]
+    return validar(argv)
+
+
+def cmd_estimate(args) -> int:
+    import json
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    from core.consumo import UNIDADES, calibracion_de, cargar_calibraciones, consumo_plan
+    try:
+        tl = _timeline(args.ciclo)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        return 1
+    out = {"ciclo": tl.nombre, "fases": len(tl.fases), "nominal_s": tl.total_s}
+    if args.solapes:
+        from core.solapes import cargar_reglas, optimizar, reglas_de
+        res = optimizar(tl, reglas_de(cargar_reglas(args.solapes), args.maquina))
+        out["solapes"] = {"ahorro_s": res.ahorro_s, "aplicados": [s.descripcion for s in res.aplicados],
+                          "rechazados": [s.descripcion for s, _ in res.rechazados]}
+        tl = res.timeline
+    if args.eta:
+        from core.eta import ModeloETA
+        out["eta_s"] = round(ModeloETA(args.eta).perfil(args.maquina, tl)[1][0], 1)
+    cals = cargar_calibraciones(args.calibracion) if args.calibracion else {}
+    out["consumo"] = {r: round(v, 2) for r, v in consumo_plan(tl, calibracion_de(cals, args.maquina)).items()}
+    if args.json:
+        print(json.dumps(out, ensure_ascii=False))
+        return 0
+    print(f"{out['ciclo']}: {out['fases']} fases, {out['nominal_s']}s nominales"
+          + (f", ~{out['eta_s']:.0f}s según historial" if "eta_s" in out else ""))
+    if args.solapes:
+        print(res.resumen())
+    for r, v in out["consumo"].items():
+        print(f"  {r}: {v} {UNIDADES[r]}")
+    return 0
+
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(prog="cli.py", description="Lavadora: ejecución sin interfaz")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="ejecutar un ciclo")
+    r.add_argument("ciclo", nargs="?", help="ruta .txt o nombre en ciclos/")
+    r.add_argument("--port", default="COM3")
+    r.add_argument("--dry-run", action="store_true", help="sin hardware: imprime los comandos")
+    r.add_argument("--resume", action="store_true", help="reanudar el último ciclo interrumpido")
+    r.add_argument("--punto", default=PUNTO_POR_DEFECTO, help="archivo del punto de reanudación")
+    r.add_argument("--maquina", default="M1")
+    r.add_argument("--creditos", type=int, default=None,
+                   help="control de flujo por créditos con el ESP32 (0 = preguntar con CREDITS?)")
+    r.add_argument("--sensores-ttl-ms", type=float, default=None,
+                   help="paro de emergencia vía STATUS? con snapshot reutilizado N ms")
+    r.add_argument("--solapes", default=None, help="reglas de solape por máquina (core/solapes.py, JSON)")
+    r.add_argument("--traza", default=None, help="carpeta para la traza Chrome/Perfetto del ciclo")
+    r.add_argument("--espera-arranque", type=float, default=2.0,
+                   help="segundos tras abrir el puerto (reinicio del ESP32)")
+    r.set_defaults(func=cmd_run)
+
+    v = sub.add_parser("validate", help="validar ciclos y enclavamientos")
+    v.add_argument("rutas", nargs="*")
+    v.add_argument("--procesos", type=int, default=None)
+    v.add_argument("--json", action="store_true")
+    v.set_defaults(func=cmd_validate)
+
+    e = sub.add_parser("estimate", help="duración y consumo previstos")
+    e.add_argument("ciclo")
+    e.add_argument("--maquina", default="M1")
+    e.add_argument("--eta", default=None, help="modelo ETA (core/eta.py, JSON)")
+    e.add_argument("--calibracion", default=None, help="caudales por máquina (core/consumo.py, JSON)")
+    e.add_argument("--solapes", default=None, help="reglas de solape por máquina (core/solapes.py, JSON)")
+    e.add_argument("--json", action="store_true")
+    e.set_defaults(func=cmd_estimate)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
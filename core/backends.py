@@ -0,0 +1,121 @@
+# core/backends.py
+"""
+Backends de hardware para core/engine.CycleEngine.
+
+Todos exponen la misma interfaz mínima:
+    enviar(comando) -> str    manda un comando del protocolo ESP32
+    enviar_lote(comandos)     varios seguidos (SerialBackend: control de flujo por créditos)
+    paro_total()              todos los actuadores a estado seguro
+    emergencia() -> bool      lectura del paro de emergencia (vía core/sensores si hay snapshot)
+    cerrar()
+"""
+from __future__ import annotations
+from typing import Callable, Optional
+
+# Secuencia de apagado cuando el dispositivo no tiene un comando de paro total
+COMANDOS_PARO = ("MOTOR_OFF", "VALVULA_AGUA_OFF", "BOMBA_OFF",
+                 "DOSIF_A_OFF", "DOSIF_B_OFF", "DOSIF_C_OFF", "DOSIF_D_OFF")
+
+
+class Backend:
+    def enviar(self, comando: str) -> str:
+        raise NotImplementedError
+
+    def enviar_lote(self, comandos) -> list:
+        return [self.enviar(c) for c in comandos]
+
+    def paro_total(self):
+        for c in COMANDOS_PARO:
+            self.enviar(c)
+
+    def emergencia(self) -> bool:
+        return False
+
+    def cerrar(self):
+        pass
+
+
+class SimuladorBackend(Backend):
+    """
+    Dry-run: no toca hardware. Con log=print imprime cada comando como el
+    antiguo modo dry_run del Executor; con log=None es silencioso (simulación).
+    """
+    def __init__(self, log: Optional[Callable[[str], None]] = print):
+        self.log = log
+
+    def enviar(self, comando: str) -> str:
+        if self.log:
+            self.log(f"[CMD] {comando}")
+        return "OK (dry-run)"
+
+    def paro_total(self):
+        if self.log:
+            self.log("[CMD] PARO_TOTAL")
+
+
+class SerialBackend(Backend):
+    """Envía los comandos al ESP32 a través de Serial/serial_manager.SerialManager."""
+    def __init__(self, sm=None, port: str | None = None, **opciones):
+        if sm is None:
+            # Import perezoso: pyserial solo hace falta si de verdad hay puerto
+            from Serial.serial_manager import SerialManager
+            sm = SerialManager(port=port, **opciones) if port else SerialManager(**opciones)
+        self.sm = sm
+        self.sensores = None     # core/sensores.SensoresCache (ver activar_sensores)
+
+    def activar_sensores(self, ttl_s: float = 0.25, comando: str = "STATUS?"):
+        """Paro de emergencia leído del ESP32: un STATUS? por TTL, compartido por todo el tick."""
+        from .sensores import SensoresCache, lector_serial, parsear_status
+        self.sensores = SensoresCache(lector_serial(self.sm.enviar_comando, comando), ttl_s)
+        if getattr(self.sm, "al_telemetria", False) is None:
+            # las líneas #TEL;K=V;... empujadas refrescan el snapshot sin consultar
+            def al_telemetria(cuerpo: str):
+                try:
+                    self.sensores.empujar(parsear_status(cuerpo))
+                except ValueError:
+                    pass        # telemetría ilegible: el snapshot envejece y se vuelve a consultar
+            self.sm.al_telemetria = al_telemetria
+        return self.sensores
+
+    def enviar(self, comando: str) -> str:
+        return self.sm.enviar_comando(comando)
+
+    def enviar_lote(self, comandos) -> list:
+        return self.sm.enviar_lote(comandos)
+
+    def emergencia(self) -> bool:
+        return self.sensores.emergencia() if self.sensores else False
+
+    def cerrar(self):
+        self.sm.cerrar()
+
+
+class HardwareIOBackend(Backend):
+    """
+    Adapta los comandos del protocolo a un objeto con la interfaz de
+    gui/ui_lavadora.HardwareIO (fill, add_chemical, drain_open, spin,
+    stop_all, is_emergency_pressed).
+    """
+    def __init__(self, hw):
+        self.hw = hw
+
+    def enviar(self, comando: str) -> str:
+        c = comando.upper()
+        hw = self.hw
+        if c.startswith("VALVULA_AGUA") and c.endswith("_ON"):
+            temp = c[len("VALVULA_AGUA"):-len("_ON")].strip("_").lower()
+            hw.fill(temp or None)
+        elif c.startswith("DOSIF_") and c.endswith("_ON"):
+            hw.add_chemical(c[len("DOSIF_"):-len("_ON")])
+        elif c in ("BOMBA_ON", "BOMBA_OFF"):
+            hw.drain_open(c == "BOMBA_ON")
+        elif c.startswith("MOTOR_") and c.endswith("_ON"):
+            hw.spin(c[len("MOTOR_"):].split("_")[0].lower())
+        # *_OFF individuales: HardwareIO no los distingue, se resuelven con stop_all
+        return "OK"
+
+    def paro_total(self):
+        self.hw.stop_all()
+
+    def emergencia(self) -> bool:
+        return bool(self.hw.is_emergency_pressed())
@@ -0,0 +1,271 @@
+# core/biblioteca.py
+"""
+Biblioteca de ciclos en SQLite (opcional, alternativa a escanear ciclos/*.txt).
+
+Cada ciclo guarda el TEXTO original de cada revisión (formato [LAVADO]/... de
+core/params_parser.py o pasos accion=...;duracion=... de la GUI), así la
+exportación a .txt es exacta. Al guardar se compila una vez y se vuelcan a
+columnas indexadas los datos por los que se busca: duración total, segundos de
+agua, segundos por bomba DOSIF_*, velocidad máxima y número de fases.
+
+    bib = Biblioteca("ciclos.db")
+    bib.importar_carpeta("ciclos")
+    bib.buscar(max_total_s=3600, quimico="B", vel="ALTA")
+    bib.exportar_carpeta("ciclos_export")
+
+Se activa en el menú (core/cycle_manager.py) con LAVADORA_BIBLIOTECA=ruta.db.
+"""
+from __future__ import annotations
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .consumo import segundos_plan
+from .interlocks import exigir
+from .params_parser import formato_de, load_params_text
+from .pasos import compile_cycle, leer_pasos
+from .timeline import Timeline, compilar
+
+_VEL_RANGO = {"BAJA": 1, "MEDIA": 2, "ALTA": 3}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ciclos (
+    id          INTEGER PRIMARY KEY,
+    nombre      TEXT NOT NULL UNIQUE,
+    formato     TEXT NOT NULL,          -- params | pasos
+    revision    INTEGER NOT NULL,       -- revisión vigente
+    total_s     INTEGER NOT NULL,
+    agua_s      INTEGER NOT NULL,
+    dosif_a_s   INTEGER NOT NULL,
+    dosif_b_s   INTEGER NOT NULL,
+    dosif_c_s   INTEGER NOT NULL,
+    dosif_d_s   INTEGER NOT NULL,
+    vel_max     INTEGER NOT NULL,       -- 0 sin motor, 1 BAJA, 2 MEDIA, 3 ALTA
+    fases       INTEGER NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ciclos_total  ON ciclos(total_s);
+CREATE INDEX IF NOT EXISTS ix_ciclos_vel    ON ciclos(vel_max, total_s);
+CREATE INDEX IF NOT EXISTS ix_ciclos_dosif_a ON ciclos(dosif_a_s);
+CREATE INDEX IF NOT EXISTS ix_ciclos_dosif_b ON ciclos(dosif_b_s);
+CREATE INDEX IF NOT EXISTS ix_ciclos_dosif_c ON ciclos(dosif_c_s);
+CREATE INDEX IF NOT EXISTS ix_ciclos_dosif_d ON ciclos(dosif_d_s);
+CREATE TABLE IF NOT EXISTS revisiones (
+    ciclo_id    INTEGER NOT NULL REFERENCES ciclos(id) ON DELETE CASCADE,
+    revision    INTEGER NOT NULL,
+    texto       TEXT NOT NULL,
+    autor       TEXT NOT NULL DEFAULT '',
+    creado      REAL NOT NULL,
+    PRIMARY KEY (ciclo_id, revision)
+);
+"""
+
+
+@dataclass
+class FichaCiclo:
+    nombre: str
+    formato: str
+    revision: int
+    total_s: int
+    agua_s: int
+    dosif_s: Dict[str, int]
+    vel_max: str
+    fases: int
+
+
+def timeline_de_texto(texto: str, nombre: str) -> Timeline:
+    """Compila el contenido de un .txt en cualquiera de los dos formatos."""
+    if formato_de(texto) == "params":
+        return compilar(load_params_text(texto), nombre=nombre)
+    # mismo parser de pasos que la GUI; el nombre es el de la biblioteca
+    ciclo, _ = leer_pasos(texto, nombre)
+    ciclo.nombre = nombre
+    return compile_cycle(ciclo)
+
+
+def _validar(texto: str, nombre: str) -> Timeline:
+    """Timeline del texto o ValueError: líneas rechazadas, ciclo vacío o enclavamientos."""
+    if formato_de(texto) == "pasos":
+        _, problemas = leer_pasos(texto, nombre)
+        if problemas:
+            raise ValueError(f"Ciclo '{nombre}': " + "; ".join(problemas))
+    tl = timeline_de_texto(texto, nombre)
+    exigir(tl)               # ErrorInterlock (un ValueError); un ciclo sin fases es ciclo_vacio
+    return tl
+
+
+def _columnas(tl: Timeline) -> Tuple[int, ...]:
+    agua, a, b, c, d = (int(x) for x in segundos_plan(tl))
+    vel = 0
+    for f in tl.fases:
+        for cmd in f.on:
+            if cmd.startswith("MOTOR_") and cmd.endswith("_ON"):
+                vel = max(vel, _VEL_RANGO.get(cmd.split("_")[1], 0))
+    return tl.total_s, agua, a, b, c, d, vel, len(tl.fases)
+
+
+class Biblioteca:
+    def __init__(self, ruta: str | Path):
+        self.ruta = str(ruta)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(_ESQUEMA)
+        self._tl: Dict[Tuple[str, int], Timeline] = {}   # (nombre, revisión) -> Timeline compilada
+
+    # ---------- escritura ----------
+    def guardar(self, nombre: str, texto: str, autor: str = "") -> int:
+        """
+        Guarda el contenido como nueva revisión. Antes lo valida: sintaxis
+        estricta, al menos una fase y enclavamientos (ValueError si falla).
+        Si es idéntico a la revisión vigente no crea otra. Devuelve la revisión.
+        """
+        tl = _validar(texto, nombre)
+        cols = _columnas(tl)
+        ahora = time.time()
+        with self._lock, self._db:
+            fila = self._db.execute("SELECT id, revision FROM ciclos WHERE nombre = ?", (nombre,)).fetchone()
+            if fila:
+                cid, rev = fila
+                actual = self._db.execute("SELECT texto FROM revisiones WHERE ciclo_id = ? AND revision = ?",
+                                          (cid, rev)).fetchone()
+                if actual and actual[0] == texto:
+                    return rev
+                rev += 1
+                self._db.execute(
+                    "UPDATE ciclos SET formato=?, revision=?, total_s=?, agua_s=?, dosif_a_s=?, dosif_b_s=?, "
+                    "dosif_c_s=?, dosif_d_s=?, vel_max=?, fases=?, actualizado=? WHERE id=?",
+                    (formato_de(texto), rev, *cols, ahora, cid))
+            else:
+                rev = 1
+                cid = self._db.execute(
+                    "INSERT INTO ciclos (nombre, formato, revision, total_s, agua_s, dosif_a_s, dosif_b_s, "
+                    "dosif_c_s, dosif_d_s, vel_max, fases, actualizado) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (nombre, formato_de(texto), rev, *cols, ahora)).lastrowid
+            self._db.execute("INSERT INTO revisiones (ciclo_id, revision, texto, autor, creado) VALUES (?,?,?,?,?)",
+                             (cid, rev, texto, autor, ahora))
+        self._tl[(nombre, rev)] = tl
+        return rev
+
+    def eliminar(self, nombre: str) -> bool:
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM ciclos WHERE nombre = ?", (nombre,)).rowcount > 0
+
+    def restaurar(self, nombre: str, revision: int, autor: str = "") -> int:
+        """Vuelve a una revisión anterior (como revisión nueva: el historial no se reescribe)."""
+        return self.guardar(nombre, self.texto(nombre, revision), autor)
+
+    # ---------- lectura ----------
+    def _uno(self, sql: str, args: tuple):
+        with self._lock:
+            return self._db.execute(sql, args).fetchone()
+
+    def _todos(self, sql: str, args: tuple = ()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def texto(self, nombre: str, revision: Optional[int] = None) -> str:
+        fila = self._uno(
+            "SELECT r.texto FROM revisiones r JOIN ciclos c ON c.id = r.ciclo_id "
+            "WHERE c.nombre = ? AND r.revision = COALESCE(?, c.revision)", (nombre, revision))
+        if fila is None:
+            raise KeyError(f"Ciclo '{nombre}' (revisión {revision or 'vigente'}) no existe")
+        return fila[0]
+
+    def timeline(self, nombre: str, revision: Optional[int] = None) -> Timeline:
+        if revision is None:
+            fila = self._uno("SELECT revision FROM ciclos WHERE nombre = ?", (nombre,))
+            if fila is None:
+                raise KeyError(f"Ciclo '{nombre}' no existe")
+            revision = fila[0]
+        tl = self._tl.get((nombre, revision))
+        if tl is None:
+            tl = self._tl[(nombre, revision)] = timeline_de_texto(self.texto(nombre, revision), nombre)
+        return tl
+
+    def listar(self, formato: Optional[str] = None) -> List[str]:
+        if formato:
+            return [r[0] for r in self._todos("SELECT nombre FROM ciclos WHERE formato = ? ORDER BY nombre",
+                                              (formato,))]
+        return [r[0] for r in self._todos("SELECT nombre FROM ciclos ORDER BY nombre")]
+
+    def revisiones(self, nombre: str) -> List[Tuple[int, float, str]]:
+        return self._todos(
+            "SELECT r.revision, r.creado, r.autor FROM revisiones r JOIN ciclos c ON c.id = r.ciclo_id "
+            "WHERE c.nombre = ? ORDER BY r.revision", (nombre,))
+
+    _CAMPOS = "nombre, formato, revision, total_s, agua_s, dosif_a_s, dosif_b_s, dosif_c_s, dosif_d_s, vel_max, fases"
+
+    @staticmethod
+    def _ficha(f) -> FichaCiclo:
+        vel = {v: k for k, v in _VEL_RANGO.items()}.get(f[9], "")
+        return FichaCiclo(f[0], f[1], f[2], f[3], f[4], dict(zip("ABCD", f[5:9])), vel, f[10])
+
+    def ficha(self, nombre: str) -> FichaCiclo:
+        f = self._uno(f"SELECT {self._CAMPOS} FROM ciclos WHERE nombre = ?", (nombre,))
+        if f is None:
+            raise KeyError(f"Ciclo '{nombre}' no existe")
+        return self._ficha(f)
+
+    def buscar(self, min_total_s: Optional[int] = None, max_total_s: Optional[int] = None,
+               quimico: Optional[str] = None, vel: Optional[str] = None,
+               formato: Optional[str] = None) -> List[FichaCiclo]:
+        """Filtra por columnas indexadas; todos los criterios se combinan con AND."""
+        donde, args = [], []
+        if min_total_s is not None:
+            donde.append("total_s >= ?")
+            args.append(min_total_s)
+        if max_total_s is not None:
+            donde.append("total_s <= ?")
+            args.append(max_total_s)
+        if quimico:
+            q = quimico.strip().upper()
+            if q not in ("A", "B", "C", "D"):
+                raise ValueError(f"Químico inválido '{quimico}'. Usa A, B, C o D.")
+            donde.append(f"dosif_{q.lower()}_s > 0")
+        if vel:
+            donde.append("vel_max = ?")
+            args.append(_VEL_RANGO[vel.strip().upper()])
+        if formato:
+            donde.append("formato = ?")
+            args.append(formato)
+        sql = f"SELECT {self._CAMPOS} FROM ciclos"
+        if donde:
+            sql += " WHERE " + " AND ".join(donde)
+        return [self._ficha(f) for f in self._todos(sql + " ORDER BY nombre", tuple(args))]
+
+    # ---------- import / export .txt ----------
+    def importar_txt(self, ruta: str | Path, nombre: Optional[str] = None, autor: str = "") -> int:
+        ruta = Path(ruta)
+        return self.guardar(nombre or ruta.stem, ruta.read_text(encoding="utf-8"), autor)
+
+    def importar_carpeta(self, carpeta: str | Path, autor: str = "") -> Dict[str, str]:
+        """Importa todos los .txt; devuelve {archivo: error} de los que no se pudieron importar."""
+        errores = {}
+        for p in sorted(Path(carpeta).glob("*.txt")):
+            try:
+                self.importar_txt(p, autor=autor)
+            except (ValueError, UnicodeDecodeError) as e:
+                errores[p.name] = str(e)
+        return errores
+
+    def exportar_txt(self, nombre: str, ruta: str | Path, revision: Optional[int] = None) -> Path:
+        ruta = Path(ruta)
+        ruta.write_text(self.texto(nombre, revision), encoding="utf-8")
+        return ruta
+
+    def exportar_carpeta(self, carpeta: str | Path) -> int:
+        carpeta = Path(carpeta)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        filas = self._todos("SELECT c.nombre, r.texto FROM ciclos c JOIN revisiones r "
+                            "ON r.ciclo_id = c.id AND r.revision = c.revision")
+        for nombre, texto in filas:
+            (carpeta / f"{nombre}.txt").write_text(texto, encoding="utf-8")
+        return len(filas)
+
+    def cerrar(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,202 @@
+# core/cola.py
+"""
+Cola de trabajos por máquina para encadenar ciclos sin huecos.
+
+- ColaTrabajos: heap por máquina ordenado por (prioridad, inicio solicitado,
+  id). Encolar y sacar son O(log n); cancelar es O(1) con borrado perezoso.
+  Persiste en un journal JSONL de solo-append que se reproduce al arrancar y
+  se compacta cuando hay más registros muertos que vivos.
+- CorredorCola: lo llama el Controlador en cada tick. Mientras la máquina
+  gira, pre-compila el siguiente trabajo; en cuanto queda libre y la
+  condición de carga lista (puerta cerrada, etc.) se cumple, lo arranca.
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .timeline import Timeline, compilar_archivo
+
+
+@dataclass
+class Trabajo:
+    id: int
+    maquina: str
+    ciclo: str                   # ruta al .txt de parámetros
+    prioridad: int = 0           # menor = antes
+    inicio: float = 0.0          # epoch (time.time) mínimo de arranque; 0 = cuanto antes
+    creado: float = 0.0
+
+    @property
+    def clave(self) -> Tuple[int, float, int]:
+        return (self.prioridad, self.inicio, self.id)
+
+
+class ColaTrabajos:
+    def __init__(self, journal: Path | None = None):
+        self.journal = Path(journal) if journal else None
+        self._heaps: Dict[str, List[Tuple[int, float, int]]] = {}
+        self._vivos: Dict[int, Trabajo] = {}
+        self._muertos = 0
+        self._ids = itertools.count(1)
+        self._fh = None
+        if self.journal:
+            self._reproducir()
+            self.journal.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.journal, "a", encoding="utf-8")
+
+    # ---------- persistencia ----------
+    def _reproducir(self):
+        if not self.journal.exists():
+            return
+        datos = self.journal.read_bytes()
+        fin = datos.rfind(b"\n") + 1
+        if fin < len(datos):
+            # cola sin salto de línea (corte de luz a mitad de escritura): se recorta,
+            # si no el próximo registro quedaría pegado al fragmento y también se perdería
+            with open(self.journal, "r+b") as f:
+                f.truncate(fin)
+        ultimo = 0
+        for raw in datos[:fin].decode("utf-8", errors="replace").splitlines():
+            if not raw.strip():
+                continue
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue   # registro corrupto: se descarta
+            if rec.get("op") == "+":
+                t = Trabajo(**rec["trabajo"])
+                self._insertar(t)
+                ultimo = max(ultimo, t.id)
+            elif rec.get("op") == "-":
+                if self._vivos.pop(rec["id"], None) is not None:
+                    self._muertos += 1
+                ultimo = max(ultimo, rec["id"])
+        self._ids = itertools.count(ultimo + 1)
+
+    def _escribir(self, rec: dict):
+        if self._fh:
+            self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+
+    def _compactar_si_hace_falta(self):
+        if not self._fh or self._muertos <= max(64, len(self._vivos)):
+            return
+        tmp = self.journal.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for t in self._vivos.values():
+                f.write(json.dumps({"op": "+", "trabajo": asdict(t)}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._fh.close()
+        os.replace(tmp, self.journal)
+        self._fh = open(self.journal, "a", encoding="utf-8")
+        self._muertos = 0
+
+    def cerrar(self):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    # ---------- operaciones ----------
+    def _insertar(self, t: Trabajo):
+        self._vivos[t.id] = t
+        heapq.heappush(self._heaps.setdefault(t.maquina, []), t.clave)
+
+    def encolar(self, maquina: str, ciclo: str, prioridad: int = 0, inicio: float = 0.0) -> Trabajo:
+        t = Trabajo(id=next(self._ids), maquina=maquina, ciclo=str(ciclo),
+                    prioridad=int(prioridad), inicio=float(inicio), creado=time.time())
+        self._insertar(t)
+        self._escribir({"op": "+", "trabajo": asdict(t)})
+        return t
+
+    def cancelar(self, id_: int) -> bool:
+        if self._vivos.pop(id_, None) is None:
+            return False
+        self._muertos += 1
+        self._escribir({"op": "-", "id": id_})
+        self._compactar_si_hace_falta()
+        return True
+
+    def _limpiar_tope(self, heap: List[Tuple[int, float, int]]):
+        while heap and heap[0][2] not in self._vivos:
+            heapq.heappop(heap)
+
+    def siguiente(self, maquina: str) -> Optional[Trabajo]:
+        """Trabajo de mayor prioridad de la máquina, sin sacarlo."""
+        heap = self._heaps.get(maquina)
+        if not heap:
+            return None
+        self._limpiar_tope(heap)
+        return self._vivos[heap[0][2]] if heap else None
+
+    def sacar(self, maquina: str) -> Optional[Trabajo]:
+        t = self.siguiente(maquina)
+        if t is None:
+            return None
+        heapq.heappop(self._heaps[maquina])
+        self.cancelar(t.id)   # registra la salida en el journal
+        return t
+
+    def listar(self, maquina: str | None = None) -> List[Trabajo]:
+        trabajos = [t for t in self._vivos.values() if maquina in (None, t.maquina)]
+        return sorted(trabajos, key=lambda t: (t.maquina, t.clave))
+
+    def __len__(self) -> int:
+        return len(self._vivos)
+
+
+class CorredorCola:
+    """
+    Arranca trabajos de la cola en una máquina del Controlador.
+
+    Prioridad estricta: si el tope de la cola tiene un inicio solicitado en el
+    futuro, la máquina espera (no se adelantan trabajos de menor prioridad).
+    """
+    def __init__(self, controlador, cola: ColaTrabajos, maquina: str,
+                 listo: Callable[[], bool] = lambda: True,
+                 reloj_pared: Callable[[], float] = time.time,
+                 log: Callable[[str], None] = print):
+        self.controlador = controlador
+        self.cola = cola
+        self.maquina = maquina
+        self.listo = listo                 # condición puerta cerrada / carga lista
+        self.reloj_pared = reloj_pared
+        self.log = log
+        self._pre: Optional[Tuple[int, Timeline]] = None   # (id trabajo, timeline pre-compilada)
+        self.actual: Optional[Trabajo] = None
+
+    def _precompilar(self, t: Trabajo) -> Optional[Timeline]:
+        if self._pre and self._pre[0] == t.id:
+            return self._pre[1]
+        try:
+            tl = compilar_archivo(Path(t.ciclo))
+        except (OSError, ValueError) as e:
+            self.log(f"⚠️ Trabajo {t.id} ({t.ciclo}) descartado: {e}")
+            self.cola.cancelar(t.id)
+            self._pre = None
+            return None
+        self._pre = (t.id, tl)
+        return tl
+
+    def tick(self):
+        from .engine import CycleEngine
+
+        eng = self.controlador.maquinas[self.maquina]
+        t = self.cola.siguiente(self.maquina)
+        if t is None:
+            return
+        tl = self._precompilar(t)
+        if tl is None or eng.state != CycleEngine.IDLE:
+            return
+        if t.inicio > self.reloj_pared() or not self.listo():
+            return
+        self.cola.sacar(self.maquina)
+        self._pre = None
+        self.actual = t
+        self.controlador.iniciar(self.maquina, timeline=tl)
@@ -0,0 +1,233 @@
+# core/consumo.py
+"""
+Consumo de agua y químicos.
+
+Cada máquina tiene su calibración (caudal de la válvula de agua en L/s y de
+cada bomba DOSIF_* en mL/s). A partir de una Timeline compilada se calcula
+una vez el vector de segundos ON por recurso; multiplicado por la
+calibración da el consumo previsto del ciclo.
+
+El consumo real se acumula con ContadorConsumo, un oyente de CycleEngine que
+mide cuánto estuvo encendido cada actuador según los comandos ejecutados (las
+pausas y paros cortan la cuenta). Al cerrar cada corrida se puede volcar una
+fila a la tabla "consumos" del historial, y reporte_consumo() agrega miles de
+corridas por ciclo, máquina o día de forma vectorial.
+
+Archivo de calibración (JSON), "*" = valor por defecto de la flota:
+    {"*":  {"agua_l_s": 0.25, "dosif_ml_s": {"A": 5, "B": 5, "C": 5, "D": 5}},
+     "M2": {"agua_l_s": 0.31}}
+"""
+from __future__ import annotations
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from .timeline import Timeline, PARO_TOTAL
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Orden fijo de los vectores de consumo
+RECURSOS: Tuple[str, ...] = ("VALVULA_AGUA", "DOSIF_A", "DOSIF_B", "DOSIF_C", "DOSIF_D")
+UNIDADES: Dict[str, str] = {"VALVULA_AGUA": "L", "DOSIF_A": "mL", "DOSIF_B": "mL",
+                            "DOSIF_C": "mL", "DOSIF_D": "mL"}
+# Columnas de la tabla "consumos" del historial, en el mismo orden que RECURSOS
+COLUMNAS: Tuple[str, ...] = ("agua_l", "dosif_a_ml", "dosif_b_ml", "dosif_c_ml", "dosif_d_ml")
+
+
+def actuador_de(comando: str) -> Optional[str]:
+    """Actuador físico al que se refiere un comando (VALVULA_AGUA_FRIA_ON -> VALVULA_AGUA)."""
+    c = comando.strip().upper()
+    if c.startswith("VALVULA_AGUA"):
+        return "VALVULA_AGUA"
+    if c.startswith("MOTOR_"):
+        return "MOTOR"
+    if c.startswith("BOMBA_"):
+        return "BOMBA"
+    if c.startswith("DOSIF_") and len(c) > 7:
+        return c[:7]
+    return None
+
+
+@dataclass
+class Calibracion:
+    agua_l_s: float = 0.25
+    dosif_ml_s: Dict[str, float] = field(default_factory=lambda: {k: 5.0 for k in "ABCD"})
+
+    def tasas(self) -> Tuple[float, ...]:
+        """Caudales alineados con RECURSOS."""
+        return (self.agua_l_s,) + tuple(float(self.dosif_ml_s.get(k, 0.0)) for k in "ABCD")
+
+
+def cargar_calibraciones(ruta: str | Path) -> Dict[str, Calibracion]:
+    datos = json.loads(Path(ruta).read_text(encoding="utf-8"))
+    base = Calibracion()
+    defecto = datos.get("*", {})
+    out: Dict[str, Calibracion] = {}
+    for maquina, d in datos.items():
+        dosif = dict(base.dosif_ml_s)
+        dosif.update({k.upper(): float(v) for k, v in defecto.get("dosif_ml_s", {}).items()})
+        dosif.update({k.upper(): float(v) for k, v in d.get("dosif_ml_s", {}).items()})
+        out[maquina] = Calibracion(float(d.get("agua_l_s", defecto.get("agua_l_s", base.agua_l_s))), dosif)
+    return out
+
+
+def calibracion_de(calibraciones: Dict[str, Calibracion], maquina: str) -> Calibracion:
+    return calibraciones.get(maquina) or calibraciones.get("*") or Calibracion()
+
+
+# ---------------- Consumo previsto ---------------- #
+
+@lru_cache(maxsize=256)
+def segundos_plan(timeline: Timeline) -> Tuple[float, ...]:
+    """Segundos ON por recurso (orden RECURSOS) de una timeline; se calcula una vez por timeline."""
+    seg = dict.fromkeys(RECURSOS, 0.0)
+    for f in timeline.fases:
+        for c in f.on:
+            act = actuador_de(c) if c != PARO_TOTAL else None
+            if act in seg and c.upper().endswith("_ON"):
+                seg[act] += f.duracion_s
+    return tuple(seg[r] for r in RECURSOS)
+
+
+def consumo_plan(timeline: Timeline, cal: Calibracion | None = None) -> Dict[str, float]:
+    """Litros de agua y mL por bomba que debería gastar el ciclo."""
+    cal = cal or Calibracion()
+    return {r: s * k for r, s, k in zip(RECURSOS, segundos_plan(timeline), cal.tasas())}
+
+
+# ---------------- Consumo real ---------------- #
+
+class ContadorConsumo:
+    """
+    Oyente de CycleEngine: segundos ON por actuador según los comandos
+    ejecutados. `total` acumula segundos por actuador, `acumulado` las
+    cantidades de la flota con la calibración de cada máquina; con `historial`
+    cada corrida cerrada se vuelca a "consumos".
+    """
+    TIPOS = ("fase", "comando", "estado", "fin")
+
+    def __init__(self, calibraciones: Dict[str, Calibracion] | None = None, historial=None,
+                 reloj_pared=time.time, guardar_corridas: bool = False):
+        self.calibraciones = calibraciones or {}
+        self.h = historial
+        self.reloj_pared = reloj_pared
+        self.guardar_corridas = guardar_corridas
+        self.encendido: Dict[Tuple[str, str], float] = {}     # (maquina, actuador) -> t ON
+        self.total: Dict[str, float] = {}
+        self._corrida: Dict[str, Tuple[str, float, Dict[str, float]]] = {}  # maquina -> (ciclo, t pared, seg)
+        self.corridas: list = []
+        self.acumulado: Dict[str, float] = dict.fromkeys(RECURSOS, 0.0)   # L / mL de la flota
+
+    def conectar(self, engine):
+        engine.suscribir(lambda ev: self(ev, engine), tipos=self.TIPOS)
+
+    def __call__(self, ev, engine):
+        m = ev.maquina
+        if ev.tipo == "fase":
+            if m not in self._corrida and engine.timeline:
+                self._corrida[m] = (engine.timeline.nombre, self.reloj_pared(), {})
+        elif ev.tipo == "comando":
+            c = ev.datos["comando"]
+            if c == PARO_TOTAL:
+                self._apagar_todo(m, ev.t)
+                return
+            act = actuador_de(c)
+            if act is None:
+                return
+            self._cerrar(m, act, ev.t)
+            if c.endswith("_ON"):
+                self.encendido[(m, act)] = ev.t
+        elif ev.tipo == "estado":
+            # pausa, paro seguro o fin: el motor ya cortó todo con paro_total()
+            if engine.state != engine.RUNNING:
+                self._apagar_todo(m, ev.t)
+                if engine.state == engine.STOPPED:
+                    self._cerrar_corrida(m, completo=False)
+        elif ev.tipo == "fin":
+            self._apagar_todo(m, ev.t)
+            self._cerrar_corrida(m, completo=True)
+
+    def _apagar_todo(self, maquina: str, t: float):
+        for m, act in [k for k in self.encendido if k[0] == maquina]:
+            self._cerrar(m, act, t)
+
+    def _cerrar(self, maquina: str, act: str, t: float):
+        t0 = self.encendido.pop((maquina, act), None)
+        if t0 is None:
+            return
+        d = t - t0
+        self.total[act] = self.total.get(act, 0.0) + d
+        corrida = self._corrida.get(maquina)
+        if corrida:
+            corrida[2][act] = corrida[2].get(act, 0.0) + d
+
+    def _cerrar_corrida(self, maquina: str, completo: bool):
+        corrida = self._corrida.pop(maquina, None)
+        if not corrida:
+            return
+        ciclo, t, seg = corrida
+        tasas = calibracion_de(self.calibraciones, maquina).tasas()
+        cantidades = tuple(seg.get(r, 0.0) * k for r, k in zip(RECURSOS, tasas))
+        for r, v in zip(RECURSOS, cantidades):
+            self.acumulado[r] += v
+        if self.guardar_corridas:
+            self.corridas.append((t, maquina, ciclo, completo, cantidades))
+        if self.h is not None:
+            self.h.agregar("consumos", t=t, maquina=maquina, ciclo=ciclo, **dict(zip(COLUMNAS, cantidades)))
+
+
+# ---------------- Reportes ---------------- #
+
+def reporte_consumo(historial, por: str = "ciclo", desde: date | None = None, hasta: date | None = None,
+                    precios: Dict[str, float] | None = None) -> Dict[str, Dict[str, float]]:
+    """
+    Suma de consumos (y costo si se pasan precios por unidad de cada recurso)
+    agrupada por "ciclo", "maquina" o "dia". Lee solo las columnas necesarias
+    del historial; con numpy la suma es un bincount por columna.
+    """
+    precios = precios or {}
+    acumulado: Dict[str, list] = {}
+
+    def sumar(grupo: str, vector):
+        acc = acumulado.setdefault(grupo, [0.0] * (len(RECURSOS) + 1))
+        for i, v in enumerate(vector):
+            acc[i] += float(v)
+
+    cols = COLUMNAS + (("maquina",) if por == "maquina" else ("ciclo",))
+    # una sola pasada por el rango; cada bloque ya viene de un día
+    for dia, arrs in historial.columnas_por_dia("consumos", cols, desde, hasta):
+        n = len(arrs[COLUMNAS[0]])
+        if n == 0:
+            continue
+        if por == "dia":
+            if np is not None:
+                sumar(dia, [np.asarray(arrs[c], dtype=np.float64).sum() for c in COLUMNAS] + [n])
+            else:
+                sumar(dia, [sum(arrs[c]) for c in COLUMNAS] + [n])
+            continue
+        g = arrs[por]
+        if np is not None:
+            g = np.asarray(g).astype(np.int64)
+            cuenta = np.bincount(g)
+            sumas = [np.bincount(g, weights=np.asarray(arrs[c], dtype=np.float64), minlength=len(cuenta))
+                     for c in COLUMNAS]
+            for k in np.nonzero(cuenta)[0]:
+                sumar(historial.nombre_de(por, int(k)), [s[k] for s in sumas] + [cuenta[k]])
+        else:
+            for j in range(n):
+                sumar(historial.nombre_de(por, g[j]), [arrs[c][j] for c in COLUMNAS] + [1])
+
+    out: Dict[str, Dict[str, float]] = {}
+    for grupo, acc in acumulado.items():
+        fila = dict(zip(RECURSOS, acc))
+        fila["corridas"] = acc[-1]
+        if precios:
+            fila["costo"] = sum(fila[r] * precios.get(r, 0.0) for r in RECURSOS)
+        out[grupo] = fila
+    return out
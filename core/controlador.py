@@ -0,0 +1,246 @@
+# core/controlador.py
+"""
+Controlador: servicio de larga vida dueño de los backends (puertos serie) y
+de un CycleEngine por máquina. Un solo hilo hace tick() a todos los motores;
+la GUI y el menú de main.py son clientes (core/ipc.py) y pueden cerrarse o
+reiniciarse sin interrumpir una carga en curso.
+
+Los cambios se publican como DELTAS del snapshot de cada máquina: el delta se
+calcula una vez y se reparte igual a todos los suscriptores.
+"""
+from __future__ import annotations
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from .engine import CycleEngine, Evento
+from .timeline import Timeline, compilar_archivo
+from .interlocks import exigir
+from .backends import SimuladorBackend
+
+# Eventos del motor que pueden cambiar el snapshot publicado
+_EVENTOS_DELTA = {"estado", "fase", "tick", "fin", "comando"}
+
+Suscriptor = Callable[[dict], None]
+
+
+class Controlador:
+    def __init__(self, reloj: Callable[[], float] = time.monotonic, periodo: float = 0.1):
+        self.reloj = reloj
+        self.periodo = periodo          # techo del sueño entre ticks (vigilancia de emergencia)
+        self.lock = threading.RLock()
+        self.maquinas: Dict[str, CycleEngine] = {}
+        self._publicado: Dict[str, dict] = {}
+        self._suscriptores: List[Suscriptor] = []
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._vivo = False
+        self.cola = None                # core/cola.ColaTrabajos compartida (opcional)
+        self.corredores: Dict[str, object] = {}
+        self.admision = None            # core/potencia.ControlAdmision (opcional)
+        self.registradores: List[Callable] = []   # conectores de historial/trazas por máquina
+        self.vigia = None               # core/perfilado.VigiaBucle (opcional)
+        self.solapes = None             # reglas de core/solapes por máquina (opcional)
+
+    # ---------- máquinas ----------
+    def agregar_maquina(self, nombre: str, backend=None) -> CycleEngine:
+        with self.lock:
+            eng = CycleEngine(backend or SimuladorBackend(log=None), maquina=nombre, reloj=self.reloj)
+            eng.suscribir(self._on_evento)
+            if self.admision:
+                eng.admision = self.admision.solicitar
+            for conectar in self.registradores:
+                conectar(eng)
+            self.maquinas[nombre] = eng
+            self._publicado[nombre] = eng.snapshot()
+            return eng
+
+    def activar_cola(self, cola, listo: Dict[str, Callable[[], bool]] | None = None):
+        """Engancha una ColaTrabajos: cada máquina arranca sus trabajos sola."""
+        from .cola import CorredorCola
+
+        with self.lock:
+            self.cola = cola
+            for m in self.maquinas:
+                cond = (listo or {}).get(m, lambda: True)
+                self.corredores[m] = CorredorCola(self, cola, m, listo=cond)
+
+    def activar_admision(self, control):
+        """Limita la potencia simultánea de giro de toda la flota."""
+        with self.lock:
+            self.admision = control
+            for eng in self.maquinas.values():
+                eng.admision = control.solicitar
+
+    def activar_solapes(self, reglas: Dict[str, object]):
+        """Cada ciclo que se inicia pasa por core/solapes.optimizar con las reglas de su máquina."""
+        with self.lock:
+            self.solapes = reglas
+
+    def agregar_registrador(self, conectar: Callable[[CycleEngine], None]):
+        """conectar(engine) se aplica a las máquinas actuales y a las que se agreguen."""
+        with self.lock:
+            self.registradores.append(conectar)
+            for eng in self.maquinas.values():
+                conectar(eng)
+
+    def _motor(self, maquina: str) -> CycleEngine:
+        eng = self.maquinas.get(maquina)
+        if eng is None:
+            raise KeyError(f"Máquina desconocida: {maquina}")
+        return eng
+
+    # ---------- API (la usa core/ipc.py) ----------
+    def iniciar(self, maquina: str, timeline: Timeline | None = None, ciclo: str | None = None) -> dict:
+        if timeline is None:
+            if not ciclo:
+                raise ValueError("Falta 'ciclo' o 'timeline'")
+            timeline = compilar_archivo(Path(ciclo))   # ya verifica enclavamientos
+        else:
+            exigir(timeline)
+        ahorro = None
+        if self.solapes is not None:
+            from .solapes import optimizar, reglas_de
+            res = optimizar(timeline, reglas_de(self.solapes, maquina))
+            timeline, ahorro = res.timeline, res.ahorro_s
+        with self.lock:
+            eng = self._motor(maquina)
+            if eng.state in (CycleEngine.RUNNING, CycleEngine.PAUSED):
+                raise RuntimeError(f"{maquina} ya está ejecutando '{eng.timeline.nombre}'")
+            eng.cargar(timeline)
+            eng.iniciar()
+            self._despertar.set()
+            snap = eng.snapshot()
+        if ahorro is not None:
+            snap["ahorro_solapes_s"] = ahorro
+        return snap
+
+    def pausar(self, maquina: str) -> dict:
+        with self.lock:
+            eng = self._motor(maquina)
+            eng.pausar()
+            if eng.state == CycleEngine.PAUSED and self.admision:
+                # motor parado: el cupo queda libre; al reanudar se vuelve a pedir
+                self.admision.liberar(maquina)
+            self._despertar.set()
+            return eng.snapshot()
+
+    def detener(self, maquina: str) -> dict:
+        with self.lock:
+            eng = self._motor(maquina)
+            eng.detener()
+            if self.admision:
+                self.admision.liberar(maquina)
+            return eng.snapshot()
+
+    def comando(self, maquina: str, comando: str) -> str:
+        """Comando manual (menú de main.py). Solo con la máquina sin ciclo activo."""
+        with self.lock:
+            eng = self._motor(maquina)
+            if eng.state in (CycleEngine.RUNNING, CycleEngine.PAUSED):
+                raise RuntimeError(f"{maquina} tiene un ciclo activo; deténlo antes")
+            return eng.backend.enviar(comando)
+
+    def encolar(self, maquina: str, ciclo: str, prioridad: int = 0, inicio: float = 0.0) -> dict:
+        with self.lock:
+            self._motor(maquina)
+            if self.cola is None:
+                raise RuntimeError("El controlador no tiene cola de trabajos activa")
+            t = self.cola.encolar(maquina, ciclo, prioridad, inicio)
+            self._despertar.set()
+            return asdict(t)
+
+    def cancelar(self, id_: int) -> bool:
+        with self.lock:
+            return bool(self.cola and self.cola.cancelar(int(id_)))
+
+    def listar_cola(self, maquina: str | None = None) -> list:
+        with self.lock:
+            return [asdict(t) for t in self.cola.listar(maquina)] if self.cola else []
+
+    def estado(self, maquina: str | None = None) -> Dict[str, dict]:
+        with self.lock:
+            if maquina:
+                return {maquina: self._motor(maquina).snapshot()}
+            return {m: eng.snapshot() for m, eng in self.maquinas.items()}
+
+    # ---------- publicación de deltas ----------
+    def suscribir(self, fn: Suscriptor) -> Suscriptor:
+        with self.lock:
+            self._suscriptores.append(fn)
+        return fn
+
+    def desuscribir(self, fn: Suscriptor):
+        with self.lock:
+            if fn in self._suscriptores:
+                self._suscriptores.remove(fn)
+
+    def _publicar(self, msg: dict):
+        for fn in list(self._suscriptores):
+            fn(msg)
+
+    def _on_evento(self, ev: Evento):
+        if ev.tipo not in _EVENTOS_DELTA or not self._suscriptores:
+            return
+        eng = self.maquinas.get(ev.maquina)
+        if eng is None:
+            return
+        nuevo = eng.snapshot()
+        viejo = self._publicado.get(ev.maquina, {})
+        delta = {k: v for k, v in nuevo.items() if viejo.get(k) != v}
+        self._publicado[ev.maquina] = nuevo
+        if delta:
+            self._publicar({"tipo": "delta", "maquina": ev.maquina, "t": ev.t, "delta": delta})
+        if ev.tipo in ("estado", "fin"):
+            self._publicar({"tipo": ev.tipo, "maquina": ev.maquina, "t": ev.t, **ev.datos})
+
+    # ---------- bucle ----------
+    def tick(self):
+        with self.lock:
+            for eng in self.maquinas.values():
+                eng.tick()
+            # En el mismo tick en que una máquina termina, arranca el siguiente trabajo
+            for corredor in self.corredores.values():
+                corredor.tick()
+
+    def _espera(self) -> float:
+        with self.lock:
+            proximos = [p for p in (e.proximo_evento() for e in self.maquinas.values()) if p is not None]
+        if not proximos:
+            return self.periodo
+        return max(0.0, min(self.periodo, min(proximos) - self.reloj()))
+
+    def _bucle(self):
+        while self._vivo:
+            v = self.vigia
+            if v is None:
+                self.tick()
+                espera = self._espera()
+            else:
+                with v.medir("tick"):
+                    self.tick()
+                espera = self._espera()
+                v.latido(espera)
+            self._despertar.wait(espera)
+            self._despertar.clear()
+
+    def arrancar(self):
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._vivo = True
+        self._hilo = threading.Thread(target=self._bucle, name="controlador", daemon=True)
+        self._hilo.start()
+
+    def parar(self):
+        self._vivo = False
+        self._despertar.set()
+        if self._hilo:
+            self._hilo.join(timeout=2)
+        with self.lock:
+            for eng in self.maquinas.values():
+                if eng.state in (CycleEngine.RUNNING, CycleEngine.PAUSED):
+                    eng.detener()
+                eng.cerrar()
+            if self.cola:
+                self.cola.cerrar()
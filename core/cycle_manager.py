@@ -6,6 +6,25 @@ import os
 BASE_DIR = Path(__file__).resolve().parents[1]
 CICLOS_DIR = BASE_DIR / "ciclos"
 
+# Biblioteca SQLite opcional (core/biblioteca.py): LAVADORA_BIBLIOTECA=ruta.db
+_biblioteca = None
+
+def biblioteca():
+    """
+    Devuelve la Biblioteca configurada o None (modo carpeta ciclos/*.txt).
+    La primera vez que se abre una biblioteca vacía, importa la carpeta.
+    """
+    global _biblioteca
+    ruta = os.environ.get("LAVADORA_BIBLIOTECA")
+    if not ruta:
+        return None
+    if _biblioteca is None:
+        from .biblioteca import Biblioteca
+        _biblioteca = Biblioteca(ruta)
+        if not _biblioteca.listar() and CICLOS_DIR.exists():
+            _biblioteca.importar_carpeta(CICLOS_DIR)
+    return _biblioteca
+
 # ---------------- Utilidades internas (inputs validados) ---------------- #
 
 def _ask_int(prompt: str, default: int = 0) -> int:
@@ -67,6 +86,9 @@ def listar_ciclos() -> list[str]:
     """
     Devuelve una lista de nombres de ciclos (sin extensión) encontrados en la carpeta 'ciclos'.
     """
+    bib = biblioteca()
+    if bib is not None:
+        return bib.listar()
     asegurar_carpeta_ciclos()
     return sorted([p.stem for p in CICLOS_DIR.glob("*.txt")])
 
@@ -75,10 +97,11 @@ def crear_ciclo(nombre: str) -> str:
     Crea un archivo .txt con la PLANTILLA ESTÁNDAR de parámetros
     totalmente alineada con core/params_parser.py
     """
+    bib = biblioteca()
     carpeta = asegurar_carpeta_ciclos()
     ruta = carpeta / f"{nombre}.txt"
 
-    if ruta.exists():
+    if (bib is not None and nombre in bib.listar()) or (bib is None and ruta.exists()):
         return f"⚠️ El ciclo '{nombre}' ya existe."
 
     print("\nCreando ciclo de lavado (formato estándar)...\n")
@@ -118,6 +141,13 @@ CENTRIFUGADO_S={centrif}
 VEL={vel_cen}
 """
 
+    if bib is not None:
+        try:
+            rev = bib.guardar(nombre, contenido)
+        except ValueError as e:
+            return f"⚠️ {e}"
+        return f"✅ Ciclo '{nombre}' guardado en la biblioteca (revisión {rev})"
+
     with open(ruta, "w", encoding="utf-8") as archivo:
         archivo.write(contenido)
 
@@ -127,6 +157,12 @@ def eliminar_ciclo(nombre: str) -> str:
     """
     Elimina el archivo .txt del ciclo indicado (si existe).
     """
+    bib = biblioteca()
+    if bib is not None:
+        if bib.eliminar(nombre):
+            return f"🗑️ Ciclo '{nombre}' eliminado de la biblioteca."
+        return f"⚠️ El ciclo '{nombre}' no existe."
+
     carpeta = asegurar_carpeta_ciclos()
     ruta = carpeta / f"{nombre}.txt"
 
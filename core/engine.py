@@ -0,0 +1,374 @@
+# core/engine.py
+"""
+Motor único de ejecución de ciclos.
+
+Recorre una Timeline (core/timeline.py) fase por fase contra un backend de
+hardware intercambiable (core/backends.py). Es "tick-driven": quien lo usa
+llama a tick() periódicamente (GUI.after, hilo del controlador, simulador) o
+usa ejecutar() para el modo bloqueante de consola.
+
+Los tiempos se llevan por DEADLINE absoluto en el reloj inyectado, no
+restando segundos enteros: así no se acumula deriva y el mismo motor sirve
+con reloj real (time.monotonic) o con reloj virtual (simulación/replay).
+"""
+from __future__ import annotations
+import math
+import time
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .timeline import Timeline, Fase, PARO_TOTAL, estado_inicial, aplicar_comando
+
+
+@dataclass
+class Evento:
+    tipo: str                    # estado | fase | cambio_fase | comando | espera | retenida | tick | fin
+    maquina: str
+    t: float                     # instante en el reloj del motor
+    datos: Dict[str, object] = field(default_factory=dict)
+
+
+Oyente = Callable[[Evento], None]
+_TIPOS = ("estado", "fase", "cambio_fase", "comando", "espera", "retenida", "tick", "fin")
+
+
+class CycleEngine:
+    IDLE = "IDLE"
+    RUNNING = "RUNNING"
+    PAUSED = "PAUSED"
+    STOPPED = "STOPPED"
+
+    def __init__(self, backend, maquina: str = "", reloj: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.maquina = maquina
+        self.reloj = reloj
+
+        self.state = CycleEngine.IDLE
+        self.timeline: Optional[Timeline] = None
+        self.idx: int = 0
+        self.actuadores: Dict[str, object] = estado_inicial()
+
+        self._fin_fase: float = 0.0        # deadline de la fase actual
+        self._restante_pausa: float = 0.0  # segundos que quedaban al pausar
+        # Retención por admisión: (fase a la que se entra al terminar, segundos que
+        # tendrá, BOMBA antes de retener, reanuda una pausa). Mientras dura, la
+        # máquina está en estado seguro.
+        self._retencion: Optional[Tuple[int, float, bool, bool]] = None
+        self._ultimo_tick: tuple = ()      # último (idx, seg_fase, seg_total) emitido
+        self._oyentes: List[Tuple[Oyente, Optional[frozenset]]] = []
+        self._por_tipo: Dict[str, List[Oyente]] = {}
+        # Control de admisión opcional (core/potencia.ControlAdmision.solicitar):
+        # (maquina, fase siguiente, instante previsto) -> segundos a esperar
+        self.admision: Optional[Callable[[str, Fase, float], float]] = None
+        # Estimador opcional del restante (core/eta.ModeloETA); sin él se usa el nominal
+        self.eta = None
+
+    # ---------- suscripción ----------
+    def suscribir(self, oyente: Oyente, tipos: Optional[Iterable[str]] = None) -> Oyente:
+        """tipos=None => todos los eventos; si no, solo esos (evita trabajo en caliente)."""
+        self._oyentes.append((oyente, frozenset(tipos) if tipos else None))
+        self._reindexar()
+        return oyente
+
+    def desuscribir(self, oyente: Oyente):
+        self._oyentes = [(o, t) for o, t in self._oyentes if o is not oyente]
+        self._reindexar()
+
+    def _reindexar(self):
+        self._por_tipo: Dict[str, List[Oyente]] = {}
+        for o, tipos in self._oyentes:
+            for tipo in (tipos or _TIPOS):
+                self._por_tipo.setdefault(tipo, []).append(o)
+
+    def _emitir(self, tipo: str, **datos):
+        oyentes = self._por_tipo.get(tipo)
+        if not oyentes:
+            return
+        ev = Evento(tipo, self.maquina, self.reloj(), datos)
+        for o in tuple(oyentes):
+            o(ev)
+
+    # ---------- consultas ----------
+    @property
+    def fase(self) -> Optional[Fase]:
+        if self.timeline and self.idx < len(self.timeline.fases):
+            return self.timeline.fases[self.idx]
+        return None
+
+    @property
+    def retenida(self) -> bool:
+        """Esperando cupo de potencia (core/potencia.py) en estado seguro."""
+        return self._retencion is not None
+
+    def restante_fase(self) -> float:
+        if self.state == CycleEngine.RUNNING:
+            return max(0.0, self._fin_fase - self.reloj())
+        if self.state == CycleEngine.PAUSED:
+            return self._restante_pausa
+        f = self.fase
+        return float(f.duracion_s) if (f and self.state == CycleEngine.IDLE) else 0.0
+
+    def restante_total(self) -> float:
+        """Restante nominal: lo que queda de la fase actual + fases siguientes (O(1))."""
+        tl = self.timeline
+        if not tl or self.idx >= len(tl.fases) or self.state == CycleEngine.STOPPED:
+            return 0.0
+        siguientes = tl.restantes[self.idx + 1] if self.idx + 1 < len(tl.fases) else 0
+        if self._retencion and self._retencion[0] == self.idx:
+            siguientes += self._retencion[1]     # fase retenida antes de empezar: aún no corre
+        return self.restante_fase() + siguientes
+
+    def restante_estimado(self) -> float:
+        """Restante que se muestra: ETA aprendida si hay modelo, si no el nominal."""
+        tl = self.timeline
+        if self.eta is None or not tl or self.idx >= len(tl.fases) or self.state == CycleEngine.STOPPED:
+            return self.restante_total()
+        transcurrido = tl.fases[self.idx].duracion_s - self.restante_fase()
+        return max(self.eta.restante(self.maquina, tl, self.idx, transcurrido), self.restante_fase())
+
+    def proximo_evento(self) -> Optional[float]:
+        """Instante (reloj del motor) en que termina la fase actual, o None."""
+        return self._fin_fase if self.state == CycleEngine.RUNNING else None
+
+    def snapshot(self) -> dict:
+        f = self.fase
+        return {
+            "maquina": self.maquina,
+            "estado": self.state,
+            "ciclo": self.timeline.nombre if self.timeline else None,
+            "fase_idx": self.idx,
+            "fases": len(self.timeline.fases) if self.timeline else 0,
+            "fase": f.titulo if f else None,
+            "restante_fase": int(self.restante_fase() + 0.999),
+            "restante_total": int(self.restante_estimado() + 0.999),
+            "actuadores": dict(self.actuadores),
+        }
+
+    # ---------- control ----------
+    def cargar(self, timeline: Timeline):
+        self.timeline = timeline
+        self.state = CycleEngine.IDLE
+        self.idx = 0
+        self._ultimo_tick = ()
+        self._retencion = None
+
+    def iniciar(self, desde: Optional[int] = None, transcurrido: float = 0.0):
+        """
+        desde/transcurrido => reanudar un ciclo interrumpido en la fase `desde`,
+        con `transcurrido` segundos ya cumplidos de esa fase.
+        """
+        if not self.timeline or not self.timeline.fases:
+            self._emitir("estado", texto="No hay ciclo cargado.")
+            return
+        if self.state == CycleEngine.STOPPED or self.idx >= len(self.timeline.fases):
+            self.idx = 0        # detenido o terminado: el ciclo se repite desde el principio
+        if desde is not None:
+            self.idx = min(max(0, desde), len(self.timeline.fases) - 1)
+        self._retencion = None
+        self.state = CycleEngine.RUNNING
+        self._emitir("estado", texto="Ejecutando")
+        ahora, transcurrido = self.reloj(), max(0.0, transcurrido)
+        # Un ciclo que arranca (o se reanuda) directo en un giro también pide cupo
+        dur = max(0.0, self.fase.duracion_s - transcurrido)
+        espera = self._admitir(self.idx, dur, ahora)
+        if espera > 0:
+            self._retener(self.idx, dur, ahora + espera, espera)
+            return
+        self._entrar_fase(ahora - transcurrido)
+
+    def pausar(self):
+        """Pausa o reanuda (toggle), como el botón de la GUI."""
+        if self.state == CycleEngine.RUNNING:
+            self._restante_pausa = max(0.0, self._fin_fase - self.reloj())
+            self.state = CycleEngine.PAUSED
+            self._paro()
+            self._emitir("estado", texto="Pausado")
+            self._emitir_tick(forzar=True)
+        elif self.state == CycleEngine.PAUSED:
+            self.state = CycleEngine.RUNNING
+            ahora = self.reloj()
+            self._emitir("estado", texto="Reanudado")
+            if self._retencion:
+                # Pausado durante una retención: se vuelve al estado seguro, no a la fase
+                self._estado_seguro()
+                self._fin_fase = ahora + self._restante_pausa
+                return
+            # Reaplicar la fase actual con el tiempo que le quedaba; un giro
+            # a medias vuelve a pedir cupo como si recién empezara
+            espera = self._admitir(self.idx, self._restante_pausa, ahora)
+            if espera > 0:
+                self._retener(self.idx, self._restante_pausa, ahora + espera, espera, reanudar=True)
+                return
+            self._cmds(self.fase.on)
+            self._fin_fase = self.reloj() + self._restante_pausa
+
+    def detener(self):
+        self.state = CycleEngine.STOPPED
+        self._retencion = None
+        self._paro()
+        # Secuencia de paro seguro: abrir drenaje con todo lo demás apagado
+        self._cmd("BOMBA_ON")
+        self._emitir("estado", texto="Detenido (paro seguro)")
+        self._emitir_tick(forzar=True)
+
+    def tick(self):
+        """Avanza el motor hasta el instante actual del reloj."""
+        # Vigilancias rápidas
+        if self.state in (CycleEngine.RUNNING, CycleEngine.PAUSED) and self.backend.emergencia():
+            self.detener()
+        if self.state != CycleEngine.RUNNING:
+            return
+
+        ahora = self.reloj()
+        # Puede cruzar varias fases si el reloj saltó (simulación, GUI bloqueada)
+        while self.state == CycleEngine.RUNNING and ahora >= self._fin_fase:
+            if self._retencion:
+                self._fin_retencion()
+                continue
+            sig = self.idx + 1
+            if sig < len(self.timeline.fases):
+                espera = self._admitir(sig, self.timeline.fases[sig].duracion_s, self._fin_fase)
+                if espera > 0:
+                    # Sin cupo: se cierra la fase actual y se espera en estado seguro
+                    self._salir_fase()
+                    self._retener(sig, self.timeline.fases[sig].duracion_s, self._fin_fase + espera, espera)
+                    continue
+            self._salir_fase()
+            self.idx += 1
+            if self.idx >= len(self.timeline.fases):
+                self._terminar()
+                return
+            self._emitir("cambio_fase", idx=self.idx)
+            self._entrar_fase(self._fin_fase)
+        self._emitir_tick()
+
+    def ejecutar(self, timeline: Timeline, dormir: Callable[[float], None] = time.sleep,
+                 intervalo: float = 0.05):
+        """
+        Modo bloqueante: corre la timeline completa. Duerme hasta el próximo
+        deadline (con techo `intervalo` para vigilar la emergencia).
+        """
+        self.cargar(timeline)
+        self.iniciar()
+        while self.state in (CycleEngine.RUNNING, CycleEngine.PAUSED):
+            self.tick()
+            prox = self.proximo_evento()
+            espera = intervalo if prox is None else min(intervalo, prox - self.reloj())
+            if espera > 0:
+                dormir(espera)
+
+    def cerrar(self):
+        self.backend.cerrar()
+
+    # ---------- helpers internos ----------
+    def _cmd(self, comando: str) -> str:
+        t0 = self.reloj()
+        if comando == PARO_TOTAL:
+            self.backend.paro_total()
+            resp = "OK"
+        else:
+            resp = self.backend.enviar(comando)
+        aplicar_comando(self.actuadores, comando)
+        self._emitir("comando", comando=comando, respuesta=resp, t0=t0)
+        return resp
+
+    def _cmds(self, comandos):
+        """
+        Comandos de un límite de fase. Los consecutivos van en un solo
+        backend.enviar_lote (con créditos, viajan juntos al ESP32); PARO_TOTAL
+        corta el lote.
+        """
+        lote: List[str] = []
+        for c in comandos:
+            if c != PARO_TOTAL:
+                lote.append(c)
+                continue
+            self._lote(lote)
+            lote = []
+            self._cmd(c)
+        self._lote(lote)
+
+    def _lote(self, comandos: List[str]):
+        if len(comandos) <= 1:
+            for c in comandos:
+                self._cmd(c)
+            return
+        t0 = self.reloj()
+        for c, resp in zip(comandos, self.backend.enviar_lote(comandos)):
+            aplicar_comando(self.actuadores, c)
+            self._emitir("comando", comando=c, respuesta=resp, t0=t0)
+
+    def _paro(self):
+        self.backend.paro_total()
+        aplicar_comando(self.actuadores, PARO_TOTAL)
+
+    def _estado_seguro(self):
+        # Igual que el paro seguro: todo apagado y el drenaje abierto
+        self._cmds((PARO_TOTAL, "BOMBA_ON"))
+
+    def _admitir(self, idx: int, duracion: float, instante: float) -> float:
+        """Segundos que el control de admisión pide esperar antes de correr la fase idx."""
+        if not self.admision:
+            return 0.0
+        fase = self.timeline.fases[idx]
+        if duracion != fase.duracion_s:
+            fase = replace(fase, duracion_s=math.ceil(duracion))
+        return self.admision(self.maquina, fase, instante)
+
+    def _retener(self, idx: int, duracion: float, hasta: float, espera: float, reanudar: bool = False):
+        self._retencion = (idx, duracion, bool(self.actuadores.get("BOMBA")), reanudar)
+        self._estado_seguro()
+        self._fin_fase = hasta
+        self._emitir("retenida", idx=idx, espera_s=espera)
+
+    def _fin_retencion(self):
+        """Venció la espera: se vuelve a pedir cupo y, si lo hay, se entra a la fase retenida."""
+        idx, dur, bomba, reanudar = self._retencion
+        espera = self._admitir(idx, dur, self._fin_fase)
+        if espera > 0:
+            self._fin_fase += espera
+            self._emitir("retenida", idx=idx, espera_s=espera)
+            return
+        self._retencion = None
+        if not bomba and "BOMBA_ON" not in self.timeline.fases[idx].on:
+            self._cmd("BOMBA_OFF")
+        if reanudar:
+            # giro reanudado tras una pausa: sigue con lo que le quedaba
+            inicio = self._fin_fase
+            self._emitir("estado", texto="Reanudado")
+            self._cmds(self.fase.on)
+            self._fin_fase = inicio + dur
+            return
+        if idx != self.idx:
+            self.idx = idx
+            self._emitir("cambio_fase", idx=idx)
+        self._entrar_fase(self._fin_fase - (self.fase.duracion_s - dur))
+
+    def _entrar_fase(self, inicio: float):
+        f = self.fase
+        self._emitir("fase", idx=self.idx, titulo=f.titulo, duracion_s=f.duracion_s)
+        t0 = self.reloj()
+        self._cmds(f.on)
+        # El tiempo de la fase cuenta desde que sus comandos quedaron aplicados:
+        # se suma solo la latencia de esos comandos (0 con reloj virtual).
+        self._fin_fase = inicio + (self.reloj() - t0) + f.duracion_s
+        self._emitir("espera", idx=self.idx, duracion_s=f.duracion_s)
+
+    def _salir_fase(self):
+        self._cmds(self.fase.off)
+
+    def _terminar(self):
+        # idx pasado el final: fase None y restante 0 hasta que se vuelva a iniciar
+        self.idx = len(self.timeline.fases)
+        self.state = CycleEngine.IDLE
+        self._paro()
+        self._emitir("estado", texto="Ciclo terminado")
+        self._emitir("fin", ciclo=self.timeline.nombre)
+
+    def _emitir_tick(self, forzar: bool = False):
+        if "tick" not in self._por_tipo:
+            return
+        # Solo emite cuando cambia el segundo mostrado: deltas, no sondeo
+        clave = (self.idx, int(self.restante_fase() + 0.999), int(self.restante_estimado() + 0.999), self.state)
+        if forzar or clave != self._ultimo_tick:
+            self._ultimo_tick = clave
+            self._emitir("tick", idx=clave[0], restante_fase=clave[1], restante_total=clave[2])
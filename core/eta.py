@@ -0,0 +1,160 @@
+# core/eta.py
+"""
+Tiempo restante aprendido del historial.
+
+El restante nominal (suma de duraciones) no ve la latencia serie, los
+drenados fijos ni las fases que en la práctica duran más o menos. ModeloETA
+aprende, por máquina, ciclo y fase, el desvío real - plan con una media
+exponencial (incremental, sin guardar muestras) y predice:
+
+    restante = max(pred[idx] - transcurrido, 0) + suf[idx + 1]
+
+Las predicciones por fase y sus sumas de sufijo se calculan una vez por
+(máquina, timeline) y solo se recalculan cuando el modelo aprende algo
+nuevo, así la consulta por tick es O(1).
+
+    modelo = ModeloETA("eta.json")   # o ModeloETA() + entrenar(historial)
+    modelo.conectar(engine)          # aprende en vivo y engine.eta = modelo
+    Planificador(maquinas, duracion=modelo.duracion)
+"""
+from __future__ import annotations
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Dict, Tuple
+from .timeline import Timeline, compilar_archivo
+
+FLOTA = "*"   # estadística agregada de todas las máquinas
+
+
+class ModeloETA:
+    def __init__(self, ruta: str | Path | None = None, alfa: float = 0.2):
+        self.ruta = Path(ruta) if ruta else None
+        self.alfa = alfa
+        # clave -> [desvío medio (s), muestras]
+        #   (maquina, ciclo, idx)  exacta
+        #   (FLOTA, ciclo, idx)    misma fase en cualquier máquina
+        #   (maquina, nombre)      misma clase de fase en otro ciclo
+        self.stats: Dict[tuple, list] = {}
+        self._version = 0
+        self._perfiles: Dict[Tuple[str, int], tuple] = {}   # (maquina, id(tl)) -> (version, tl, pred, suf)
+        self._abierta: Dict[str, list] = {}                  # maquina -> [t0, idx, plan, nombre, válida]
+        if self.ruta and self.ruta.exists():
+            self._cargar()
+
+    def _cargar(self):
+        try:
+            for k, v in json.loads(self.ruta.read_text(encoding="utf-8")):
+                self.stats[tuple(k)] = [float(v[0]), int(v[1])]
+        except (OSError, ValueError, TypeError, IndexError) as e:
+            # un archivo dañado (corte de luz a mitad de escritura, edición a mano) no
+            # debe impedir arrancar: se empieza de cero y se sobrescribe al guardar
+            print(f"⚠️ Modelo ETA ilegible ({self.ruta}: {e}); se empieza sin historial")
+            self.stats.clear()
+
+    # ---------- aprendizaje ----------
+    def _actualizar(self, clave: tuple, desvio: float):
+        s = self.stats.get(clave)
+        if s is None:
+            self.stats[clave] = [desvio, 1]
+            return
+        s[1] += 1
+        a = max(self.alfa, 1.0 / s[1])   # media exacta mientras hay pocas muestras
+        s[0] += a * (desvio - s[0])
+
+    def observar(self, maquina: str, ciclo: str, idx: int, nombre: str, plan_s: float, real_s: float):
+        d = real_s - plan_s
+        self._actualizar((maquina, ciclo, idx), d)
+        self._actualizar((FLOTA, ciclo, idx), d)
+        self._actualizar((maquina, nombre), d)
+        self._version += 1
+
+    def entrenar(self, historial, desde: date | None = None, hasta: date | None = None) -> int:
+        """Ajusta con la tabla "fases" de core/historial.py; devuelve las filas usadas."""
+        n = 0
+        cols = ("maquina", "ciclo", "idx", "nombre", "plan_s", "real_s")
+        for arrs in historial.columnas("fases", cols, desde, hasta):
+            nombres = {dom: historial.catalogo.get(dom, []) for dom in ("maquina", "ciclo", "nombre")}
+            for j in range(len(arrs["idx"])):
+                self.observar(nombres["maquina"][int(arrs["maquina"][j])], nombres["ciclo"][int(arrs["ciclo"][j])],
+                              int(arrs["idx"][j]), nombres["nombre"][int(arrs["nombre"][j])],
+                              float(arrs["plan_s"][j]), float(arrs["real_s"][j]))
+                n += 1
+        return n
+
+    def guardar(self):
+        if not self.ruta:
+            return
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.ruta.with_suffix(".tmp")
+        tmp.write_text(json.dumps([[list(k), v] for k, v in self.stats.items()]), encoding="utf-8")
+        os.replace(tmp, self.ruta)
+
+    # ---------- oyente de CycleEngine ----------
+    TIPOS = ("fase", "retenida", "estado", "fin")
+
+    def conectar(self, engine):
+        """Aprende de cada fase completada y deja el modelo como engine.eta."""
+        engine.eta = self
+        engine.suscribir(lambda ev: self._evento(ev, engine), tipos=self.TIPOS)
+
+    def _cerrar_fase(self, maquina: str, t: float, ciclo: str):
+        a = self._abierta.pop(maquina, None)
+        if a and a[4]:
+            self.observar(maquina, ciclo, a[1], a[3], a[2], t - a[0])
+
+    def _evento(self, ev, engine):
+        m = ev.maquina
+        tl = engine.timeline
+        if ev.tipo == "fase" and tl:
+            self._cerrar_fase(m, ev.t, tl.nombre)
+            f = tl.fases[ev.datos["idx"]]
+            self._abierta[m] = [ev.t, ev.datos["idx"], f.duracion_s, f.nombre, True]
+        elif ev.tipo == "retenida" or (ev.tipo == "estado" and engine.state == engine.PAUSED):
+            # esperas de admisión y pausas del operador no son duración de la fase
+            if m in self._abierta:
+                self._abierta[m][4] = False
+        elif ev.tipo == "estado" and engine.state == engine.STOPPED:
+            self._abierta.pop(m, None)
+        elif ev.tipo == "fin" and tl:
+            self._cerrar_fase(m, ev.t, tl.nombre)
+            self.guardar()
+
+    # ---------- predicción ----------
+    def _desvio(self, maquina: str, ciclo: str, idx: int, nombre: str) -> float:
+        for clave in ((maquina, ciclo, idx), (FLOTA, ciclo, idx), (maquina, nombre)):
+            s = self.stats.get(clave)
+            if s:
+                return s[0]
+        return 0.0
+
+    def perfil(self, maquina: str, tl: Timeline) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+        """(predicción por fase, suma de sufijos) para una timeline; cacheado hasta que el modelo cambie."""
+        key = (maquina, id(tl))
+        hit = self._perfiles.get(key)
+        if hit and hit[0] == self._version and hit[1] is tl:
+            return hit[2], hit[3]
+        pred = tuple(max(0.0, f.duracion_s + self._desvio(maquina, tl.nombre, i, f.nombre))
+                     for i, f in enumerate(tl.fases))
+        acc, suf = 0.0, [0.0] * (len(pred) + 1)
+        for i in range(len(pred) - 1, -1, -1):
+            acc += pred[i]
+            suf[i] = acc
+        suf = tuple(suf)
+        if len(self._perfiles) > 256:
+            self._perfiles.clear()
+        self._perfiles[key] = (self._version, tl, pred, suf)
+        return pred, suf
+
+    def restante(self, maquina: str, tl: Timeline, idx: int, transcurrido: float) -> float:
+        """Segundos estimados hasta el fin del ciclo estando `transcurrido` s dentro de la fase idx."""
+        if idx >= len(tl.fases):
+            return 0.0
+        pred, suf = self.perfil(maquina, tl)
+        return max(pred[idx] - transcurrido, 0.0) + suf[idx + 1]
+
+    def duracion(self, ciclo: str, maquina: str = FLOTA) -> float:
+        """Duración esperada de un archivo de ciclo; sirve como Planificador(duracion=...)."""
+        tl = compilar_archivo(Path(ciclo))
+        return self.perfil(maquina, tl)[1][0] if tl.fases else 0.0
@@ -0,0 +1,318 @@
+# core/historial.py
+"""
+Historial columnar de ciclos, fases, comandos, consumos y telemetría.
+
+Estructura en disco (todo little-endian, ancho fijo, compatible con
+numpy.memmap / numpy.fromfile):
+
+    <base>/catalogo.json                 nombres <-> ids (máquinas, ciclos, ...)
+    <base>/<YYYY-MM-DD>/<tabla>/<col>.bin  una columna = un array plano
+
+Se escribe por append (buffer en memoria de pocas filas) y se lee por mmap,
+solo las columnas y días que pide la consulta. Con numpy instalado las
+agregaciones son vectoriales (bincount); sin numpy se usa memoryview y un
+bucle Python, con el mismo resultado.
+
+    h = Historial("historial")
+    h.media_por("fases", "real_s", por="maquina", donde={"nombre": "Llenado de agua"},
+                desde=date(2026, 9, 1))
+"""
+from __future__ import annotations
+import array
+import json
+import mmap
+import os
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None  # las consultas funcionan igual, sin vectorizar
+
+# tabla -> [(columna, typecode de array / dtype numpy)]
+_TIPOS = {"d": "<f8", "f": "<f4", "I": "<u4", "H": "<u2", "B": "u1"}
+ESQUEMA: Dict[str, List[Tuple[str, str]]] = {
+    "ciclos":     [("t", "d"), ("maquina", "H"), ("ciclo", "I"), ("plan_s", "f"), ("real_s", "f"), ("completo", "B")],
+    "fases":      [("t", "d"), ("maquina", "H"), ("ciclo", "I"), ("etapa", "H"), ("nombre", "H"),
+                   ("idx", "H"), ("plan_s", "f"), ("real_s", "f")],
+    "comandos":   [("t", "d"), ("maquina", "H"), ("comando", "H"), ("latencia_ms", "f")],
+    "telemetria": [("t", "d"), ("maquina", "H"), ("sensor", "H"), ("valor", "f")],
+    "consumos":   [("t", "d"), ("maquina", "H"), ("ciclo", "I"), ("agua_l", "f"), ("dosif_a_ml", "f"),
+                   ("dosif_b_ml", "f"), ("dosif_c_ml", "f"), ("dosif_d_ml", "f")],
+}
+# Columnas que se guardan como id del catálogo
+_CATEGORICAS = {"maquina", "ciclo", "etapa", "nombre", "comando", "sensor"}
+FILAS_BUFFER = 512
+
+
+def _dia(t: float) -> str:
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d")
+
+
+class Historial:
+    def __init__(self, base: str | Path):
+        self.base = Path(base)
+        self.base.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cat_path = self.base / "catalogo.json"
+        self.catalogo: Dict[str, List[str]] = (
+            json.loads(self._cat_path.read_text(encoding="utf-8")) if self._cat_path.exists() else {}
+        )
+        self._ids: Dict[str, Dict[str, int]] = {k: {n: i for i, n in enumerate(v)} for k, v in self.catalogo.items()}
+        self._cat_sucio = False
+        # (dia, tabla) -> {col: array}
+        self._buf: Dict[Tuple[str, str], Dict[str, array.array]] = {}
+        self._pendientes = 0
+
+    # ---------- catálogo ----------
+    def id_de(self, dominio: str, nombre: str) -> int:
+        ids = self._ids.setdefault(dominio, {})
+        i = ids.get(nombre)
+        if i is None:
+            i = ids[nombre] = len(ids)
+            self.catalogo.setdefault(dominio, []).append(nombre)
+            self._cat_sucio = True
+        return i
+
+    def ids_de(self, dominio: str, nombres) -> Dict[str, int]:
+        """id_de para otros hilos (core/retencion): reserva los ids con el lock de escritura."""
+        with self._lock:
+            return {n: self.id_de(dominio, n) for n in nombres}
+
+    def nombre_de(self, dominio: str, i: int) -> str:
+        return self.catalogo.get(dominio, [])[i]
+
+    # ---------- escritura ----------
+    def agregar(self, tabla: str, **fila):
+        """Agrega una fila; valores categóricos se pasan como texto."""
+        with self._lock:
+            dia = _dia(fila["t"])
+            cols = self._buf.get((dia, tabla))
+            if cols is None:
+                cols = self._buf[(dia, tabla)] = {c: array.array(tc) for c, tc in ESQUEMA[tabla]}
+            for c, _ in ESQUEMA[tabla]:
+                v = fila.get(c, 0)
+                if c in _CATEGORICAS:
+                    v = self.id_de(c, str(v))
+                cols[c].append(v)
+            self._pendientes += 1
+            if self._pendientes >= FILAS_BUFFER:
+                self._flush()
+
+    def _flush(self):
+        # catálogo antes que las columnas: un corte entre ambos deja nombres sin
+        # filas (inofensivo), nunca ids en disco que el catálogo no conoce
+        if self._cat_sucio:
+            tmp = self._cat_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.catalogo, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self._cat_path)
+            self._cat_sucio = False
+        for (dia, tabla), cols in self._buf.items():
+            carpeta = self.base / dia / tabla
+            carpeta.mkdir(parents=True, exist_ok=True)
+            for c, arr in cols.items():
+                if arr:
+                    with open(carpeta / f"{c}.bin", "ab") as f:
+                        f.write(arr.tobytes())
+        self._buf.clear()
+        self._pendientes = 0
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    # ---------- lectura ----------
+    def dias(self, desde: date | None = None, hasta: date | None = None) -> List[str]:
+        out = []
+        for p in sorted(self.base.iterdir()):
+            if not p.is_dir():
+                continue
+            try:
+                d = date.fromisoformat(p.name)
+            except ValueError:
+                continue
+            if (desde is None or d >= desde) and (hasta is None or d <= hasta):
+                out.append(p.name)
+        return out
+
+    def _columna_dia(self, dia: str, tabla: str, col: str):
+        tc = dict(ESQUEMA[tabla])[col]
+        ruta = self.base / dia / tabla / f"{col}.bin"
+        if not ruta.exists() or ruta.stat().st_size == 0:
+            return None
+        if np is not None:
+            return np.memmap(ruta, dtype=_TIPOS[tc], mode="r")
+        with open(ruta, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mm).cast(tc)
+
+    def columnas(self, tabla: str, cols: Sequence[str], desde: date | None = None,
+                 hasta: date | None = None) -> Iterator[Dict[str, object]]:
+        """Itera por día {col: array mmap}; solo toca los archivos pedidos."""
+        for _, arrs in self.columnas_por_dia(tabla, cols, desde, hasta):
+            yield arrs
+
+    def columnas_por_dia(self, tabla: str, cols: Sequence[str], desde: date | None = None,
+                         hasta: date | None = None) -> Iterator[Tuple[str, Dict[str, object]]]:
+        """Como columnas(), con el día ("YYYY-MM-DD") de cada bloque; un solo recorrido del rango."""
+        self.flush()
+        for dia in self.dias(desde, hasta):
+            arrs = {c: self._columna_dia(dia, tabla, c) for c in cols}
+            if all(a is not None for a in arrs.values()):
+                n = min(len(a) for a in arrs.values())   # fila a medio escribir al final: se ignora
+                yield dia, {c: a[:n] for c, a in arrs.items()}
+
+    # ---------- agregaciones ----------
+    def _agrupar(self, tabla: str, valor: str, por: str, donde: Dict[str, str] | None,
+                 desde: date | None, hasta: date | None) -> Tuple[Dict[int, float], Dict[int, int]]:
+        donde = donde or {}
+        filtros = {c: self._ids.get(c, {}).get(v, -1) for c, v in donde.items()}
+        cols = [valor, por] + [c for c in filtros if c not in (valor, por)]
+        suma: Dict[int, float] = {}
+        cuenta: Dict[int, int] = {}
+        for arrs in self.columnas(tabla, cols, desde, hasta):
+            if np is not None:
+                mask = np.ones(len(arrs[valor]), dtype=bool)
+                for c, i in filtros.items():
+                    mask &= arrs[c] == i
+                g = np.asarray(arrs[por])[mask].astype(np.int64)
+                v = np.asarray(arrs[valor])[mask].astype(np.float64)
+                if g.size == 0:
+                    continue
+                s = np.bincount(g, weights=v)
+                n = np.bincount(g)
+                for k in np.nonzero(n)[0]:
+                    suma[int(k)] = suma.get(int(k), 0.0) + float(s[k])
+                    cuenta[int(k)] = cuenta.get(int(k), 0) + int(n[k])
+            else:
+                va, ga = arrs[valor], arrs[por]
+                fs = [(arrs[c], i) for c, i in filtros.items()]
+                for j in range(len(va)):
+                    if all(a[j] == i for a, i in fs):
+                        k = ga[j]
+                        suma[k] = suma.get(k, 0.0) + va[j]
+                        cuenta[k] = cuenta.get(k, 0) + 1
+        return suma, cuenta
+
+    def media_por(self, tabla: str, valor: str, por: str = "maquina", donde: Dict[str, str] | None = None,
+                  desde: date | None = None, hasta: date | None = None) -> Dict[str, float]:
+        """Media de `valor` agrupada por una columna categórica."""
+        suma, cuenta = self._agrupar(tabla, valor, por, donde, desde, hasta)
+        return {self.nombre_de(por, k): suma[k] / cuenta[k] for k in suma}
+
+    def suma_por(self, tabla: str, valor: str, por: str = "maquina", donde: Dict[str, str] | None = None,
+                 desde: date | None = None, hasta: date | None = None) -> Dict[str, float]:
+        suma, _ = self._agrupar(tabla, valor, por, donde, desde, hasta)
+        return {self.nombre_de(por, k): v for k, v in suma.items()}
+
+    def sobretiempo_por_ciclo(self, desde: date | None = None, hasta: date | None = None) -> Dict[str, float]:
+        """Segundos medios de más (real - plan) por ciclo; positivo = se pasa."""
+        real = self.media_por("ciclos", "real_s", "ciclo", desde=desde, hasta=hasta)
+        plan = self.media_por("ciclos", "plan_s", "ciclo", desde=desde, hasta=hasta)
+        return {c: real[c] - plan[c] for c in real}
+
+    def cerrar(self):
+        self.flush()
+
+
+class RegistradorHistorial:
+    """
+    Oyente de CycleEngine que vuelca al historial: una fila por fase (plan vs
+    real), una por comando (latencia) y una por ciclo al terminar o detenerse.
+    El real_s de una fase no cuenta pausas del operador ni esperas de cupo de
+    potencia, igual que lo que aprende core/eta.py en vivo; el de un ciclo es
+    el tiempo de pared completo.
+    """
+    TIPOS = ("fase", "comando", "estado", "retenida", "fin")
+
+    def __init__(self, historial: Historial, reloj_pared=time.time):
+        self.h = historial
+        self.reloj_pared = reloj_pared
+        self._fase: Dict[str, Tuple[float, dict]] = {}     # maquina -> (t motor, datos fase)
+        self._ciclo: Dict[str, Tuple[float, float, str, float]] = {}  # maquina -> (t motor, t pared, nombre, plan)
+        self._quieta: Dict[str, list] = {}     # maquina -> [segundos excluidos, inicio del tramo en curso | None]
+
+    def conectar(self, engine):
+        engine.suscribir(lambda ev: self(ev, engine), tipos=self.TIPOS)
+
+    def _quieta_desde(self, maquina: str, t: float):
+        q = self._quieta.setdefault(maquina, [0.0, None])
+        if q[1] is None:
+            q[1] = t
+
+    def _quieta_hasta(self, maquina: str, t: float):
+        q = self._quieta.get(maquina)
+        if q and q[1] is not None:
+            q[0] += t - q[1]
+            q[1] = None
+
+    def _cerrar_fase(self, maquina: str, t: float):
+        self._quieta_hasta(maquina, t)
+        excluido = self._quieta.pop(maquina, [0.0])[0]
+        abierta = self._fase.pop(maquina, None)
+        ciclo = self._ciclo.get(maquina)
+        if abierta and ciclo:
+            t0, d = abierta
+            etapa, _, nombre = d["titulo"].partition(": ")
+            self.h.agregar("fases", t=ciclo[1] + (t0 - ciclo[0]), maquina=maquina, ciclo=ciclo[2],
+                           etapa=etapa.split(" (")[0], nombre=nombre, idx=d["idx"],
+                           plan_s=d["duracion_s"], real_s=max(0.0, t - t0 - excluido))
+
+    def __call__(self, ev, engine):
+        m = ev.maquina
+        if ev.tipo == "retenida" or (ev.tipo == "estado" and engine.state == engine.PAUSED):
+            self._quieta_desde(m, ev.t)
+        elif ev.tipo == "estado" and engine.state == engine.RUNNING and not engine.retenida:
+            self._quieta_hasta(m, ev.t)
+        if ev.tipo == "fase":
+            if m not in self._ciclo and engine.timeline:
+                tl = engine.timeline
+                self._ciclo[m] = (ev.t, self.reloj_pared(), tl.nombre, float(tl.total_s))
+            self._cerrar_fase(m, ev.t)
+            self._fase[m] = (ev.t, ev.datos)
+        elif ev.tipo == "comando":
+            self.h.agregar("comandos", t=self.reloj_pared(), maquina=m, comando=ev.datos["comando"],
+                           latencia_ms=(ev.t - ev.datos["t0"]) * 1000.0)
+        elif ev.tipo == "fin" or (ev.tipo == "estado" and engine.state == engine.STOPPED):
+            self._cerrar_fase(m, ev.t)
+            ciclo = self._ciclo.pop(m, None)
+            if ciclo:
+                self.h.agregar("ciclos", t=ciclo[1], maquina=m, ciclo=ciclo[2], plan_s=ciclo[3],
+                               real_s=ev.t - ciclo[0], completo=int(ev.tipo == "fin"))
+                self.h.flush()
+
+
+class RegistradorTelemetria:
+    """
+    Muestras de sensores a la tabla "telemetria": se engancha a la
+    SensoresCache del backend (core/sensores.py) y guarda como mucho una
+    fila por sensor numérico cada `periodo_s`. core/retencion las compacta
+    después en rollups.
+    """
+    def __init__(self, historial: Historial, periodo_s: float = 1.0, reloj_pared=time.time):
+        self.h = historial
+        self.periodo = periodo_s
+        self.reloj_pared = reloj_pared
+        self._ultima: Dict[str, float] = {}     # maquina -> t pared de la última muestra
+
+    def conectar(self, engine):
+        """Para Controlador.agregar_registrador: solo backends con sensores activados."""
+        cache = getattr(engine.backend, "sensores", None)
+        if cache is not None:
+            self.seguir(cache, engine.maquina)
+
+    def seguir(self, cache, maquina: str):
+        cache.suscribir(lambda snap: self.muestra(maquina, snap.valores))
+
+    def muestra(self, maquina: str, valores: Dict[str, object]):
+        t = self.reloj_pared()
+        if t - self._ultima.get(maquina, float("-inf")) < self.periodo:
+            return
+        self._ultima[maquina] = t
+        for sensor, valor in valores.items():
+            if isinstance(valor, (int, float)):
+                self.h.agregar("telemetria", t=t, maquina=maquina, sensor=sensor, valor=float(valor))
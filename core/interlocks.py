@@ -0,0 +1,110 @@
+# core/interlocks.py
+"""
+Enclavamientos (interlocks) verificados ESTÁTICAMENTE sobre la Timeline.
+
+La Timeline ya dice qué actuadores quedan encendidos en cada fase, así que
+las secuencias peligrosas o inútiles se detectan una sola vez al cargar el
+ciclo (compilar_archivo, Executor, GUI, validación masiva) y no en cada tick.
+
+Dos niveles de reglas:
+  - conflictos(estado): combinaciones de actuadores prohibidas en un mismo
+    instante (también las usa el optimizador de solapes, core/solapes.py).
+  - verificar(timeline): recorre las fases con el estado sombra y aplica las
+    reglas instantáneas más las de secuencia (giro sin drenado previo,
+    fases de duración cero, ciclo vacío).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from .timeline import Timeline, aplicar_comando, estado_inicial
+
+ERROR = "error"     # el ciclo no debe ejecutarse
+AVISO = "aviso"     # se puede ejecutar, pero gasta tiempo/agua o es dudoso
+
+
+@dataclass(frozen=True)
+class Violacion:
+    regla: str
+    severidad: str
+    idx: Optional[int]      # fase de la timeline (None = ciclo completo)
+    mensaje: str
+
+    def __str__(self) -> str:
+        donde = f"fase {self.idx + 1}" if self.idx is not None else "ciclo"
+        return f"[{self.severidad.upper()}] {self.regla} ({donde}): {self.mensaje}"
+
+
+class ErrorInterlock(ValueError):
+    """El ciclo viola un enclavamiento de severidad ERROR."""
+    def __init__(self, nombre: str, violaciones: List[Violacion]):
+        self.violaciones = violaciones
+        detalle = "; ".join(str(v) for v in violaciones)
+        super().__init__(f"Ciclo '{nombre}' rechazado por enclavamientos: {detalle}")
+
+
+def _girando(estado: Dict[str, object]) -> bool:
+    return estado["MOTOR"] != "OFF"
+
+
+def _centrifugando(estado: Dict[str, object]) -> bool:
+    return str(estado["MOTOR"]).endswith("_FIJA")
+
+
+# regla -> (severidad, predicado sobre el estado de actuadores, mensaje)
+REGLAS_INSTANTANEAS = {
+    "motor_con_llenado": (ERROR, lambda e: _girando(e) and e["VALVULA_AGUA"],
+                          "el motor gira con la válvula de llenado abierta"),
+    "llenado_con_drenaje": (AVISO, lambda e: e["VALVULA_AGUA"] and e["BOMBA"],
+                            "se llena y se drena a la vez (agua desperdiciada)"),
+}
+
+
+def conflictos(estado: Dict[str, object]) -> List[tuple]:
+    """(regla, severidad, mensaje) violados por un estado instantáneo de actuadores."""
+    return [(r, sev, msg) for r, (sev, pred, msg) in REGLAS_INSTANTANEAS.items() if pred(estado)]
+
+
+def verificar(timeline: Timeline) -> List[Violacion]:
+    out: List[Violacion] = []
+    if not timeline.fases:
+        return [Violacion("ciclo_vacio", ERROR, None, "el ciclo no tiene fases")]
+
+    estado = estado_inicial()
+    agua_sin_drenar = False     # hubo llenado y todavía no hubo drenado
+    for i, f in enumerate(timeline.fases):
+        for c in f.on:
+            aplicar_comando(estado, c)
+        if f.duracion_s <= 0:
+            out.append(Violacion("fase_cero", AVISO, i, f"'{f.titulo}' dura 0 s"))
+
+        for regla, sev, msg in conflictos(estado):
+            out.append(Violacion(regla, sev, i, f"'{f.titulo}': {msg}"))
+
+        if _centrifugando(estado) and agua_sin_drenar:
+            if estado["BOMBA"]:
+                out.append(Violacion("giro_sin_drenado", AVISO, i,
+                                     f"'{f.titulo}': gira mientras drena, sin drenado previo"))
+            else:
+                out.append(Violacion("giro_sin_drenado", ERROR, i,
+                                     f"'{f.titulo}': centrifuga con agua en el tambor (sin drenado previo)"))
+        if estado["VALVULA_AGUA"]:
+            agua_sin_drenar = True
+        if estado["BOMBA"] and f.duracion_s > 0:
+            agua_sin_drenar = False
+
+        for c in f.off:
+            aplicar_comando(estado, c)
+    return out
+
+
+def errores(violaciones: List[Violacion]) -> List[Violacion]:
+    return [v for v in violaciones if v.severidad == ERROR]
+
+
+def exigir(timeline: Timeline) -> List[Violacion]:
+    """Levanta ErrorInterlock si hay errores; devuelve los avisos."""
+    vs = verificar(timeline)
+    malos = errores(vs)
+    if malos:
+        raise ErrorInterlock(timeline.nombre, malos)
+    return vs
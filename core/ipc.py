@@ -0,0 +1,360 @@
+# core/ipc.py
+"""
+API local del controlador sobre socket Unix. Protocolo: una línea JSON por
+mensaje.
+
+  petición   {"op": "iniciar", "maquina": "M1", "ciclo": "ciclos/test.txt"}
+  respuesta  {"ok": true, "resultado": ...}  |  {"ok": false, "error": "..."}
+
+Operaciones: maquinas, estado, iniciar, pausar, detener, comando, suscribir,
+encolar, cola, cancelar.
+Tras "suscribir" la conexión queda abierta y recibe primero un snapshot
+completo y luego solo deltas ({"tipo": "delta", ...}).
+
+Arranque del servicio:
+    python -m core.ipc --maquina M1=/dev/ttyUSB0 --maquina M2=sim
+    python -m core.ipc --maquina M1=sim --web 8080     # + tablero (core/web.py)
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+from typing import Iterator, Optional
+from .controlador import Controlador
+from .timeline import Timeline
+
+SOCKET_POR_DEFECTO = os.environ.get("LAVADORA_SOCKET", "/tmp/lavadora.sock")
+COLA_SUSCRIPTOR = 256   # mensajes pendientes por cliente antes de desconectarlo
+
+
+def _linea(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# =========================
+#   SERVIDOR
+# =========================
+
+class _Manejador(socketserver.StreamRequestHandler):
+    def handle(self):
+        ctrl: Controlador = self.server.controlador
+        for raw in self.rfile:
+            try:
+                req = json.loads(raw)
+            except ValueError:
+                self._responder({"ok": False, "error": "JSON inválido"})
+                continue
+            if req.get("op") == "suscribir":
+                self._suscribir(ctrl)
+                return
+            try:
+                self._responder({"ok": True, "resultado": self._despachar(ctrl, req)})
+            except Exception as e:
+                self._responder({"ok": False, "error": str(e)})
+
+    def _responder(self, obj: dict):
+        self.wfile.write(_linea(obj))
+        self.wfile.flush()
+
+    def _despachar(self, ctrl: Controlador, req: dict):
+        op = req.get("op")
+        maq = req.get("maquina")
+        if op == "maquinas":
+            return sorted(ctrl.maquinas)
+        if op == "estado":
+            return ctrl.estado(maq)
+        if op == "iniciar":
+            tl = Timeline.from_dict(req["timeline"]) if req.get("timeline") else None
+            return ctrl.iniciar(maq, timeline=tl, ciclo=req.get("ciclo"))
+        if op == "pausar":
+            return ctrl.pausar(maq)
+        if op == "detener":
+            return ctrl.detener(maq)
+        if op == "comando":
+            return ctrl.comando(maq, req["comando"])
+        if op == "encolar":
+            return ctrl.encolar(maq, req["ciclo"], req.get("prioridad", 0), req.get("inicio", 0.0))
+        if op == "cola":
+            return ctrl.listar_cola(maq)
+        if op == "cancelar":
+            return ctrl.cancelar(req["id"])
+        raise ValueError(f"Operación desconocida: {op}")
+
+    def _suscribir(self, ctrl: Controlador):
+        srv: ServidorIPC = self.server
+        # Cola acotada por cliente: un cliente lento se desconecta, no frena al resto
+        cola: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=COLA_SUSCRIPTOR)
+        # snapshot y alta bajo el lock (ningún delta se pierde ni llega antes);
+        # la escritura fuera: un suscriptor trabado no frena tick() ni comandos
+        with ctrl.lock:
+            inicial = _linea({"tipo": "snapshot", "maquinas": ctrl.estado()})
+            srv.clientes.add(cola)
+        try:
+            self.wfile.write(inicial)
+            self.wfile.flush()
+            while True:
+                data = cola.get()
+                if data is None:
+                    return
+                self.wfile.write(data)
+                if cola.empty():
+                    self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            srv.clientes.discard(cola)
+
+
+class ServidorIPC(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, controlador: Controlador, ruta: str = SOCKET_POR_DEFECTO):
+        if os.path.exists(ruta):
+            os.unlink(ruta)
+        self.controlador = controlador
+        self.ruta = ruta
+        self.clientes: set = set()
+        super().__init__(ruta, _Manejador)
+        # Un único suscriptor en el controlador: cada delta se serializa una vez
+        controlador.suscribir(self._difundir)
+
+    def _difundir(self, msg: dict):
+        if not self.clientes:
+            return
+        data = _linea(msg)
+        for cola in list(self.clientes):
+            try:
+                cola.put_nowait(data)
+            except queue.Full:
+                self.clientes.discard(cola)
+                cola.queue.clear()
+                cola.put_nowait(None)
+
+    def server_close(self):
+        self.controlador.desuscribir(self._difundir)
+        for cola in list(self.clientes):
+            cola.queue.clear()
+            cola.put_nowait(None)
+        super().server_close()
+        if os.path.exists(self.ruta):
+            os.unlink(self.ruta)
+
+
+# =========================
+#   CLIENTE
+# =========================
+
+class ClienteControlador:
+    """Cliente delgado para GUI / menú. Una conexión para peticiones, otra por suscripción."""
+    def __init__(self, ruta: str = SOCKET_POR_DEFECTO, timeout: float = 5.0):
+        self.ruta = ruta
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._rfile = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def disponible(ruta: str = SOCKET_POR_DEFECTO) -> bool:
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(ruta):
+            return False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.settimeout(0.5)
+                s.connect(ruta)
+            return True
+        except OSError:
+            return False
+
+    def _conectar(self) -> socket.socket:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(self.timeout)
+        s.connect(self.ruta)
+        return s
+
+    def _pedir(self, **req):
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._sock = self._conectar()
+                    self._rfile = self._sock.makefile("rb")
+                self._sock.sendall(_linea(req))
+                linea = self._rfile.readline()
+            except OSError:
+                self._descartar()       # la próxima petición reconecta (controlador reiniciado)
+                raise
+            if not linea:
+                self._descartar()
+            resp = json.loads(linea or b"{}")
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error", "sin respuesta del controlador"))
+        return resp["resultado"]
+
+    def maquinas(self) -> list:
+        return self._pedir(op="maquinas")
+
+    def estado(self, maquina: str | None = None) -> dict:
+        return self._pedir(op="estado", maquina=maquina)
+
+    def iniciar(self, maquina: str, ciclo: str | None = None, timeline: Timeline | None = None) -> dict:
+        return self._pedir(op="iniciar", maquina=maquina, ciclo=ciclo,
+                           timeline=timeline.to_dict() if timeline else None)
+
+    def pausar(self, maquina: str) -> dict:
+        return self._pedir(op="pausar", maquina=maquina)
+
+    def detener(self, maquina: str) -> dict:
+        return self._pedir(op="detener", maquina=maquina)
+
+    def comando(self, maquina: str, comando: str) -> str:
+        return self._pedir(op="comando", maquina=maquina, comando=comando)
+
+    def encolar(self, maquina: str, ciclo: str, prioridad: int = 0, inicio: float = 0.0) -> dict:
+        return self._pedir(op="encolar", maquina=maquina, ciclo=ciclo, prioridad=prioridad, inicio=inicio)
+
+    def cola(self, maquina: str | None = None) -> list:
+        return self._pedir(op="cola", maquina=maquina)
+
+    def cancelar(self, id_: int) -> bool:
+        return self._pedir(op="cancelar", id=id_)
+
+    def eventos(self) -> Iterator[dict]:
+        """Snapshot inicial y luego deltas empujados por el controlador (bloqueante)."""
+        s = self._conectar()
+        s.settimeout(None)
+        try:
+            s.sendall(_linea({"op": "suscribir"}))
+            for raw in s.makefile("rb"):
+                yield json.loads(raw)
+        finally:
+            s.close()
+
+    def _descartar(self):
+        if self._sock:
+            self._sock.close()
+        self._sock = self._rfile = None
+
+    def cerrar(self):
+        with self._lock:
+            self._descartar()
+
+
+# =========================
+#   DAEMON
+# =========================
+
+def _perfil_por_senal(segundos: float = 10.0):
+    """kill -USR1 <pid>: perfila todos los hilos `segundos` y deja un .folded en /tmp."""
+    import signal
+    import time
+    if not hasattr(signal, "SIGUSR1"):
+        return
+
+    def perfilar(*_):
+        from .perfilado import perfilar_ventana
+        ruta = time.strftime("/tmp/lavadora-%Y%m%d-%H%M%S.folded")
+        perfilar_ventana(segundos, ruta, al_terminar=lambda r: print(f"🔥 Perfil guardado en {r}"))
+    signal.signal(signal.SIGUSR1, perfilar)
+
+
+def main(argv=None):
+    import argparse
+    from .backends import SimuladorBackend, SerialBackend
+
+    ap = argparse.ArgumentParser(description="Controlador de lavadoras (servicio)")
+    ap.add_argument("--socket", default=SOCKET_POR_DEFECTO)
+    ap.add_argument("--maquina", action="append", default=[],
+                    help="NOMBRE=PUERTO o NOMBRE=sim (repetible)")
+    ap.add_argument("--cola", default=None, help="journal de la cola de trabajos (persistente)")
+    ap.add_argument("--historial", default=None, help="carpeta del historial columnar")
+    ap.add_argument("--crudo-dias", type=int, default=3,
+                    help="días de telemetría cruda antes de compactar a rollups")
+    ap.add_argument("--calibracion", default=None, help="JSON de caudales por máquina (core/consumo.py)")
+    ap.add_argument("--creditos", type=int, default=None,
+                    help="control de flujo por créditos con el ESP32 (0 = preguntar con CREDITS?)")
+    ap.add_argument("--sensores-ttl-ms", type=float, default=None,
+                    help="leer sensores con STATUS? y reutilizar el snapshot N ms (core/sensores.py)")
+    ap.add_argument("--solapes", default=None,
+                    help="JSON de reglas de solape por máquina (core/solapes.py)")
+    ap.add_argument("--tope-kw", type=float, default=None, help="potencia máxima simultánea de giro")
+    ap.add_argument("--web", type=int, default=None, metavar="PUERTO",
+                    help="tablero web de la flota (core/web.py)")
+    ap.add_argument("--web-host", default="0.0.0.0")
+    ap.add_argument("--trazas", default=None,
+                    help="carpeta para una traza Chrome/Perfetto por ciclo (core/traza.py)")
+    ap.add_argument("--vigia-ms", type=float, default=None,
+                    help="avisar (con pila) si el bucle de ticks se traba más de N ms")
+    args = ap.parse_args(argv)
+
+    ctrl = Controlador()
+    for spec in args.maquina or ["M1=sim"]:
+        nombre, _, puerto = spec.partition("=")
+        backend = (SimuladorBackend(log=None) if puerto in ("", "sim")
+                   else SerialBackend(port=puerto, creditos=args.creditos))
+        if args.sensores_ttl_ms and isinstance(backend, SerialBackend):
+            backend.activar_sensores(args.sensores_ttl_ms / 1000.0)
+        ctrl.agregar_maquina(nombre, backend)
+    historial = compactador = None
+    if args.cola:
+        from .cola import ColaTrabajos
+        ctrl.activar_cola(ColaTrabajos(args.cola))
+    if args.historial:
+        from .historial import Historial, RegistradorHistorial, RegistradorTelemetria
+        from .retencion import Compactador
+        historial = Historial(args.historial)
+        ctrl.agregar_registrador(RegistradorHistorial(historial).conectar)
+        # muestras de sensores: solo máquinas con --sensores-ttl-ms
+        ctrl.agregar_registrador(RegistradorTelemetria(historial).conectar)
+        from .consumo import ContadorConsumo, cargar_calibraciones
+        cals = cargar_calibraciones(args.calibracion) if args.calibracion else {}
+        ctrl.agregar_registrador(ContadorConsumo(cals, historial).conectar)
+        from .eta import ModeloETA
+        modelo = ModeloETA()
+        modelo.entrenar(historial)
+        ctrl.agregar_registrador(modelo.conectar)
+        compactador = Compactador(historial, crudo_dias=max(1, args.crudo_dias)).arrancar()
+    if args.solapes:
+        from .solapes import cargar_reglas
+        ctrl.activar_solapes(cargar_reglas(args.solapes))
+    if args.tope_kw:
+        from .potencia import ControlAdmision
+        ctrl.activar_admision(ControlAdmision(args.tope_kw))
+    trazas = None
+    if args.trazas:
+        from .traza import TrazaCiclos
+        trazas = TrazaCiclos(args.trazas)
+        ctrl.agregar_registrador(trazas.conectar)
+    if args.vigia_ms:
+        from .perfilado import VigiaBucle
+        ctrl.vigia = VigiaBucle("controlador", args.vigia_ms).arrancar()
+    ctrl.arrancar()
+    _perfil_por_senal()
+
+    srv = ServidorIPC(ctrl, args.socket)
+    print(f"✅ Controlador escuchando en {args.socket} ({', '.join(sorted(ctrl.maquinas))})")
+    web = None
+    if args.web is not None:
+        from .web import ServidorWeb
+        web = ServidorWeb(ctrl, args.web_host, args.web).arrancar()
+        print(f"✅ Tablero web en http://{args.web_host}:{web.puerto}/")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if web:
+            web.parar()
+        srv.server_close()
+        ctrl.parar()
+        if trazas:
+            trazas.cerrar()
+        if compactador:
+            compactador.parar()
+        if historial:
+            historial.cerrar()      # filas aún en el buffer
+
+
+if __name__ == "__main__":
+    main()
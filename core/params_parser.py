@@ -6,6 +6,14 @@ from .params_model import LavadoParams, EnjuagueParams, CentrifugadoParams, Cicl
 SECCIONES_ESPERADAS = ("LAVADO", "ENJUAGUE", "CENTRIFUGADO")
 VEL_VALIDAS = {"BAJA", "MEDIA", "ALTA"}
 
+def formato_de(texto: str) -> str:
+    """'params' si el TXT tiene secciones [LAVADO]/..., si no 'pasos' (formato de la GUI)."""
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if linea and not linea.startswith("#"):
+            return "params" if linea.startswith("[") else "pasos"
+    return "pasos"
+
 def _parse_kv(line: str) -> Tuple[str, str]:
     k, v = line.split("=", 1)
     return k.strip().upper(), v.strip()
@@ -55,11 +63,13 @@ def _leer_secciones(path: Path) -> Dict[str, Dict[str, str]]:
     """
     if not path.exists():
         raise FileNotFoundError(f"No existe el archivo: {path}")
+    return _leer_secciones_texto(path.read_text(encoding="utf-8"))
 
+def _leer_secciones_texto(texto: str) -> Dict[str, Dict[str, str]]:
     data: Dict[str, Dict[str, str]] = {}
     section: str | None = None
 
-    for raw in path.read_text(encoding="utf-8").splitlines():
+    for raw in texto.splitlines():
         line = raw.strip()
         if not line or line.startswith("#"):
             continue
@@ -87,7 +97,13 @@ def load_params_txt(path: Path) -> CicloParams:
       - DOSIFICAR con claves A,B,C,D (faltantes → 0)
       - ENJUAGUE.REPETICIONES ≥ 0
     """
-    data = _leer_secciones(path)
+    return _params_desde_secciones(_leer_secciones(path))
+
+def load_params_text(texto: str) -> CicloParams:
+    """Igual que load_params_txt, pero desde el contenido (p. ej. guardado en core/biblioteca.py)."""
+    return _params_desde_secciones(_leer_secciones_texto(texto))
+
+def _params_desde_secciones(data: Dict[str, Dict[str, str]]) -> CicloParams:
     _validar_secciones_presentes(data)
 
     # ----- LAVADO -----
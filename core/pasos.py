@@ -0,0 +1,113 @@
+# core/pasos.py
+"""
+Ciclos por pasos (formato de la GUI): una línea accion=...;duracion=...
+por paso, con agua=, quimico= y velocidad= opcionales.
+
+Vive en core para que la biblioteca, la validación, el controlador y la CLI
+no dependan del paquete gui. gui/dominio.py reexporta Step, Cycle,
+parse_kv y compile_cycle.
+
+leer_pasos() es el único parser: devuelve el Cycle con los pasos válidos y
+la lista de problemas ("línea N: ..."). Una línea sin acción/duración, con
+acción desconocida o duración inválida NO entra al ciclo; un agua/químico/
+velocidad inválido se reporta pero el paso se conserva.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .timeline import Timeline, fase_de_paso
+
+ACCIONES = {"prelavado", "lavado", "enjuague", "centrifugado", "spin", "drenaje", "descarga"}
+AGUAS = {"fria", "caliente"}
+VELOCIDADES = {"bajo", "baja", "medio", "media", "alto", "alta"}
+QUIMICOS = {"A", "B", "C", "D"}
+
+
+@dataclass
+class Step:
+    accion: str
+    duracion: int  # segundos
+    agua: Optional[str] = None         # 'fria' | 'caliente' | None
+    quimico: Optional[str] = None      # 'A' | 'B' | ...
+    velocidad: Optional[str] = None    # 'bajo' | 'medio' | 'alto'
+
+    def to_human(self, idx: int) -> str:
+        parts = [f"Paso {idx}: {self.accion.capitalize()} - {self.duracion}s"]
+        if self.agua:
+            parts.append(f"Agua {self.agua}")
+        if self.quimico:
+            parts.append(f"Químico {self.quimico}")
+        if self.velocidad:
+            parts.append(self.velocidad.capitalize())
+        return " ".join(parts)
+
+
+@dataclass
+class Cycle:
+    nombre: str
+    pasos: List[Step] = field(default_factory=list)
+
+    @property
+    def total_duracion(self) -> int:
+        return sum(p.duracion for p in self.pasos)
+
+
+def parse_kv(segment: str) -> Dict[str, str]:
+    out = {}
+    for par in segment.split(";"):
+        if not par.strip():
+            continue
+        if "=" in par:
+            k, v = par.split("=", 1)
+            out[k.strip().lower()] = v.strip()
+    return out
+
+
+def leer_pasos(texto: str, nombre: str) -> Tuple[Cycle, List[str]]:
+    """(ciclo, problemas). Una línea nombre= pisa `nombre`."""
+    pasos: List[Step] = []
+    problemas: List[str] = []
+    for n, linea in enumerate(texto.splitlines(), 1):
+        linea = linea.strip()
+        if not linea or linea.startswith("#"):
+            continue
+        if linea.lower().startswith("nombre="):
+            nombre = linea.split("=", 1)[1].strip()
+            continue
+        kv = parse_kv(linea)
+
+        def mal(msg: str):
+            problemas.append(f"línea {n}: {msg}")
+
+        accion, dur = kv.get("accion"), kv.get("duracion")
+        if not accion or dur is None:
+            mal("falta 'accion' o 'duracion'")
+            continue
+        if accion.lower() not in ACCIONES:
+            mal(f"acción desconocida '{accion}'")
+            continue
+        try:
+            segundos = int(dur)
+        except ValueError:
+            mal(f"duración no entera '{dur}'")
+            continue
+        if segundos < 0:
+            mal(f"duración negativa '{dur}'")
+            continue
+        if kv.get("agua") and kv["agua"].lower() not in AGUAS:
+            mal(f"agua inválida '{kv['agua']}'")
+        if kv.get("quimico") and kv["quimico"].upper() not in QUIMICOS:
+            mal(f"químico inválido '{kv['quimico']}'")
+        if kv.get("velocidad") and kv["velocidad"].lower() not in VELOCIDADES:
+            mal(f"velocidad inválida '{kv['velocidad']}'")
+        pasos.append(Step(accion=accion, duracion=segundos, agua=kv.get("agua"),
+                          quimico=kv.get("quimico"), velocidad=kv.get("velocidad")))
+    return Cycle(nombre=nombre, pasos=pasos), problemas
+
+
+def compile_cycle(cycle: Cycle) -> Timeline:
+    """Un paso de la GUI = una fase del motor común (core/engine.py)."""
+    return Timeline(
+        nombre=cycle.nombre,
+        fases=tuple(fase_de_paso(p.accion, p.duracion, p.agua, p.quimico, p.velocidad) for p in cycle.pasos),
+    )
@@ -0,0 +1,228 @@
+# core/perfilado.py
+"""
+Herramientas para saber POR QUÉ se traba el panel o el controlador.
+
+  - VigiaBucle: el bucle (WasherUI._loop, Controlador._bucle) da un latido()
+    por iteración diciendo cuándo volverá. Un hilo guardián mira el reloj; si
+    el latido se atrasa más que el umbral, el hilo del bucle está bloqueado
+    (render, escaneo de ciclos, serie...) y el guardián toma muestras de SU
+    pila mientras sigue bloqueado. medir(etapa) acumula la duración de cada
+    etapa (p. ej. Executor.tick).
+  - Muestreador: perfilador por muestreo de pilas durante una ventana de
+    tiempo; vuelca formato "collapsed" (pila;pila;pila N) que leen
+    flamegraph.pl, speedscope o inferno.
+
+Apagado no cuesta nada: quien lo usa guarda None y no llama nada. Encendido,
+latido()/medir() son un par de lecturas de reloj; el trabajo pesado (leer
+pilas) lo hace otro hilo y solo cuando hay atasco o ventana de perfilado.
+"""
+from __future__ import annotations
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional
+
+
+def pila_colapsada(frame) -> str:
+    """'archivo:funcion;archivo:funcion' de la raíz a la hoja."""
+    partes = []
+    while frame is not None:
+        co = frame.f_code
+        partes.append(f"{os.path.basename(co.co_filename)}:{co.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(partes))
+
+
+def volcar_colapsado(pilas: Counter, ruta: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as fh:
+        for pila, n in pilas.most_common():
+            fh.write(f"{pila} {n}\n")
+    return ruta
+
+
+# ---------------- Detector de atascos ---------------- #
+
+@dataclass
+class Etapa:
+    n: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    sobre_umbral: int = 0
+
+    @property
+    def media_ms(self) -> float:
+        return self.total_ms / self.n if self.n else 0.0
+
+
+@dataclass
+class Atasco:
+    inicio: float                 # time.time() en que se detectó
+    duracion_ms: float = 0.0      # retraso total del latido (se completa al volver)
+    pilas: Counter = field(default_factory=Counter)
+
+    def pila_principal(self) -> str:
+        return self.pilas.most_common(1)[0][0] if self.pilas else ""
+
+
+class VigiaBucle:
+    def __init__(self, nombre: str, umbral_ms: float = 150.0, intervalo_muestra_s: float = 0.01,
+                 reloj: Callable[[], float] = time.perf_counter,
+                 avisar: Optional[Callable[[str], None]] = print, max_atascos: int = 100):
+        self.nombre = nombre
+        self.umbral = umbral_ms / 1000.0
+        self.intervalo = intervalo_muestra_s
+        self.reloj = reloj
+        self.avisar = avisar
+        self.etapas: Dict[str, Etapa] = {}
+        self.retraso = Etapa()                    # atraso de cada latido respecto a lo prometido
+        self.atascos: Deque[Atasco] = deque(maxlen=max_atascos)
+        self._hilo_id: Optional[int] = None
+        self._limite: Optional[float] = None      # instante en que el latido ya va tarde
+        self._previsto: Optional[float] = None
+        self._actual: Optional[Atasco] = None
+        self._lock = threading.Lock()
+        self._vivo = False
+        self._guardian: Optional[threading.Thread] = None
+
+    @classmethod
+    def desde_entorno(cls, nombre: str, var: str = "LAVADORA_VIGIA_MS") -> Optional["VigiaBucle"]:
+        """Vigía arrancado si la variable de entorno trae el umbral en ms; si no, None."""
+        umbral = os.environ.get(var)
+        if not umbral:
+            return None
+        return cls(nombre, float(umbral)).arrancar()
+
+    # ---------- lado del bucle (hilo vigilado) ----------
+    def latido(self, vuelvo_en_s: float):
+        """Inicio de una iteración; la siguiente debería llegar en vuelvo_en_s."""
+        ahora = self.reloj()
+        with self._lock:
+            self._hilo_id = threading.get_ident()
+            if self._previsto is not None:
+                atraso_ms = max(0.0, ahora - self._previsto) * 1000.0
+                self._sumar(self.retraso, atraso_ms)
+                if self._actual is not None:
+                    self._actual.duracion_ms = atraso_ms
+                    self._cerrar_atasco()
+            self._previsto = ahora + vuelvo_en_s
+            self._limite = self._previsto + self.umbral
+
+    @contextmanager
+    def medir(self, etapa: str) -> Iterator[None]:
+        t0 = self.reloj()
+        try:
+            yield
+        finally:
+            ms = (self.reloj() - t0) * 1000.0
+            with self._lock:
+                self._sumar(self.etapas.setdefault(etapa, Etapa()), ms)
+
+    def _sumar(self, e: Etapa, ms: float):
+        e.n += 1
+        e.total_ms += ms
+        e.max_ms = max(e.max_ms, ms)
+        if ms > self.umbral * 1000.0:
+            e.sobre_umbral += 1
+
+    def _cerrar_atasco(self):
+        a, self._actual = self._actual, None
+        self.atascos.append(a)
+        if self.avisar:
+            self.avisar(f"⚠️ [{self.nombre}] bucle trabado {a.duracion_ms:.0f} ms en {a.pila_principal()}")
+
+    # ---------- guardián ----------
+    def _vigilar(self):
+        while self._vivo:
+            time.sleep(self.intervalo)
+            with self._lock:
+                if self._limite is None or self.reloj() < self._limite:
+                    continue
+                frame = sys._current_frames().get(self._hilo_id)
+                if frame is None:
+                    continue
+                if self._actual is None:
+                    self._actual = Atasco(time.time())
+                self._actual.pilas[pila_colapsada(frame)] += 1
+
+    def arrancar(self) -> "VigiaBucle":
+        if not (self._guardian and self._guardian.is_alive()):
+            self._vivo = True
+            self._guardian = threading.Thread(target=self._vigilar, name=f"vigia-{self.nombre}", daemon=True)
+            self._guardian.start()
+        return self
+
+    def parar(self):
+        self._vivo = False
+        if self._guardian:
+            self._guardian.join(timeout=1)
+
+    def resumen(self) -> str:
+        filas = [f"[{self.nombre}] retraso del bucle: media {self.retraso.media_ms:.1f} ms, "
+                 f"máx {self.retraso.max_ms:.0f} ms, {len(self.atascos)} atascos"]
+        for nombre, e in sorted(self.etapas.items()):
+            filas.append(f"  {nombre}: n={e.n} media {e.media_ms:.2f} ms máx {e.max_ms:.1f} ms "
+                         f"(>{self.umbral * 1000:.0f} ms: {e.sobre_umbral})")
+        return "\n".join(filas)
+
+    def volcar_atascos(self, ruta: str) -> str:
+        """Todas las pilas capturadas en atascos, en formato collapsed."""
+        total: Counter = Counter()
+        for a in self.atascos:
+            total.update(a.pilas)
+        return volcar_colapsado(total, ruta)
+
+
+# ---------------- Perfilador por muestreo ---------------- #
+
+class Muestreador:
+    """Muestrea las pilas de `hilos` (ids; None = todos menos él) cada `intervalo_s`."""
+    def __init__(self, intervalo_s: float = 0.005, hilos: Optional[Iterable[int]] = None):
+        self.intervalo = intervalo_s
+        self.hilos = set(hilos) if hilos is not None else None
+        self.pilas: Counter = Counter()
+        self.muestras = 0
+        self._vivo = False
+        self._hilo: Optional[threading.Thread] = None
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while self._vivo:
+            for tid, frame in sys._current_frames().items():
+                if tid == propio or (self.hilos is not None and tid not in self.hilos):
+                    continue
+                self.pilas[pila_colapsada(frame)] += 1
+            self.muestras += 1
+            time.sleep(self.intervalo)
+
+    def arrancar(self) -> "Muestreador":
+        self._vivo = True
+        self._hilo = threading.Thread(target=self._muestrear, name="muestreador", daemon=True)
+        self._hilo.start()
+        return self
+
+    def parar(self) -> Counter:
+        self._vivo = False
+        if self._hilo:
+            self._hilo.join(timeout=1)
+        return self.pilas
+
+
+def perfilar_ventana(segundos: float, ruta: str, hilos: Optional[Iterable[int]] = None,
+                     al_terminar: Optional[Callable[[str], None]] = None,
+                     intervalo_s: float = 0.005) -> threading.Thread:
+    """Perfila `segundos` en segundo plano y vuelca el collapsed en `ruta`."""
+    def correr():
+        m = Muestreador(intervalo_s, hilos).arrancar()
+        time.sleep(segundos)
+        volcar_colapsado(m.parar(), ruta)
+        if al_terminar:
+            al_terminar(ruta)
+
+    h = threading.Thread(target=correr, name="perfil-ventana", daemon=True)
+    h.start()
+    return h
@@ -0,0 +1,212 @@
+# core/planificador.py
+"""
+Planificador de flota: asigna cargas pendientes a lavadoras.
+
+Usa la duración EXACTA de la timeline compilada de cada ciclo (o cualquier
+estimador inyectado, p.ej. el ETA aprendido) y:
+  1. Asigna por LPT (la carga más larga primero) a la máquina capaz que
+     termina antes. Es una heurística: la cota clásica de LPT (makespan
+     <= 4/3 del óptimo) solo vale con máquinas idénticas, todas las cargas
+     disponibles en t=0 y sin restricciones de capacidad; aquí hay
+     llegadas, ciclos no permitidos por máquina y el paso 2 cambia el
+     orden, así que no se garantiza ninguna cota.
+  2. Dentro de cada máquina secuencia por SPT sin retraso (entre las cargas
+     ya llegadas, la más corta primero) -> baja la espera media por carga.
+Respeta capacidad (ciclos permitidos por máquina) y stock de químicos.
+replanificar() rehace solo lo que aún no arrancó cuando una máquina termina
+antes o falla. Coste O(n·m + n log n): cientos de cargas en milisegundos.
+"""
+from __future__ import annotations
+import heapq
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from .timeline import Timeline, compilar_archivo
+
+
+@dataclass
+class Carga:
+    id: str
+    ciclo: str                   # ruta al .txt de parámetros
+    llegada: float = 0.0         # segundos desde el inicio del turno
+    prioridad: int = 0           # menor = antes
+
+
+@dataclass
+class MaquinaPlan:
+    nombre: str
+    libre_en: float = 0.0                    # cuándo termina lo que ya está corriendo
+    ciclos: Optional[Set[str]] = None        # ciclos permitidos (None = todos)
+    stock: Optional[Dict[str, float]] = None # segundos de dosificación disponibles por bomba A-D
+    activa: bool = True                      # False = en falla / mantenimiento
+
+    def puede(self, carga: Carga) -> bool:
+        return self.activa and (self.ciclos is None or Path(carga.ciclo).stem in self.ciclos)
+
+
+@dataclass
+class Asignacion:
+    carga: Carga
+    maquina: str
+    inicio: float
+    fin: float
+
+    @property
+    def espera(self) -> float:
+        return self.inicio - self.carga.llegada
+
+
+@dataclass
+class Plan:
+    asignaciones: List[Asignacion] = field(default_factory=list)
+    sin_asignar: List[Carga] = field(default_factory=list)
+
+    @property
+    def makespan(self) -> float:
+        return max((a.fin for a in self.asignaciones), default=0.0)
+
+    @property
+    def espera_media(self) -> float:
+        if not self.asignaciones:
+            return 0.0
+        return sum(a.espera for a in self.asignaciones) / len(self.asignaciones)
+
+    def por_maquina(self) -> Dict[str, List[Asignacion]]:
+        out: Dict[str, List[Asignacion]] = {}
+        for a in sorted(self.asignaciones, key=lambda a: a.inicio):
+            out.setdefault(a.maquina, []).append(a)
+        return out
+
+
+def dosis_de(timeline: Timeline) -> Dict[str, float]:
+    """Segundos de dosificación por bomba (A-D) que consume una timeline."""
+    d: Dict[str, float] = {}
+    for f in timeline.fases:
+        for c in f.on:
+            if c.startswith("DOSIF_") and c.endswith("_ON"):
+                k = c[len("DOSIF_"):-len("_ON")]
+                d[k] = d.get(k, 0.0) + f.duracion_s
+    return d
+
+
+def _duracion_compilada(ciclo: str) -> float:
+    return float(compilar_archivo(Path(ciclo)).total_s)
+
+
+def _dosis_compilada(ciclo: str) -> Dict[str, float]:
+    return dosis_de(compilar_archivo(Path(ciclo)))
+
+
+class Planificador:
+    def __init__(self, maquinas: Iterable[MaquinaPlan],
+                 duracion: Callable[[str], float] = _duracion_compilada,
+                 dosis: Callable[[str], Dict[str, float]] = _dosis_compilada):
+        self.maquinas: Dict[str, MaquinaPlan] = {m.nombre: m for m in maquinas}
+        self.duracion = duracion
+        self.dosis = dosis
+        self._cache_dur: Dict[str, float] = {}
+        self._cache_dosis: Dict[str, Dict[str, float]] = {}
+        self.plan = Plan()
+
+    # ---------- caché por ciclo (cada ciclo se compila una vez) ----------
+    def _dur(self, ciclo: str) -> float:
+        d = self._cache_dur.get(ciclo)
+        if d is None:
+            d = self._cache_dur[ciclo] = self.duracion(ciclo)
+        return d
+
+    def _dos(self, ciclo: str) -> Dict[str, float]:
+        d = self._cache_dosis.get(ciclo)
+        if d is None:
+            d = self._cache_dosis[ciclo] = self.dosis(ciclo)
+        return d
+
+    # ---------- planificación ----------
+    def planificar(self, cargas: Iterable[Carga]) -> Plan:
+        cargas = list(cargas)
+        libre = {m.nombre: m.libre_en for m in self.maquinas.values()}
+        stock = {m.nombre: dict(m.stock) if m.stock is not None else None
+                 for m in self.maquinas.values()}
+        lotes: Dict[str, List[Carga]] = {m: [] for m in self.maquinas}
+        plan = Plan()
+
+        # 1) Asignación LPT a la máquina capaz que termina antes
+        for c in sorted(cargas, key=lambda c: (c.prioridad, -self._dur(c.ciclo), c.llegada)):
+            dur = self._dur(c.ciclo)
+            dosis = self._dos(c.ciclo)
+            mejor, mejor_fin = None, 0.0
+            for m in self.maquinas.values():
+                if not m.puede(c):
+                    continue
+                st = stock[m.nombre]
+                if st is not None and any(st.get(k, 0.0) < v for k, v in dosis.items()):
+                    continue
+                fin = max(libre[m.nombre], c.llegada) + dur
+                if mejor is None or fin < mejor_fin:
+                    mejor, mejor_fin = m.nombre, fin
+            if mejor is None:
+                plan.sin_asignar.append(c)
+                continue
+            libre[mejor] = mejor_fin
+            lotes[mejor].append(c)
+            if stock[mejor] is not None:
+                for k, v in dosis.items():
+                    stock[mejor][k] -= v
+
+        # 2) Secuencia SPT sin retraso dentro de cada máquina
+        for nombre, lote in lotes.items():
+            plan.asignaciones.extend(self._secuenciar(nombre, self.maquinas[nombre].libre_en, lote))
+
+        self.plan = plan
+        return plan
+
+    def _secuenciar(self, maquina: str, t: float, lote: List[Carga]) -> List[Asignacion]:
+        pendientes = sorted(lote, key=lambda c: c.llegada)
+        listas: list = []
+        out: List[Asignacion] = []
+        i = 0
+        while i < len(pendientes) or listas:
+            while i < len(pendientes) and pendientes[i].llegada <= t:
+                c = pendientes[i]
+                heapq.heappush(listas, (c.prioridad, self._dur(c.ciclo), c.llegada, c.id, c))
+                i += 1
+            if not listas:
+                t = pendientes[i].llegada   # máquina ociosa hasta la próxima llegada
+                continue
+            c = heapq.heappop(listas)[-1]
+            fin = t + self._dur(c.ciclo)
+            out.append(Asignacion(c, maquina, t, fin))
+            t = fin
+        return out
+
+    def replanificar(self, ahora: float, maquina: str | None = None,
+                     libre_en: float | None = None, falla: bool = False) -> Plan:
+        """
+        Re-plan incremental: lo ya arrancado (inicio <= ahora) se respeta; el
+        resto se vuelve a asignar. Se llama cuando `maquina` terminó antes
+        (libre_en) o entró en falla (sus cargas en curso vuelven a la cola).
+        El stock de cada MaquinaPlan debe reflejar lo disponible en `ahora`.
+        """
+        if maquina is not None:
+            self.maquinas[maquina].activa = not falla
+
+        fijas: List[Asignacion] = []
+        pendientes: List[Carga] = list(self.plan.sin_asignar)
+        for a in self.plan.asignaciones:
+            if a.inicio <= ahora and not (falla and a.maquina == maquina):
+                fijas.append(a)
+            else:
+                pendientes.append(a.carga)
+
+        if maquina is not None and libre_en is not None:
+            # terminó antes (o después) de lo planeado: su carga en curso acaba en libre_en
+            for a in fijas:
+                if a.maquina == maquina and a.fin > ahora:
+                    a.fin = libre_en
+        for m in self.maquinas.values():
+            m.libre_en = max([ahora] + [a.fin for a in fijas if a.maquina == m.nombre])
+
+        nuevo = self.planificar(pendientes)
+        nuevo.asignaciones = fijas + nuevo.asignaciones
+        self.plan = nuevo
+        return nuevo
@@ -0,0 +1,180 @@
+# core/potencia.py
+"""
+Control de picos de potencia en la flota.
+
+El centrifugado (MOTOR_*_FIJA_ON) es la fase de mayor consumo. Si varias
+lavadoras llegan a la vez, se supera el límite de demanda del edificio.
+ControlAdmision conoce los intervalos de alta carga reservados y, cuando una
+máquina va a entrar en giro, devuelve el retraso MÍNIMO necesario para que la
+suma de potencias no pase del tope. Mientras tanto el motor cierra la fase
+anterior y espera en estado seguro (todo apagado, drenaje abierto), sin
+importar qué fase era: en los pasos de la GUI puede ser un llenado. Un giro
+reanudado tras una pausa vuelve a pedir cupo por el tiempo que le quedaba.
+
+comparar_politicas() calcula offline cuánto throughput cuesta cada política.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence, Tuple
+from .timeline import Timeline, Fase
+
+# kW aproximados por estado de motor (ajustar con la placa del motor)
+POTENCIA_KW: Dict[str, float] = {"ALTA_FIJA": 7.5, "MEDIA_FIJA": 5.0, "BAJA_FIJA": 3.0}
+
+Intervalo = Tuple[float, float, float]   # (inicio, fin, kW)
+
+
+def kw_de_fase(fase: Fase, tabla: Dict[str, float] = POTENCIA_KW) -> float:
+    kw = 0.0
+    for c in fase.on:
+        if c.startswith("MOTOR_") and c.endswith("_ON"):
+            kw = max(kw, tabla.get(c[len("MOTOR_"):-len("_ON")], 0.0))
+    return kw
+
+
+def intervalos_alta_carga(timeline: Timeline, inicio: float = 0.0,
+                          tabla: Dict[str, float] = POTENCIA_KW) -> List[Intervalo]:
+    """Intervalos (inicio, fin, kW) de alta carga de una timeline que arranca en `inicio`."""
+    out: List[Intervalo] = []
+    for i, f in enumerate(timeline.fases):
+        kw = kw_de_fase(f, tabla)
+        if kw > 0 and f.duracion_s > 0:
+            a = inicio + timeline.inicio_s(i)
+            out.append((a, a + f.duracion_s, kw))
+    return out
+
+
+def _carga_max(reservas: Sequence[Intervalo], a: float, b: float) -> float:
+    """Máxima potencia simultánea de `reservas` dentro de [a, b)."""
+    eventos = []
+    for ra, rb, kw in reservas:
+        if ra < b and rb > a:
+            eventos.append((max(ra, a), kw))
+            eventos.append((min(rb, b), -kw))
+    eventos.sort(key=lambda e: (e[0], e[1]))   # salidas antes que entradas en el mismo instante
+    carga = pico = 0.0
+    for _, d in eventos:
+        carga += d
+        pico = max(pico, carga)
+    return pico
+
+
+def retraso_minimo(reservas: Sequence[Intervalo], intervalos: Sequence[Intervalo], tope_kw: float) -> float:
+    """
+    Menor d >= 0 tal que desplazando `intervalos` d segundos la potencia
+    simultánea no supera `tope_kw`. El óptimo está en 0 o donde el inicio de
+    un intervalo coincide con el fin de una reserva.
+    """
+    if not intervalos:
+        return 0.0
+    candidatos = {0.0}
+    for _, rb, _ in reservas:
+        for a, _, _ in intervalos:
+            if rb > a:
+                candidatos.add(rb - a)
+    for d in sorted(candidatos):
+        if all(_carga_max(reservas, a + d, b + d) + kw <= tope_kw + 1e-9 for a, b, kw in intervalos):
+            return d
+    return max(candidatos)   # inalcanzable si un solo intervalo supera el tope
+
+
+class ControlAdmision:
+    """
+    Se engancha a cada CycleEngine (engine.admision = control.solicitar).
+    Antes de entrar en una fase de alta carga el motor pregunta cuánto esperar.
+    """
+    def __init__(self, tope_kw: float, tabla: Dict[str, float] = POTENCIA_KW):
+        self.tope_kw = tope_kw
+        self.tabla = tabla
+        self.reservas: Dict[str, Intervalo] = {}
+        self.retraso_acumulado: Dict[str, float] = {}
+
+    def solicitar(self, maquina: str, fase: Fase, ahora: float) -> float:
+        kw = kw_de_fase(fase, self.tabla)
+        if kw <= 0:
+            return 0.0
+        # reservas vencidas fuera
+        self.reservas = {m: r for m, r in self.reservas.items() if r[1] > ahora and m != maquina}
+        intervalo = (ahora, ahora + fase.duracion_s, kw)
+        d = retraso_minimo(list(self.reservas.values()), [intervalo], self.tope_kw)
+        if d <= 0:
+            self.reservas[maquina] = intervalo
+            return 0.0
+        self.retraso_acumulado[maquina] = self.retraso_acumulado.get(maquina, 0.0) + d
+        return d
+
+    def liberar(self, maquina: str):
+        self.reservas.pop(maquina, None)
+
+
+# ---------------- Evaluación offline de políticas ---------------- #
+
+@dataclass
+class ReportePolitica:
+    politica: str
+    pico_kw: float
+    retraso_total_s: float
+    makespan_s: float
+    ciclos_por_hora: float
+    costo_throughput_pct: float   # pérdida vs. sin control
+
+
+def _pico(intervalos: Iterable[Intervalo]) -> float:
+    iv = list(intervalos)
+    if not iv:
+        return 0.0
+    return _carga_max(iv, min(a for a, _, _ in iv), max(b for _, b, _ in iv))
+
+
+def comparar_politicas(arranques: Sequence[Tuple[Timeline, float]], tope_kw: float,
+                       tabla: Dict[str, float] = POTENCIA_KW) -> List[ReportePolitica]:
+    """
+    arranques: (timeline, segundo de arranque) de cada máquina.
+    Políticas:
+      sin_control      -> cada ciclo corre como está (referencia, puede pasar el tope)
+      retrasar_giro    -> solo se retrasa la entrada al giro (lo que hace ControlAdmision)
+      desplazar_ciclo  -> se retrasa el arranque completo del ciclo
+    """
+    base_fin = [ini + tl.total_s for tl, ini in arranques]
+    base_makespan = max(base_fin, default=0.0) - min((i for _, i in arranques), default=0.0)
+
+    def reporte(nombre: str, reservas: List[Intervalo], fines: List[float], retraso: float) -> ReportePolitica:
+        t0 = min((i for _, i in arranques), default=0.0)
+        makespan = max(fines, default=t0) - t0
+        cph = 3600.0 * len(fines) / makespan if makespan > 0 else 0.0
+        base_cph = 3600.0 * len(fines) / base_makespan if base_makespan > 0 else 0.0
+        costo = 100.0 * (1 - cph / base_cph) if base_cph else 0.0
+        return ReportePolitica(nombre, _pico(reservas), retraso, makespan, cph, costo)
+
+    out = [reporte("sin_control",
+                   [iv for tl, ini in arranques for iv in intervalos_alta_carga(tl, ini, tabla)],
+                   base_fin, 0.0)]
+
+    # retrasar_giro: cada intervalo de giro, en orden de llegada, se corre lo mínimo;
+    # todo lo que viene después en esa máquina se corre igual.
+    pendientes = sorted(((ini, k) for k, (_, ini) in enumerate(arranques)))
+    corrimiento = [0.0] * len(arranques)
+    reservas: List[Intervalo] = []
+    giros = sorted((a, k, b - a, kw) for k, (tl, ini) in enumerate(arranques)
+                   for a, b, kw in intervalos_alta_carga(tl, ini, tabla))
+    for a, k, dur, kw in giros:
+        a += corrimiento[k]
+        d = retraso_minimo(reservas, [(a, a + dur, kw)], tope_kw)
+        corrimiento[k] += d
+        reservas.append((a + d, a + d + dur, kw))
+    fines = [base_fin[k] + corrimiento[k] for k in range(len(arranques))]
+    out.append(reporte("retrasar_giro", reservas, fines, sum(corrimiento)))
+
+    # desplazar_ciclo: el ciclo entero se corre hasta que todos sus giros caben
+    reservas = []
+    fines = []
+    total = 0.0
+    for ini, k in pendientes:
+        tl = arranques[k][0]
+        iv = intervalos_alta_carga(tl, ini, tabla)
+        d = retraso_minimo(reservas, iv, tope_kw)
+        reservas.extend((a + d, b + d, kw) for a, b, kw in iv)
+        fines.append(ini + d + tl.total_s)
+        total += d
+    out.append(reporte("desplazar_ciclo", reservas, fines, total))
+    return out
@@ -0,0 +1,288 @@
+# core/retencion.py
+"""
+Retención por niveles de la telemetría del historial (core/historial.py).
+
+    crudo    muestras tal cual, solo los últimos `crudo_dias`
+    minuto   min/max/media/cuenta por (máquina, sensor, minuto), `minuto_dias`
+    hora     lo mismo por hora, para siempre
+
+Los rollups se guardan con codificación delta: el índice de bucket y los
+valores cuantizados (resolución por sensor) se escriben como diferencias
+contra el bucket anterior en varint zigzag. Una señal que cambia despacio
+ocupa 1-2 bytes por campo, así el disco crece muy por debajo de la tasa de
+muestreo.
+
+Compactador.paso() procesa UN día por llamada (incremental, idempotente);
+arrancar() lo corre en un hilo de fondo que nunca toma el lock del motor.
+"""
+from __future__ import annotations
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .historial import Historial, np
+
+MAGIA = b"LVRL1\n"
+NIVELES = {"minuto": 60, "hora": 3600}
+RESOLUCION_POR_DEFECTO = 0.01
+
+Serie = Tuple[int, int]   # (id máquina, id sensor) del catálogo
+
+
+@dataclass
+class Bucket:
+    t: float        # inicio del bucket (epoch)
+    minimo: float
+    maximo: float
+    media: float
+    cuenta: int
+
+
+# ---------------- varint zigzag ---------------- #
+
+def _zz(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+
+def _unzz(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+
+def _varint(n: int, out: bytearray):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _leer_varint(buf: memoryview, i: int) -> Tuple[int, int]:
+    n = shift = 0
+    while True:
+        b = buf[i]
+        i += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+# ---------------- codificación de un nivel ---------------- #
+
+def codificar(series: Dict[Serie, List[Bucket]], periodo: int, resolucion: Dict[int, float]) -> bytes:
+    out = bytearray(MAGIA)
+    _varint(len(series), out)
+    for (maq, sen), buckets in sorted(series.items()):
+        res = resolucion.get(sen, RESOLUCION_POR_DEFECTO)
+        _varint(maq, out)
+        _varint(sen, out)
+        _varint(len(buckets), out)
+        _varint(int(round(1 / res)), out)        # pasos por unidad
+        prev_b, prev_q = 0, (0, 0, 0)
+        for b in buckets:
+            idx = int(b.t // periodo)
+            q = (round(b.minimo / res), round(b.maximo / res), round(b.media / res))
+            _varint(_zz(idx - prev_b), out)
+            _varint(b.cuenta, out)
+            for k in range(3):
+                _varint(_zz(q[k] - prev_q[k]), out)
+            prev_b, prev_q = idx, q
+    return bytes(out)
+
+
+def decodificar(data: bytes, periodo: int) -> Dict[Serie, List[Bucket]]:
+    if not data.startswith(MAGIA):
+        raise ValueError("rollup inválido")
+    buf = memoryview(data)
+    i = len(MAGIA)
+    n_series, i = _leer_varint(buf, i)
+    out: Dict[Serie, List[Bucket]] = {}
+    for _ in range(n_series):
+        maq, i = _leer_varint(buf, i)
+        sen, i = _leer_varint(buf, i)
+        n, i = _leer_varint(buf, i)
+        pasos, i = _leer_varint(buf, i)
+        res = 1 / pasos
+        idx, q = 0, [0, 0, 0]
+        lst = out[(maq, sen)] = []
+        for _ in range(n):
+            d, i = _leer_varint(buf, i)
+            idx += _unzz(d)
+            cuenta, i = _leer_varint(buf, i)
+            for k in range(3):
+                d, i = _leer_varint(buf, i)
+                q[k] += _unzz(d)
+            lst.append(Bucket(float(idx * periodo), q[0] * res, q[1] * res, q[2] * res, cuenta))
+    return out
+
+
+# ---------------- agregación ---------------- #
+
+def _rollup_crudo(cols: Dict[str, object], periodo: int) -> Dict[Serie, List[Bucket]]:
+    t, m, s, v = cols["t"], cols["maquina"], cols["sensor"], cols["valor"]
+    out: Dict[Serie, List[Bucket]] = {}
+    if np is not None and len(t):
+        t, m, s, v = (np.asarray(x) for x in (t, m, s, v))
+        b = (t // periodo).astype(np.int64)
+        orden = np.lexsort((b, s, m))
+        b, m, s, v = b[orden], m[orden], s[orden], v[orden].astype(np.float64)
+        corte = np.concatenate(([True], (b[1:] != b[:-1]) | (s[1:] != s[:-1]) | (m[1:] != m[:-1])))
+        ini = np.nonzero(corte)[0]
+        mins = np.minimum.reduceat(v, ini)
+        maxs = np.maximum.reduceat(v, ini)
+        sums = np.add.reduceat(v, ini)
+        cnts = np.diff(np.append(ini, len(v)))
+        for k, j in enumerate(ini):
+            out.setdefault((int(m[j]), int(s[j])), []).append(
+                Bucket(float(b[j] * periodo), float(mins[k]), float(maxs[k]), float(sums[k] / cnts[k]), int(cnts[k])))
+        return out
+    acc: Dict[Tuple[int, int, int], List[float]] = {}
+    for j in range(len(t)):
+        key = (m[j], s[j], int(t[j] // periodo))
+        a = acc.get(key)
+        x = v[j]
+        if a is None:
+            acc[key] = [x, x, x, 1]
+        else:
+            a[0] = min(a[0], x)
+            a[1] = max(a[1], x)
+            a[2] += x
+            a[3] += 1
+    for (maq, sen, idx), (mn, mx, sm, n) in sorted(acc.items()):
+        out.setdefault((maq, sen), []).append(Bucket(float(idx * periodo), mn, mx, sm / n, n))
+    return out
+
+
+def _reagrupar(series: Dict[Serie, List[Bucket]], periodo: int) -> Dict[Serie, List[Bucket]]:
+    """Sube de nivel (minuto -> hora) combinando buckets."""
+    out: Dict[Serie, List[Bucket]] = {}
+    for key, buckets in series.items():
+        lst: List[Bucket] = []
+        for b in buckets:
+            t = (b.t // periodo) * periodo
+            if lst and lst[-1].t == t:
+                a = lst[-1]
+                n = a.cuenta + b.cuenta
+                a.media = (a.media * a.cuenta + b.media * b.cuenta) / n
+                a.minimo, a.maximo, a.cuenta = min(a.minimo, b.minimo), max(a.maximo, b.maximo), n
+            else:
+                lst.append(Bucket(t, b.minimo, b.maximo, b.media, b.cuenta))
+        out[key] = lst
+    return out
+
+
+class Compactador:
+    def __init__(self, historial: Historial, crudo_dias: int = 3, minuto_dias: int = 30,
+                 resolucion: Optional[Dict[str, float]] = None, hoy=date.today):
+        self.h = historial
+        self.crudo_dias = crudo_dias
+        self.minuto_dias = minuto_dias
+        self.resolucion_nombres = resolucion or {}
+        self.hoy = hoy
+        self.dir = self.h.base / "rollups"
+        self._hilo: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+
+    def _ruta(self, nivel: str, dia: str) -> Path:
+        return self.dir / nivel / f"{dia}.rlp"
+
+    def _resolucion(self) -> Dict[int, float]:
+        ids = self.h.ids_de("sensor", self.resolucion_nombres)
+        return {ids[n]: r for n, r in self.resolucion_nombres.items()}
+
+    def _escribir(self, nivel: str, dia: str, series: Dict[Serie, List[Bucket]]):
+        ruta = self._ruta(nivel, dia)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ruta.with_suffix(".tmp")
+        tmp.write_bytes(codificar(series, NIVELES[nivel], self._resolucion()))
+        tmp.replace(ruta)
+
+    def leer(self, nivel: str, dia: str) -> Dict[Serie, List[Bucket]]:
+        ruta = self._ruta(nivel, dia)
+        return decodificar(ruta.read_bytes(), NIVELES[nivel]) if ruta.exists() else {}
+
+    # ---------- trabajo incremental ----------
+    def pendientes(self) -> List[Tuple[str, str]]:
+        """(acción, día) por hacer, del más viejo al más nuevo."""
+        hoy = self.hoy()
+        limite_crudo = hoy - timedelta(days=self.crudo_dias)
+        limite_min = hoy - timedelta(days=self.minuto_dias)
+        out = []
+        for dia in self.h.dias(hasta=limite_crudo - timedelta(days=1)):
+            if (self.h.base / dia / "telemetria").exists():
+                out.append(("compactar", dia))
+        if (self.dir / "minuto").exists():
+            for p in sorted((self.dir / "minuto").glob("*.rlp")):
+                if date.fromisoformat(p.stem) < limite_min:
+                    out.append(("purgar_minuto", p.stem))
+        return out
+
+    def paso(self) -> bool:
+        """Hace UNA unidad de trabajo. Devuelve False si no quedaba nada."""
+        tareas = self.pendientes()
+        if not tareas:
+            return False
+        accion, dia = tareas[0]
+        if accion == "compactar":
+            d = date.fromisoformat(dia)
+            cols = next(self.h.columnas("telemetria", ("t", "maquina", "sensor", "valor"), d, d), None)
+            minuto = _rollup_crudo(cols, NIVELES["minuto"]) if cols else {}
+            # primero se escriben los rollups, después se borra el crudo (idempotente ante cortes)
+            self._escribir("minuto", dia, minuto)
+            self._escribir("hora", dia, _reagrupar(minuto, NIVELES["hora"]))
+            shutil.rmtree(self.h.base / dia / "telemetria", ignore_errors=True)
+        elif accion == "purgar_minuto":
+            self._ruta("minuto", dia).unlink(missing_ok=True)
+        return True
+
+    def _bucle(self, pausa: float):
+        while not self._parar.is_set():
+            if not self.paso():
+                self._parar.wait(pausa * 60)
+            else:
+                self._parar.wait(pausa)
+
+    def arrancar(self, pausa: float = 1.0) -> "Compactador":
+        """Compactación en segundo plano: un día por paso, con pausa entre pasos."""
+        if self._hilo and self._hilo.is_alive():
+            return self
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, args=(pausa,), name="compactador", daemon=True)
+        self._hilo.start()
+        return self
+
+    def parar(self):
+        """Pide parar y espera a que termine el paso en curso (un día): nunca a mitad de escritura."""
+        self._parar.set()
+        if self._hilo:
+            self._hilo.join()
+            self._hilo = None
+
+    # ---------- consultas ----------
+    def serie(self, maquina: str, sensor: str, desde: datetime, hasta: datetime,
+              nivel: str = "auto") -> List[Bucket]:
+        """
+        Buckets de una serie. nivel="auto" elige minuto para rangos de hasta
+        dos días y hora para rangos más largos; los días que aún tienen crudo
+        se agregan al vuelo. Un día cuyo rollup de minuto ya se purgó responde
+        con sus buckets de hora (la mejor resolución que queda).
+        """
+        if nivel == "auto":
+            nivel = "minuto" if (hasta - desde) <= timedelta(days=2) else "hora"
+        periodo = NIVELES[nivel]
+        key = (self.h._ids.get("maquina", {}).get(maquina, -1), self.h._ids.get("sensor", {}).get(sensor, -1))
+        t0, t1 = desde.timestamp(), hasta.timestamp()
+        out: List[Bucket] = []
+        d = desde.date()
+        while d <= hasta.date():
+            dia = d.isoformat()
+            series = self.leer(nivel, dia)
+            if not series and (self.h.base / dia / "telemetria").exists():
+                cols = next(self.h.columnas("telemetria", ("t", "maquina", "sensor", "valor"), d, d), None)
+                series = _rollup_crudo(cols, periodo) if cols else {}
+            if not series and nivel == "minuto":
+                series = self.leer("hora", dia)
+            out.extend(b for b in series.get(key, ()) if t0 <= b.t < t1)
+            d += timedelta(days=1)
+        return out
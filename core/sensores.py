@@ -0,0 +1,142 @@
+# core/sensores.py
+"""
+Snapshot de sensores con TTL detrás de las lecturas de HardwareIO/backends.
+
+Todas las entradas se leen juntas, con una sola consulta `STATUS?` al ESP32
+(o con la telemetría que llega empujada), y el snapshot se reutiliza
+mientras tenga menos de `ttl_s`. Así, todas las lecturas de un tick
+(emergencia, succión, ...) comparten una sola ida y vuelta serie en lugar
+de hacer una cada una.
+
+Cada snapshot sabe su edad. Una lectura de seguridad puede exigir datos
+frescos con max_edad. Si la consulta falla y lo guardado es más viejo que
+eso, se levanta LecturaObsoleta. emergencia() la trata como "pulsada":
+si no se puede confirmar que el paro NO está pulsado, se va a estado seguro.
+
+Respuesta esperada del firmware a STATUS?:
+    EMERGENCIA=0;SUCCION=1;NIVEL=42;TEMP=35.5
+"""
+from __future__ import annotations
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+COMANDO_STATUS = "STATUS?"
+TTL_POR_DEFECTO = 0.25      # s: un tick de GUI (200 ms) + margen
+TTL_CRITICO = 0.5           # s: antigüedad máxima aceptada para el paro de emergencia
+
+Lector = Callable[[], Dict[str, object]]
+
+
+class LecturaObsoleta(RuntimeError):
+    """No hay snapshot suficientemente fresco y la consulta falló."""
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    valores: Dict[str, object] = field(default_factory=dict)
+    t: float = float("-inf")        # instante de la lectura (reloj de la caché)
+    origen: str = ""                # consulta | telemetria
+
+    def edad(self, ahora: float) -> float:
+        return ahora - self.t
+
+
+def _valor(texto: str) -> object:
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return texto
+
+
+def parsear_status(linea: str) -> Dict[str, object]:
+    """'EMERGENCIA=0;SUCCION=1;TEMP=35.5' -> {'EMERGENCIA': 0, 'SUCCION': 1, 'TEMP': 35.5}"""
+    out: Dict[str, object] = {}
+    for par in linea.strip().split(";"):
+        if "=" in par:
+            k, v = par.split("=", 1)
+            out[k.strip().upper()] = _valor(v.strip())
+    if not out:
+        raise ValueError(f"Respuesta de estado inválida: {linea!r}")
+    return out
+
+
+def lector_serial(enviar: Callable[[str], str], comando: str = COMANDO_STATUS) -> Lector:
+    """Lector de una sola consulta sobre SerialManager.enviar_comando (o equivalente)."""
+    return lambda: parsear_status(enviar(comando))
+
+
+def lector_callbacks(callbacks: Dict[str, Callable[[], object]]) -> Lector:
+    """Agrupa lecturas sueltas (GPIO, Modbus...) en un solo snapshot."""
+    return lambda: {k: fn() for k, fn in callbacks.items()}
+
+
+class SensoresCache:
+    def __init__(self, leer: Lector, ttl_s: float = TTL_POR_DEFECTO, ttl_critico_s: float = TTL_CRITICO,
+                 reloj: Callable[[], float] = time.monotonic):
+        self.leer_todo = leer
+        self.ttl = ttl_s
+        self.ttl_critico = ttl_critico_s
+        self.reloj = reloj
+        self._snap = Snapshot()
+        self._lock = threading.Lock()
+        self._oyentes: List[Callable[[Snapshot], None]] = []
+        self.consultas = 0      # idas y vueltas reales al hardware
+        self.aciertos = 0       # lecturas servidas desde la caché
+        self.fallos = 0
+
+    def suscribir(self, oyente: Callable[[Snapshot], None]):
+        """oyente(snapshot) por cada snapshot nuevo (consulta o telemetría), no por acierto."""
+        self._oyentes.append(oyente)
+
+    def _avisar(self, snap: Snapshot):
+        for o in tuple(self._oyentes):
+            o(snap)
+
+    def snapshot(self, max_edad: Optional[float] = None) -> Snapshot:
+        """Snapshot con edad <= max_edad (por defecto el TTL); consulta solo si hace falta."""
+        limite = self.ttl if max_edad is None else max_edad
+        with self._lock:        # una sola consulta en vuelo; los demás reutilizan su resultado
+            snap = self._snap
+            if snap.edad(self.reloj()) <= limite:
+                self.aciertos += 1
+                return snap
+            try:
+                valores = self.leer_todo()
+            except Exception as e:
+                self.fallos += 1
+                raise LecturaObsoleta(f"sensores sin respuesta ({e}); último snapshot de hace "
+                                      f"{snap.edad(self.reloj()):.2f}s") from e
+            self.consultas += 1
+            snap = self._snap = Snapshot(dict(valores), self.reloj(), "consulta")
+        self._avisar(snap)
+        return snap
+
+    def empujar(self, valores: Dict[str, object], t: Optional[float] = None):
+        """Telemetría empujada por el firmware: refresca el snapshot sin consultar."""
+        with self._lock:
+            nuevos = dict(self._snap.valores)
+            nuevos.update(valores)
+            snap = self._snap = Snapshot(nuevos, self.reloj() if t is None else t, "telemetria")
+        self._avisar(snap)
+
+    def leer(self, clave: str, defecto: object = None, max_edad: Optional[float] = None) -> object:
+        return self.snapshot(max_edad).valores.get(clave.upper(), defecto)
+
+    def edad(self) -> float:
+        """Antigüedad del último snapshot (inf si nunca se leyó)."""
+        return self._snap.edad(self.reloj())
+
+    def emergencia(self) -> bool:
+        """Lectura de seguridad: exige snapshot de menos de ttl_critico; sin datos => pulsada."""
+        try:
+            return bool(self.leer("EMERGENCIA", 0, max_edad=min(self.ttl, self.ttl_critico)))
+        except LecturaObsoleta:
+            return True
+
+    def stats(self) -> Dict[str, float]:
+        return {"consultas": self.consultas, "aciertos": self.aciertos, "fallos": self.fallos,
+                "edad_s": self.edad()}
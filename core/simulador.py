@@ -0,0 +1,170 @@
+# core/simulador.py
+"""
+Simulación de eventos discretos de un turno completo de lavandería.
+
+Usa el MISMO CycleEngine que la consola, la GUI y el controlador, con un reloj
+virtual: en vez de dormir, el reloj salta directo al próximo evento (fin de
+fase o llegada de carga). Un turno de 24 h con decenas de máquinas se simula
+en milisegundos, así que barrer() puede evaluar cientos de escenarios en un
+pool de procesos.
+
+    from core.simulador import Escenario, simular
+    r = simular(Escenario(maquinas=4, turno_h=8, cargas_por_hora=6,
+                          mezcla={"ciclos/test.txt": 1.0}))
+"""
+from __future__ import annotations
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from .engine import CycleEngine
+from .backends import SimuladorBackend
+from .consumo import ContadorConsumo
+from .timeline import compilar_archivo
+
+
+@dataclass
+class Escenario:
+    maquinas: int = 1
+    turno_h: float = 8.0
+    cargas_por_hora: float = 4.0           # tasa de llegada (Poisson)
+    mezcla: Dict[str, float] = field(default_factory=dict)   # ruta ciclo -> peso
+    llegadas: Optional[List[Tuple[float, str]]] = None       # (segundo, ciclo) explícitas
+    tope_kw: Optional[float] = None        # control de potencia (core/potencia.py)
+    semilla: int = 0
+    nombre: str = ""
+
+
+@dataclass
+class Resultado:
+    escenario: str
+    cargas_llegadas: int
+    cargas_completadas: int
+    cargas_por_hora: float
+    utilizacion: Dict[str, float]          # fracción del turno ocupada por máquina
+    espera_media_s: float
+    cola_media: float                      # largo medio de la cola (ponderado en tiempo)
+    cola_max: int
+    actuador_s: Dict[str, float]           # segundos ON por actuador (agua, DOSIF_A..D, ...)
+    consumo: Dict[str, float] = field(default_factory=dict)   # L de agua / mL por bomba (core/consumo.py)
+    makespan_s: float = 0.0                # instante en que terminó la última carga
+
+
+def _generar_llegadas(esc: Escenario, fin: float) -> List[Tuple[float, str]]:
+    if esc.llegadas is not None:
+        return sorted(esc.llegadas)
+    if not esc.mezcla or esc.cargas_por_hora <= 0:
+        return []
+    rnd = random.Random(esc.semilla)
+    ciclos, pesos = zip(*esc.mezcla.items())
+    out, t = [], 0.0
+    while True:
+        t += rnd.expovariate(esc.cargas_por_hora / 3600.0)
+        if t >= fin:
+            return out
+        out.append((t, rnd.choices(ciclos, pesos)[0]))
+
+
+def simular(esc: Escenario) -> Resultado:
+    fin_turno = esc.turno_h * 3600.0
+    reloj = [0.0]
+    ahora = lambda: reloj[0]
+
+    contador = ContadorConsumo()
+    motores: List[CycleEngine] = []
+    admision = None
+    if esc.tope_kw:
+        from .potencia import ControlAdmision
+        admision = ControlAdmision(esc.tope_kw)
+    for i in range(esc.maquinas):
+        eng = CycleEngine(SimuladorBackend(log=None), maquina=f"M{i + 1}", reloj=ahora)
+        contador.conectar(eng)
+        if admision:
+            eng.admision = admision.solicitar
+        motores.append(eng)
+
+    llegadas = deque(_generar_llegadas(esc, fin_turno))
+    n_llegadas = len(llegadas)
+    cola: deque = deque()                 # (llegada, timeline)
+    timelines: Dict[str, object] = {}     # cada ciclo se compila una vez por simulación
+    ocupado = {e.maquina: 0.0 for e in motores}
+    inicio_carga: Dict[str, float] = {}
+    esperas: List[float] = []
+    completadas = 0
+    makespan = 0.0
+    area_cola = 0.0
+    cola_max = 0
+    t_prev = 0.0
+
+    while True:
+        # próximo evento: llegada o fin de fase
+        candidatos = [e.proximo_evento() for e in motores]
+        candidatos = [c for c in candidatos if c is not None]
+        if llegadas:
+            candidatos.append(llegadas[0][0])
+        if not candidatos:
+            break
+        t = min(candidatos)
+        if t > fin_turno and not any(e.state == CycleEngine.RUNNING for e in motores):
+            break
+        area_cola += len(cola) * (min(t, fin_turno) - t_prev) if t_prev < fin_turno else 0.0
+        reloj[0] = t_prev = t
+
+        while llegadas and llegadas[0][0] <= t:
+            tl_llegada, ciclo = llegadas.popleft()
+            tl = timelines.get(ciclo)
+            if tl is None:
+                tl = timelines[ciclo] = compilar_archivo(Path(ciclo))
+            cola.append((tl_llegada, tl))
+
+        for e in motores:
+            prox = e.proximo_evento()
+            if prox is None or prox > t:
+                continue
+            estaba = e.state
+            e.tick()
+            if estaba == CycleEngine.RUNNING and e.state == CycleEngine.IDLE:
+                completadas += 1
+                makespan = t
+                ocupado[e.maquina] += min(t, fin_turno) - inicio_carga.pop(e.maquina)
+
+        # despacho FIFO a máquinas libres (solo dentro del turno)
+        if t < fin_turno:
+            for e in motores:
+                if not cola:
+                    break
+                if e.state != CycleEngine.RUNNING:
+                    llegada, tl = cola.popleft()
+                    esperas.append(t - llegada)
+                    inicio_carga[e.maquina] = t
+                    e.cargar(tl)
+                    e.iniciar()
+        cola_max = max(cola_max, len(cola))
+
+    # cargas que siguen girando al terminar el turno (no debería quedar ninguna)
+    for m, t0 in inicio_carga.items():
+        ocupado[m] += max(0.0, fin_turno - t0)
+
+    return Resultado(
+        escenario=esc.nombre,
+        cargas_llegadas=n_llegadas,
+        cargas_completadas=completadas,
+        cargas_por_hora=completadas / esc.turno_h if esc.turno_h else 0.0,
+        utilizacion={m: (s / fin_turno if fin_turno else 0.0) for m, s in ocupado.items()},
+        espera_media_s=sum(esperas) / len(esperas) if esperas else 0.0,
+        cola_media=area_cola / fin_turno if fin_turno else 0.0,
+        cola_max=cola_max,
+        actuador_s=dict(contador.total),
+        consumo=dict(contador.acumulado),
+        makespan_s=makespan,
+    )
+
+
+def barrer(escenarios: Sequence[Escenario], procesos: int | None = None) -> List[Resultado]:
+    """Simula muchos escenarios en paralelo (un proceso por núcleo por defecto)."""
+    if procesos == 1 or len(escenarios) <= 1:
+        return [simular(e) for e in escenarios]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(simular, escenarios, chunksize=max(1, len(escenarios) // 32)))
@@ -0,0 +1,209 @@
+# core/solapes.py
+"""
+Optimizador de solapes entre fases de una Timeline compilada.
+
+compilar() reproduce la secuencia estricta del antiguo Executor: agitar,
+MOTOR_OFF, drenado fijo de 20 s por enjuague; balanceo, MOTOR_OFF, drenado
+breve de 10 s y recién entonces el giro. Aquí se reescribe la Timeline para
+solapar lo que es seguro solapar, según las reglas de cada máquina:
+
+  - drenado anticipado: la bomba de drenaje abre durante los últimos
+    `drenado_anticipado_s` de una agitación (el tambor sigue girando en
+    AUTO) y el drenado que sigue se acorta lo mismo.
+  - drenado en balanceo: el drenado breve previo al giro corre entero
+    durante el balanceo.
+  - rampa a giro: si el variador lo admite (`rampa_sin_paro`), del balanceo
+    se pasa a la velocidad de giro sin MOTOR_OFF y sin arrancar desde cero
+    (`rampa_ahorro_s` segundos menos de giro). Si el balanceo dura menos que
+    el drenado breve, lo que queda del drenado corre con el motor en AUTO y
+    de ahí se rampea al giro.
+
+Cada solape se aplica de a uno y la Timeline resultante pasa por
+core/interlocks.verificar: si aparece cualquier violación que el ciclo
+original no tenía, ese solape se rechaza (queda en `rechazados` con el
+motivo) y se sigue con el siguiente.
+
+Archivo de reglas (JSON), "*" = valor por defecto de la flota:
+    {"*":  {"drenado_anticipado_s": 5},
+     "M2": {"rampa_sin_paro": true, "rampa_ahorro_s": 3}}
+"""
+from __future__ import annotations
+import json
+from collections import Counter
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .interlocks import Violacion, verificar
+from .timeline import Fase, Timeline
+
+
+@dataclass(frozen=True)
+class ReglasSolape:
+    drenado_anticipado_s: int = 5      # segundos de agitación con la bomba ya abierta (0 = no)
+    min_agitar_s: int = 1              # agitación que queda siempre sin drenar
+    drenado_en_balanceo: bool = True   # el drenado breve corre durante el balanceo
+    rampa_sin_paro: bool = False       # el variador pasa de AUTO a FIJA sin MOTOR_OFF
+    rampa_ahorro_s: int = 0            # segundos de giro que ahorra no arrancar desde cero
+
+
+def cargar_reglas(ruta: str | Path) -> Dict[str, ReglasSolape]:
+    datos = json.loads(Path(ruta).read_text(encoding="utf-8"))
+    validas = {f.name for f in fields(ReglasSolape)}
+    defecto = {k: v for k, v in datos.get("*", {}).items() if k in validas}
+    return {m: ReglasSolape(**{**defecto, **{k: v for k, v in d.items() if k in validas}})
+            for m, d in datos.items()}
+
+
+def reglas_de(reglas: Dict[str, ReglasSolape], maquina: str) -> ReglasSolape:
+    return reglas.get(maquina) or reglas.get("*") or ReglasSolape()
+
+
+@dataclass(frozen=True)
+class Solape:
+    tipo: str           # drenado_anticipado | drenado_en_balanceo | rampa_giro
+    idx: int            # fase (de la timeline original) donde empieza el solape
+    ahorro_s: int
+    descripcion: str
+
+
+@dataclass
+class ResultadoSolapes:
+    timeline: Timeline
+    original_s: int
+    aplicados: List[Solape] = field(default_factory=list)
+    rechazados: List[Tuple[Solape, List[Violacion]]] = field(default_factory=list)
+
+    @property
+    def ahorro_s(self) -> int:
+        return self.original_s - self.timeline.total_s
+
+    def resumen(self) -> str:
+        filas = [f"{self.timeline.nombre}: {self.original_s}s -> {self.timeline.total_s}s "
+                 f"(-{self.ahorro_s}s, {len(self.aplicados)} solapes)"]
+        filas += [f"  ✓ {s.descripcion} (-{s.ahorro_s}s)" for s in self.aplicados]
+        filas += [f"  ✗ {s.descripcion}: {'; '.join(str(v) for v in vs)}" for s, vs in self.rechazados]
+        return "\n".join(filas)
+
+
+# ---------------- Reconocimiento de fases ---------------- #
+
+def _motor_auto(f: Fase) -> Optional[str]:
+    return next((c for c in f.on if c.startswith("MOTOR_") and c.endswith("_AUTO_ON")), None)
+
+
+def _es_drenado(f: Fase) -> bool:
+    return f.on == ("BOMBA_ON",) and f.off == ("BOMBA_OFF",)
+
+
+def _es_giro(f: Fase) -> bool:
+    return any(c.startswith("MOTOR_") and c.endswith("_FIJA_ON") for c in f.on)
+
+
+# ---------------- Reescrituras ---------------- #
+
+def _drenar_en(fases: List[Fase], i: int, k: int) -> List[Fase]:
+    """
+    Agitación fases[i] + drenado fases[i+1]: la bomba abre en los últimos k
+    segundos de la agitación y el drenado pierde esos k segundos.
+    """
+    agit, dren = fases[i], fases[i + 1]
+    nuevas: List[Fase] = []
+    if agit.duracion_s - k > 0:
+        # sin MOTOR_OFF: el tambor sigue girando en el tramo solapado
+        nuevas.append(replace(agit, duracion_s=agit.duracion_s - k, off=()))
+    resto = dren.duracion_s - k
+    off = agit.off + (() if resto > 0 else dren.off)
+    # `on` repite los de la agitación: al reanudar una pausa se reaplica la fase completa
+    nuevas.append(replace(agit, nombre=f"{agit.nombre} + drenado", duracion_s=k,
+                          on=agit.on + ("BOMBA_ON",), off=off))
+    if resto > 0:
+        nuevas.append(replace(dren, duracion_s=resto))
+    return fases[:i] + nuevas + fases[i + 2:]
+
+
+def _rampa(fases: List[Fase], i: int, ahorro: int) -> List[Fase]:
+    """fases[i] termina con MOTOR_OFF y fases[i+1] es el giro: sin paro intermedio."""
+    f, giro = fases[i], fases[i + 1]
+    nuevas = [replace(f, off=tuple(c for c in f.off if c != "MOTOR_OFF")),
+              replace(giro, duracion_s=max(1, giro.duracion_s - ahorro))]
+    return fases[:i] + nuevas + fases[i + 2:]
+
+
+def _rampa_por_drenado(fases: List[Fase], i: int, ahorro: int) -> List[Fase]:
+    """
+    fases[i] termina con MOTOR_OFF, fases[i+1] es un drenado y fases[i+2] el
+    giro: el motor sigue en AUTO durante el drenado y rampea al giro.
+    """
+    f, dren, giro = fases[i], fases[i + 1], fases[i + 2]
+    nuevas = [replace(f, off=tuple(c for c in f.off if c != "MOTOR_OFF")),
+              replace(dren, on=(_motor_auto(f),) + dren.on),
+              replace(giro, duracion_s=max(1, giro.duracion_s - ahorro))]
+    return fases[:i] + nuevas + fases[i + 3:]
+
+
+def _candidatos(fases: List[Fase], reglas: ReglasSolape):
+    """Primer solape aplicable a partir de cada posición: (pos, Solape, fases nuevas)."""
+    for i in range(len(fases) - 1):
+        f, sig = fases[i], fases[i + 1]
+        if _motor_auto(f) and "MOTOR_OFF" in f.off and "BOMBA_ON" not in f.on and _es_drenado(sig):
+            antes_de_giro = i + 2 < len(fases) and _es_giro(fases[i + 2])
+            if antes_de_giro and reglas.drenado_en_balanceo:
+                k, tipo = min(sig.duracion_s, f.duracion_s), "drenado_en_balanceo"
+            else:
+                k, tipo = min(reglas.drenado_anticipado_s, f.duracion_s - reglas.min_agitar_s,
+                              sig.duracion_s), "drenado_anticipado"
+            if k > 0:
+                yield i, Solape(tipo, i, k, f"{f.titulo}: bomba abierta los últimos {k}s"), \
+                    _drenar_en(fases, i, k)
+        if reglas.rampa_sin_paro and _motor_auto(f) and "MOTOR_OFF" in f.off and _es_giro(sig):
+            ahorro = min(reglas.rampa_ahorro_s, sig.duracion_s - 1)
+            yield i, Solape("rampa_giro", i, ahorro, f"{f.titulo} -> {sig.titulo} sin MOTOR_OFF"), \
+                _rampa(fases, i, ahorro)
+        elif (reglas.rampa_sin_paro and _motor_auto(f) and "MOTOR_OFF" in f.off and _es_drenado(sig)
+              and i + 2 < len(fases) and _es_giro(fases[i + 2])):
+            # balanceo más corto que el drenado breve: el resto del drenado queda antes del giro
+            giro = fases[i + 2]
+            ahorro = min(reglas.rampa_ahorro_s, giro.duracion_s - 1)
+            yield i, Solape("rampa_giro", i, ahorro,
+                            f"{f.titulo} -> {giro.titulo} sin MOTOR_OFF (motor en AUTO durante el drenado)"), \
+                _rampa_por_drenado(fases, i, ahorro)
+
+
+def _firma(vs: List[Violacion]) -> Counter:
+    return Counter((v.regla, v.severidad) for v in vs)
+
+
+def optimizar(timeline: Timeline, reglas: Optional[ReglasSolape] = None) -> ResultadoSolapes:
+    """Aplica los solapes seguros de uno en uno; nunca agrega violaciones de enclavamiento."""
+    reglas = reglas or ReglasSolape()
+    base = _firma(verificar(timeline))
+    res = ResultadoSolapes(timeline, timeline.total_s)
+    fases = list(timeline.fases)
+    desplazamiento = 0          # fases agregadas por solapes anteriores (idx -> original)
+    pos = 0
+    rechazados = set()          # (pos, tipo) rechazados sobre las fases actuales
+    while True:
+        for i, solape, nuevas in _candidatos(fases, reglas):
+            if i < pos or (i, solape.tipo) in rechazados:
+                continue
+            cand = Timeline(timeline.nombre, tuple(nuevas))
+            vs = verificar(cand)
+            solape = replace(solape, idx=i - desplazamiento)
+            nuevas_vs = _firma(vs) - base
+            if nuevas_vs:
+                res.rechazados.append((solape, [v for v in vs if (v.regla, v.severidad) in nuevas_vs]))
+                # solo se descarta este solape: otro tipo en la misma fase todavía puede valer
+                rechazados.add((i, solape.tipo))
+            else:
+                res.aplicados.append(solape)
+                desplazamiento += len(nuevas) - len(fases)
+                fases = nuevas
+                rechazados.clear()      # las fases desde `i` cambiaron: se reevalúan
+                # la reescritura quita el disparador en `i` (MOTOR_OFF o agitación sin bomba);
+                # si la agitación se consumió entera, la fase solapada queda en `i` y aún puede rampear
+                pos = i
+            break
+        else:
+            break
+    res.timeline = Timeline(timeline.nombre, tuple(fases))
+    return res
@@ -0,0 +1,209 @@
+# core/timeline.py
+"""
+Línea de tiempo compilada de un ciclo.
+
+Un ciclo (CicloParams del formato [LAVADO]/[ENJUAGUE]/[CENTRIFUGADO], o los
+pasos accion=...;duracion=... de la GUI) se compila UNA vez a una tupla de
+Fases. Cada Fase dice qué comandos se mandan al empezar, cuánto dura y qué
+comandos se mandan al terminar. El motor (core/engine.py) solo recorre fases.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Tuple
+from .params_model import CicloParams
+
+# Drenados fijos que antes vivían escondidos dentro de core/executor.py
+DRENADO_ENJUAGUE_S = 20
+DRENADO_CENTRIFUGADO_S = 10
+
+# Pseudo-comando: el motor lo traduce a backend.paro_total()
+PARO_TOTAL = "PARO_TOTAL"
+
+
+@dataclass(frozen=True)
+class Fase:
+    etapa: str                   # LAVADO | ENJUAGUE | CENTRIFUGADO | accion libre (GUI)
+    nombre: str                  # Llenado, Dosificación A, Agitar (BAJA), ...
+    duracion_s: int              # Segundos nominales
+    on: Tuple[str, ...] = ()     # Comandos al iniciar la fase
+    off: Tuple[str, ...] = ()    # Comandos al terminar la fase
+    rep: int = 0                 # Repetición 1..n (enjuague), 0 si no aplica
+    reps: int = 0                # Total de repeticiones de la etapa
+
+    @property
+    def titulo(self) -> str:
+        etapa = f"{self.etapa} ({self.rep}/{self.reps})" if self.rep else self.etapa
+        return f"{etapa}: {self.nombre}"
+
+
+@dataclass(frozen=True)
+class Timeline:
+    nombre: str
+    fases: Tuple[Fase, ...]
+    # restantes[i] = segundos desde el inicio de la fase i hasta el final del ciclo
+    restantes: Tuple[int, ...] = field(default=(), compare=False, repr=False)
+
+    def __post_init__(self):
+        if not self.restantes:
+            acc, suf = 0, []
+            for f in reversed(self.fases):
+                acc += f.duracion_s
+                suf.append(acc)
+            object.__setattr__(self, "restantes", tuple(reversed(suf)))
+
+    @property
+    def total_s(self) -> int:
+        return self.restantes[0] if self.restantes else 0
+
+    def inicio_s(self, idx: int) -> int:
+        """Segundo (desde el arranque) en que empieza la fase idx."""
+        return self.total_s - self.restantes[idx] if idx < len(self.fases) else self.total_s
+
+    def to_dict(self) -> dict:
+        return {
+            "nombre": self.nombre,
+            "fases": [
+                {"etapa": f.etapa, "nombre": f.nombre, "duracion_s": f.duracion_s,
+                 "on": list(f.on), "off": list(f.off), "rep": f.rep, "reps": f.reps}
+                for f in self.fases
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Timeline":
+        fases = tuple(
+            Fase(etapa=f["etapa"], nombre=f["nombre"], duracion_s=int(f["duracion_s"]),
+                 on=tuple(f.get("on", ())), off=tuple(f.get("off", ())),
+                 rep=int(f.get("rep", 0)), reps=int(f.get("reps", 0)))
+            for f in d.get("fases", ())
+        )
+        return cls(nombre=d.get("nombre", ""), fases=fases)
+
+
+# ---------------- Estado de actuadores (sombra) ---------------- #
+
+def estado_inicial() -> Dict[str, object]:
+    return {"VALVULA_AGUA": False, "BOMBA": False, "MOTOR": "OFF",
+            "DOSIF_A": False, "DOSIF_B": False, "DOSIF_C": False, "DOSIF_D": False}
+
+
+def aplicar_comando(estado: Dict[str, object], comando: str) -> None:
+    """
+    Actualiza el estado sombra de actuadores con un comando del protocolo ESP32.
+    Comandos desconocidos se ignoran.
+    """
+    c = comando.strip().upper()
+    if c == PARO_TOTAL:
+        estado.update(estado_inicial())
+    elif c.startswith("VALVULA_AGUA"):
+        estado["VALVULA_AGUA"] = c.endswith("_ON")
+    elif c.startswith("BOMBA_"):
+        estado["BOMBA"] = c == "BOMBA_ON"
+    elif c.startswith("DOSIF_") and len(c) > 7:
+        estado[c[:7]] = c.endswith("_ON")
+    elif c == "MOTOR_OFF":
+        estado["MOTOR"] = "OFF"
+    elif c.startswith("MOTOR_") and c.endswith("_ON"):
+        estado["MOTOR"] = c[len("MOTOR_"):-len("_ON")]   # BAJA_AUTO, ALTA_FIJA, ...
+
+
+# ---------------- Compilación ---------------- #
+
+def compilar(params: CicloParams, nombre: str = "") -> Timeline:
+    """
+    Traduce CicloParams a fases, con la misma secuencia de comandos que
+    ejecutaba core/executor.Executor etapa por etapa.
+    """
+    fases: list[Fase] = []
+    lav, enj, cen = params.lavado, params.enjuague, params.centrifugado
+
+    # ----- LAVADO -----
+    if lav.llenado_s > 0:
+        fases.append(Fase("LAVADO", "Llenado de agua", lav.llenado_s,
+                          ("VALVULA_AGUA_ON",), ("VALVULA_AGUA_OFF",)))
+    for key, seg in lav.dosificar.items():
+        if seg > 0:
+            fases.append(Fase("LAVADO", f"Dosificación {key}", seg,
+                              (f"DOSIF_{key}_ON",), (f"DOSIF_{key}_OFF",)))
+    if lav.agitar_s > 0:
+        fases.append(Fase("LAVADO", f"Agitar ({lav.vel})", lav.agitar_s,
+                          (f"MOTOR_{lav.vel}_AUTO_ON",), ("MOTOR_OFF",)))
+
+    # ----- ENJUAGUE -----
+    reps = max(0, enj.repeticiones)
+    for rep in range(1, reps + 1):
+        if enj.llenado_s > 0:
+            fases.append(Fase("ENJUAGUE", "Llenado de agua", enj.llenado_s,
+                              ("VALVULA_AGUA_ON",), ("VALVULA_AGUA_OFF",), rep, reps))
+        if enj.agitar_s > 0:
+            fases.append(Fase("ENJUAGUE", f"Agitar ({enj.vel})", enj.agitar_s,
+                              (f"MOTOR_{enj.vel}_AUTO_ON",), ("MOTOR_OFF",), rep, reps))
+        # drenado fijo entre enjuagues
+        fases.append(Fase("ENJUAGUE", "Drenado", DRENADO_ENJUAGUE_S,
+                          ("BOMBA_ON",), ("BOMBA_OFF",), rep, reps))
+
+    # ----- CENTRIFUGADO -----
+    if cen.balanceo_s > 0:
+        fases.append(Fase("CENTRIFUGADO", "Balanceo", cen.balanceo_s,
+                          ("MOTOR_BAJA_AUTO_ON",), ("MOTOR_OFF",)))
+    if cen.centrifugado_s > 0:
+        # drenado breve de seguridad antes de girar
+        fases.append(Fase("CENTRIFUGADO", "Drenado breve", DRENADO_CENTRIFUGADO_S,
+                          ("BOMBA_ON",), ("BOMBA_OFF",)))
+        fases.append(Fase("CENTRIFUGADO", f"Giro ({cen.vel})", cen.centrifugado_s,
+                          (f"MOTOR_{cen.vel}_FIJA_ON",), ("MOTOR_OFF",)))
+
+    return Timeline(nombre=nombre, fases=tuple(fases))
+
+
+_VEL_PASO = {"bajo": "BAJA", "baja": "BAJA", "medio": "MEDIA", "media": "MEDIA",
+             "alto": "ALTA", "alta": "ALTA"}
+
+
+def fase_de_paso(accion: str, duracion: int, agua: str | None = None,
+                 quimico: str | None = None, velocidad: str | None = None) -> Fase:
+    """
+    Compila un paso de la GUI (accion=...;duracion=...) a una Fase.
+    Cada paso arranca desde paro total, igual que el antiguo Executor de la GUI.
+    """
+    acc = accion.lower()
+    on: list[str] = [PARO_TOTAL]
+    if acc in ("prelavado", "lavado", "enjuague"):
+        on.append(f"VALVULA_AGUA_{agua.upper()}_ON" if agua else "VALVULA_AGUA_ON")
+        if quimico:
+            on.append(f"DOSIF_{quimico.upper()}_ON")
+    elif acc in ("centrifugado", "spin"):
+        on.append("BOMBA_ON")
+        if velocidad:
+            on.append(f"MOTOR_{_VEL_PASO.get(velocidad.lower(), velocidad.upper())}_FIJA_ON")
+    elif acc in ("drenaje", "descarga"):
+        on.append("BOMBA_ON")
+    return Fase(etapa=accion.upper(), nombre=accion.capitalize(), duracion_s=max(0, int(duracion)),
+                on=tuple(on))
+
+
+# Caché de compilación por archivo: ruta -> (mtime_ns, tamaño, Timeline)
+_CACHE_ARCHIVOS: Dict[str, Tuple[int, int, Timeline]] = {}
+
+
+def compilar_archivo(path: Path) -> Timeline:
+    """
+    Parsea y compila un TXT de parámetros. El resultado se cachea mientras el
+    archivo no cambie, así listar/estimar/encolar no re-parsea en cada llamada.
+    Los enclavamientos se verifican aquí, una vez por versión del archivo
+    (core/interlocks.ErrorInterlock si hay errores).
+    """
+    from .params_parser import load_params_txt
+    from .interlocks import exigir
+
+    path = Path(path)
+    st = path.stat()
+    key = str(path.resolve())
+    hit = _CACHE_ARCHIVOS.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2]
+    tl = compilar(load_params_txt(path), nombre=path.stem)
+    exigir(tl)
+    _CACHE_ARCHIVOS[key] = (st.st_mtime_ns, st.st_size, tl)
+    return tl
@@ -0,0 +1,201 @@
+# core/traza.py
+"""
+Traza por ciclo en formato Chrome trace-event (JSON), para abrir una corrida
+en chrome://tracing, https://ui.perfetto.dev o speedscope y ver a dónde se
+fue el tiempo.
+
+Pistas (threads) de cada máquina (process):
+    etapas     LAVADO, ENJUAGUE 1/3, ..., CENTRIFUGADO (+ marcas de estado)
+    fases      cada fase (plan vs real, deriva) con su espera anidada
+    comandos   cada ida y vuelta al backend (latencia)
+    huecos     tiempo entre un MOTOR_OFF y el siguiente MOTOR_*_ON
+
+Durante el ciclo el oyente solo agrega tuplas a una lista; el JSON se arma y
+se escribe al terminar (o detenerse) en el hilo de EscritorAsync, así la
+traza no mueve los tiempos que mide.
+
+    python -m core.ipc --maquina M1=sim --trazas trazas/
+    python cli.py run test --dry-run --traza trazas/
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .timeline import PARO_TOTAL, Timeline
+
+# Pistas dentro de cada máquina
+PISTA_ETAPAS, PISTA_FASES, PISTA_COMANDOS, PISTA_HUECOS = 1, 2, 3, 4
+_NOMBRES_PISTA = {PISTA_ETAPAS: "etapas", PISTA_FASES: "fases",
+                  PISTA_COMANDOS: "comandos", PISTA_HUECOS: "huecos"}
+
+
+class EscritorAsync:
+    """Hilo único que serializa y escribe archivos; escribir() solo encola."""
+    def __init__(self):
+        self._cola: "queue.Queue[Optional[Tuple[Path, Callable[[], str]]]]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def escribir(self, ruta: Path, producir: Callable[[], str]):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._correr, name="escritor-trazas", daemon=True)
+                self._hilo.start()
+        self._cola.put((ruta, producir))
+
+    def _correr(self):
+        while True:
+            item = self._cola.get()
+            if item is None:
+                return
+            ruta, producir = item
+            try:
+                tmp = ruta.with_suffix(ruta.suffix + ".tmp")
+                tmp.write_text(producir(), encoding="utf-8")
+                os.replace(tmp, ruta)
+            except Exception as e:
+                print(f"⚠️ No se pudo escribir la traza {ruta}: {e}")
+
+    def cerrar(self, timeout: float = 5.0):
+        """Espera a que se escriba todo lo pendiente."""
+        with self._lock:
+            hilo = self._hilo
+            self._hilo = None
+        if hilo is not None:
+            self._cola.put(None)
+            hilo.join(timeout)
+
+
+class _Corrida:
+    __slots__ = ("timeline", "t0", "pared", "eventos", "fin", "completo")
+
+    def __init__(self, timeline: Timeline, t0: float, pared: float):
+        self.timeline = timeline
+        self.t0 = t0
+        self.pared = pared
+        self.eventos: List[tuple] = []
+        self.fin = t0
+        self.completo = False
+
+
+def _etapa(tl: Timeline, idx: int) -> str:
+    f = tl.fases[idx]
+    return f"{f.etapa} {f.rep}/{f.reps}" if f.rep else f.etapa
+
+
+def a_chrome(c: _Corrida, maquina: str, pid: int = 1) -> dict:
+    """Eventos Chrome (ts/dur en µs desde el arranque del ciclo)."""
+    us = lambda t: round((t - c.t0) * 1e6, 1)
+    tl = c.timeline
+    out: List[dict] = [{"ph": "M", "pid": pid, "name": "process_name", "args": {"name": maquina}}]
+    out += [{"ph": "M", "pid": pid, "tid": tid, "name": "thread_name", "args": {"name": n}}
+            for tid, n in _NOMBRES_PISTA.items()]
+
+    def span(tid, nombre, cat, t_ini, t_fin, **args):
+        out.append({"ph": "X", "pid": pid, "tid": tid, "name": nombre, "cat": cat,
+                    "ts": us(t_ini), "dur": round(max(0.0, t_fin - t_ini) * 1e6, 1), "args": args})
+
+    # Fases: cada una va de su evento "fase" al siguiente (o al final de la corrida)
+    fases = [(t, idx) for tipo, t, idx, *_ in c.eventos if tipo == "fase"]
+    fin_de: Dict[int, float] = {}
+    for k, (t, idx) in enumerate(fases):
+        t_fin = fases[k + 1][0] if k + 1 < len(fases) else c.fin
+        fin_de[idx] = t_fin
+        f = tl.fases[idx]
+        span(PISTA_FASES, f.nombre, "fase", t, t_fin, idx=idx, plan_s=f.duracion_s,
+             real_s=round(t_fin - t, 3), deriva_s=round(t_fin - t - f.duracion_s, 3))
+
+    # Etapas: fases consecutivas de la misma etapa/repetición
+    k = 0
+    while k < len(fases):
+        nombre, t_ini = _etapa(tl, fases[k][1]), fases[k][0]
+        j = k
+        while j + 1 < len(fases) and _etapa(tl, fases[j + 1][1]) == nombre:
+            j += 1
+        span(PISTA_ETAPAS, nombre, "etapa", t_ini, fin_de[fases[j][1]],
+             plan_s=sum(tl.fases[i].duracion_s for _, i in fases[k:j + 1]))
+        k = j + 1
+
+    motor_off: Optional[Tuple[float, str]] = None
+    for ev in c.eventos:
+        tipo = ev[0]
+        if tipo == "comando":
+            _, t0, t1, cmd, resp = ev
+            span(PISTA_COMANDOS, cmd, "comando", t0, t1, respuesta=resp,
+                 latencia_ms=round((t1 - t0) * 1000.0, 3))
+            if cmd in ("MOTOR_OFF", PARO_TOTAL):
+                motor_off = motor_off or (t1, cmd)
+            elif cmd.startswith("MOTOR_") and cmd.endswith("_ON"):
+                if motor_off:
+                    span(PISTA_HUECOS, f"{motor_off[1]} → {cmd}", "hueco", motor_off[0], t0)
+                motor_off = None
+        elif tipo == "espera":
+            _, t, idx = ev
+            span(PISTA_FASES, "espera", "espera", t, fin_de.get(idx, c.fin), idx=idx)
+        elif tipo == "retenida":
+            _, t, idx, espera_s = ev
+            out.append({"ph": "i", "s": "t", "pid": pid, "tid": PISTA_FASES, "name": "retenida",
+                        "ts": us(t), "args": {"idx": idx, "espera_s": espera_s}})
+        elif tipo == "estado":
+            _, t, texto = ev
+            out.append({"ph": "i", "s": "p", "pid": pid, "tid": PISTA_ETAPAS, "name": texto, "ts": us(t)})
+
+    return {
+        "traceEvents": out,
+        "displayTimeUnit": "ms",
+        "otherData": {"maquina": maquina, "ciclo": tl.nombre, "completo": c.completo,
+                      "inicio": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(c.pared)),
+                      "plan_s": tl.total_s, "real_s": round(c.fin - c.t0, 3)},
+    }
+
+
+class TrazaCiclos:
+    """Oyente de CycleEngine: un archivo .json de traza por ciclo ejecutado."""
+    TIPOS = ("fase", "comando", "espera", "retenida", "estado", "fin")
+
+    def __init__(self, carpeta: str | Path, escritor: Optional[EscritorAsync] = None,
+                 reloj_pared: Callable[[], float] = time.time):
+        self.carpeta = Path(carpeta)
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        self.escritor = escritor or EscritorAsync()
+        self.reloj_pared = reloj_pared
+        self._abiertas: Dict[str, _Corrida] = {}
+
+    def conectar(self, engine):
+        engine.suscribir(lambda ev: self(ev, engine), tipos=self.TIPOS)
+
+    def __call__(self, ev, engine):
+        m = ev.maquina
+        c = self._abiertas.get(m)
+        if ev.tipo == "fase":
+            if c is None:
+                c = self._abiertas[m] = _Corrida(engine.timeline, ev.t, self.reloj_pared())
+            c.eventos.append(("fase", ev.t, ev.datos["idx"]))
+        elif c is None:
+            return
+        elif ev.tipo == "comando":
+            c.eventos.append(("comando", ev.datos["t0"], ev.t, ev.datos["comando"], ev.datos["respuesta"]))
+        elif ev.tipo == "espera":
+            c.eventos.append(("espera", ev.t, ev.datos["idx"]))
+        elif ev.tipo == "retenida":
+            c.eventos.append(("retenida", ev.t, ev.datos["idx"], ev.datos["espera_s"]))
+        elif ev.tipo == "estado":
+            c.eventos.append(("estado", ev.t, ev.datos["texto"]))
+            if engine.state == engine.STOPPED:
+                self._cerrar(m, c, ev.t, completo=False)
+        elif ev.tipo == "fin":
+            self._cerrar(m, c, ev.t, completo=True)
+
+    def _cerrar(self, maquina: str, c: _Corrida, t: float, completo: bool):
+        del self._abiertas[maquina]
+        c.fin, c.completo = t, completo
+        sello = time.strftime("%Y%m%d-%H%M%S", time.localtime(c.pared))
+        ruta = self.carpeta / f"{maquina}-{c.timeline.nombre or 'ciclo'}-{sello}.json"
+        self.escritor.escribir(ruta, lambda: json.dumps(a_chrome(c, maquina), ensure_ascii=False))
+
+    def cerrar(self):
+        self.escritor.cerrar()
@@ -0,0 +1,138 @@
+# core/validacion.py
+"""
+Validación masiva de una biblioteca de ciclos.
+
+Cada archivo se parsea (en modo estricto: las líneas que la GUI descartaría
+en silencio se reportan), se compila a Timeline y se pasa por los
+enclavamientos de core/interlocks.py. Los archivos se reparten en un pool de
+procesos y todo vuelve en un solo informe.
+
+    python -m core.validacion ciclos/            # informe legible
+    python -m core.validacion ciclos/ --json     # para CI / scripts
+    python -m core.validacion --biblioteca ciclos.db
+"""
+from __future__ import annotations
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+from .params_parser import formato_de, load_params_text
+from .pasos import compile_cycle, leer_pasos
+from .interlocks import ERROR, AVISO, Violacion, verificar
+from .timeline import Timeline, compilar
+
+
+@dataclass
+class InformeArchivo:
+    origen: str
+    total_s: int = 0
+    fases: int = 0
+    problemas: List[Violacion] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not any(p.severidad == ERROR for p in self.problemas)
+
+
+@dataclass
+class Informe:
+    archivos: List[InformeArchivo]
+
+    @property
+    def ok(self) -> bool:
+        return all(a.ok for a in self.archivos)
+
+    def contar(self, severidad: str) -> int:
+        return sum(1 for a in self.archivos for p in a.problemas if p.severidad == severidad)
+
+    def texto(self) -> str:
+        lineas = []
+        for a in self.archivos:
+            marca = "✅" if a.ok else "❌"
+            lineas.append(f"{marca} {a.origen} ({a.fases} fases, {a.total_s}s)")
+            lineas.extend(f"    {p}" for p in a.problemas)
+        lineas.append(f"\n{len(self.archivos)} ciclos, {self.contar(ERROR)} errores, {self.contar(AVISO)} avisos")
+        return "\n".join(lineas)
+
+    def to_dict(self) -> dict:
+        return {"ok": self.ok, "archivos": [dict(asdict(a), ok=a.ok) for a in self.archivos]}
+
+
+def _pasos_estricto(texto: str, nombre: str) -> Tuple[Timeline, List[Violacion]]:
+    """core/pasos.leer_pasos; cada línea descartada o valor inválido es un error."""
+    ciclo, problemas = leer_pasos(texto, nombre)
+    return compile_cycle(ciclo), [Violacion("sintaxis", ERROR, None, p) for p in problemas]
+
+
+def validar_texto(texto: str, nombre: str, origen: Optional[str] = None) -> InformeArchivo:
+    inf = InformeArchivo(origen or nombre)
+    if formato_de(texto) == "params":
+        try:
+            tl = compilar(load_params_text(texto), nombre=nombre)
+        except ValueError as e:
+            inf.problemas.append(Violacion("sintaxis", ERROR, None, str(e)))
+            return inf
+    else:
+        tl, inf.problemas = _pasos_estricto(texto, nombre)
+    inf.total_s, inf.fases = tl.total_s, len(tl.fases)
+    inf.problemas.extend(verificar(tl))
+    return inf
+
+
+def validar_archivo(ruta: str | Path) -> InformeArchivo:
+    ruta = Path(ruta)
+    try:
+        texto = ruta.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError) as e:
+        return InformeArchivo(str(ruta), problemas=[Violacion("lectura", ERROR, None, str(e))])
+    return validar_texto(texto, ruta.stem, str(ruta))
+
+
+def _validar_item(item: Tuple[str, str, str]) -> InformeArchivo:
+    return validar_texto(*item)
+
+
+def validar(rutas: Iterable[str | Path], procesos: int | None = None) -> Informe:
+    """Valida archivos .txt (o carpetas con .txt) en paralelo."""
+    archivos: List[Path] = []
+    for r in rutas:
+        r = Path(r)
+        archivos.extend(sorted(r.glob("*.txt")) if r.is_dir() else [r])
+    if procesos == 1 or len(archivos) <= 1:
+        return Informe([validar_archivo(a) for a in archivos])
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return Informe(list(pool.map(validar_archivo, archivos, chunksize=max(1, len(archivos) // 32))))
+
+
+def validar_biblioteca(bib, procesos: int | None = None) -> Informe:
+    """Valida la revisión vigente de cada ciclo de una core/biblioteca.Biblioteca."""
+    items: Sequence[Tuple[str, str, str]] = [(bib.texto(n), n, f"{n}@{bib.ficha(n).revision}") for n in bib.listar()]
+    if procesos == 1 or len(items) <= 1:
+        return Informe([_validar_item(i) for i in items])
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return Informe(list(pool.map(_validar_item, items, chunksize=max(1, len(items) // 32))))
+
+
+def main(argv=None) -> int:
+    import argparse
+    ap = argparse.ArgumentParser(description="Validación masiva de ciclos")
+    ap.add_argument("rutas", nargs="*", help="archivos .txt o carpetas (por defecto ciclos/)")
+    ap.add_argument("--biblioteca", default=None, help="validar una biblioteca SQLite (core/biblioteca.py)")
+    ap.add_argument("--procesos", type=int, default=None)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.biblioteca:
+        from .biblioteca import Biblioteca
+        informe = validar_biblioteca(Biblioteca(args.biblioteca), args.procesos)
+    else:
+        from .cycle_manager import CICLOS_DIR
+        informe = validar(args.rutas or [CICLOS_DIR], args.procesos)
+    print(json.dumps(informe.to_dict(), ensure_ascii=False, indent=2) if args.json else informe.texto())
+    return 0 if informe.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
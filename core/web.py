@@ -0,0 +1,243 @@
+# core/web.py
+"""
+Tablero web de la flota servido por el propio controlador (sin CDN ni
+servicios externos): una página estática y un flujo Server-Sent Events.
+
+    GET /          página del tablero (HTML + JS embebido)
+    GET /estado    snapshot JSON de todas las máquinas
+    GET /eventos   SSE: "snapshot" al conectar y luego solo "delta"
+
+Igual que core/ipc.py, el tablero es UN suscriptor del Controlador: cada
+delta se serializa una vez y se reparte a colas acotadas por espectador,
+así decenas de tablets no añaden sondeo ni trabajo a los motores. Un
+espectador lento se desconecta (el navegador reconecta solo y recibe un
+snapshot nuevo).
+
+Las alarmas (paro, conflictos de actuadores de core/interlocks) se derivan
+aquí del estado sombra y viajan en el delta solo cuando cambian.
+
+    python -m core.ipc --maquina M1=sim --web 8080
+"""
+from __future__ import annotations
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from .controlador import Controlador
+from .interlocks import conflictos
+
+COLA_ESPECTADOR = 256   # mensajes pendientes por navegador antes de desconectarlo
+LATIDO_S = 15.0         # comentario SSE para que proxies/tablets no corten la conexión
+
+
+def _sse(evento: str, obj: dict, id_: int) -> bytes:
+    data = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {id_}\nevent: {evento}\ndata: {data}\n\n".encode("utf-8")
+
+
+def alarmas(snap: dict) -> List[str]:
+    """Alarmas visibles de una máquina a partir de su snapshot."""
+    out = []
+    if snap.get("estado") == "STOPPED":
+        out.append("Detenida (paro seguro)")
+    act = snap.get("actuadores")
+    if act:
+        out.extend(msg for _, _, msg in conflictos(act))
+    return out
+
+
+# =========================
+#   HTTP
+# =========================
+
+class _Manejador(BaseHTTPRequestHandler):
+    server: "ServidorWeb"
+
+    def log_message(self, *args):     # sin una línea en stderr por petición
+        pass
+
+    def do_GET(self):
+        ruta = self.path.split("?", 1)[0]
+        if ruta in ("/", "/index.html"):
+            self._enviar(200, "text/html; charset=utf-8", PAGINA.encode("utf-8"))
+        elif ruta == "/estado":
+            cuerpo = json.dumps(self.server.estado(), ensure_ascii=False).encode("utf-8")
+            self._enviar(200, "application/json", cuerpo)
+        elif ruta == "/eventos":
+            self._eventos()
+        else:
+            self._enviar(404, "text/plain; charset=utf-8", b"no encontrado")
+
+    def _enviar(self, codigo: int, tipo: str, cuerpo: bytes):
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _eventos(self):
+        srv = self.server
+        cola: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=COLA_ESPECTADOR)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.end_headers()
+        # Bajo el lock solo se arma el snapshot y se registra la cola (así ningún delta
+        # queda entre ambos); el socket se escribe fuera: un navegador trabado no frena los ticks
+        with srv.controlador.lock:
+            inicial = b"retry: 2000\n\n" + _sse("snapshot", srv.estado(), srv.ultimo_id)
+            srv.espectadores.add(cola)
+        try:
+            self.wfile.write(inicial)
+            self.wfile.flush()
+            while True:
+                try:
+                    data = cola.get(timeout=LATIDO_S)
+                except queue.Empty:
+                    data = b": latido\n\n"
+                if data is None:
+                    return
+                self.wfile.write(data)
+                if cola.empty():
+                    self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            srv.espectadores.discard(cola)
+
+
+class ServidorWeb(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, controlador: Controlador, host: str = "0.0.0.0", puerto: int = 8080):
+        super().__init__((host, puerto), _Manejador)
+        self.controlador = controlador
+        self.espectadores: set = set()
+        self.ultimo_id = 0
+        self._hilo: Optional[threading.Thread] = None
+        with controlador.lock:
+            self._vista: Dict[str, dict] = {}
+            for m, snap in controlador.estado().items():
+                self._vista[m] = dict(snap, alarmas=alarmas(snap))
+            controlador.suscribir(self._difundir)
+
+    @property
+    def puerto(self) -> int:
+        return self.server_address[1]
+
+    def estado(self) -> Dict[str, dict]:
+        with self.controlador.lock:
+            return {m: dict(v) for m, v in self._vista.items()}
+
+    def _difundir(self, msg: dict):
+        # Se llama con controlador.lock tomado (desde tick/iniciar/...)
+        if msg.get("tipo") != "delta":
+            return
+        m = msg["maquina"]
+        vista = self._vista.get(m)
+        if vista is None:           # máquina agregada después de arrancar el tablero
+            eng = self.controlador.maquinas[m]
+            vista = self._vista[m] = dict(eng.snapshot(), alarmas=[])
+        delta = dict(msg["delta"])
+        vista.update(delta)
+        if "estado" in delta or "actuadores" in delta:
+            nuevas = alarmas(vista)
+            if nuevas != vista.get("alarmas"):
+                vista["alarmas"] = delta["alarmas"] = nuevas
+        if not self.espectadores:
+            return
+        self.ultimo_id += 1
+        data = _sse("delta", {"maquina": m, "delta": delta}, self.ultimo_id)
+        for cola in list(self.espectadores):
+            try:
+                cola.put_nowait(data)
+            except queue.Full:
+                self.espectadores.discard(cola)
+                cola.queue.clear()
+                cola.put_nowait(None)
+
+    def arrancar(self) -> "ServidorWeb":
+        self._hilo = threading.Thread(target=self.serve_forever, name="web", daemon=True)
+        self._hilo.start()
+        return self
+
+    def server_close(self):
+        self.controlador.desuscribir(self._difundir)
+        for cola in list(self.espectadores):
+            cola.queue.clear()
+            cola.put_nowait(None)
+        super().server_close()
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+
+# =========================
+#   PÁGINA
+# =========================
+
+PAGINA = """<!doctype html>
+<html lang="es"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Lavadoras</title>
+<style>
+body{font-family:system-ui,sans-serif;margin:0;background:#1e1e1e;color:#eee}
+header{padding:10px 16px;background:#2b2b2b;display:flex;justify-content:space-between}
+#flota{display:grid;grid-template-columns:repeat(auto-fill,minmax(260px,1fr));gap:12px;padding:12px}
+.maq{background:#2b2b2b;border-radius:8px;padding:12px;border-left:6px solid #555}
+.RUNNING{border-color:#2e7d32}.PAUSED{border-color:#f9a825}.STOPPED{border-color:#c62828}
+h2{margin:0 0 4px;font-size:1.2em}.t{font-size:2em;font-variant-numeric:tabular-nums}
+.barra{height:6px;background:#444;border-radius:3px;margin:6px 0}.barra div{height:100%;background:#4caf50;border-radius:3px}
+.act span{display:inline-block;font-size:.75em;padding:2px 6px;margin:2px;border-radius:4px;background:#444}
+.act .on{background:#1565c0}.alarma{color:#ff8a80;font-weight:bold}
+</style></head><body>
+<header><b>Lavadoras</b><span id="con">conectando…</span></header>
+<div id="flota"></div>
+<script>
+const flota = {};
+const mmss = s => Math.floor(s / 60) + ":" + String(s % 60).padStart(2, "0");
+const ESC = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"};
+const esc = v => String(v ?? "").replace(/[&<>"']/g, c => ESC[c]);   // nombres de ciclo/fase vienen de archivos
+function tarjeta(m) {
+  let el = document.getElementById("m-" + m);
+  if (!el) {
+    el = document.createElement("div");
+    el.id = "m-" + m;
+    document.getElementById("flota").appendChild(el);
+  }
+  return el;
+}
+function pintar(m) {
+  const s = flota[m], el = tarjeta(m);
+  const act = Object.entries(s.actuadores || {}).map(([k, v]) =>
+    `<span class="${v && v !== "OFF" ? "on" : ""}">${esc(k)}${typeof v === "string" ? " " + esc(v) : ""}</span>`).join("");
+  const prog = s.fases ? Math.round(100 * s.fase_idx / s.fases) : 0;
+  el.className = "maq " + s.estado;
+  el.innerHTML = `<h2>${esc(m)} · ${esc(s.estado)}</h2><div>${esc(s.ciclo || "—")}</div>
+    <div>${s.fase ? (s.fase_idx + 1) + "/" + s.fases + " " + esc(s.fase) : ""}</div>
+    <div class="t">${mmss(s.restante_total || 0)}</div>
+    <div class="barra"><div style="width:${prog}%"></div></div>
+    <div class="act">${act}</div>
+    <div class="alarma">${(s.alarmas || []).map(esc).join("<br>")}</div>`;
+}
+function conectar() {
+  const es = new EventSource("eventos");
+  es.onopen = () => document.getElementById("con").textContent = "en vivo";
+  es.onerror = () => document.getElementById("con").textContent = "reconectando…";
+  es.addEventListener("snapshot", e => {
+    const d = JSON.parse(e.data);
+    for (const m in d) { flota[m] = d[m]; pintar(m); }
+  });
+  es.addEventListener("delta", e => {
+    const d = JSON.parse(e.data);
+    flota[d.maquina] = Object.assign(flota[d.maquina] || {}, d.delta);
+    pintar(d.maquina);
+  });
+}
+conectar();
+</script></body></html>
+"""
@@ -0,0 +1,135 @@
+# gui/dominio.py
+"""
+Parte de la GUI que NO depende de tkinter: lectura/escritura de los .txt
+accion=...;duracion=... (el modelo Cycle/Step y el parser están en
+core/pasos.py) y HardwareIO. La usan la GUI y cualquier script sin pantalla.
+"""
+import os
+from typing import List, Dict, Optional, Callable, Tuple
+
+# Modelo y parser de pasos: en core (core/pasos.py), reexportados para la GUI
+from core.pasos import Step, Cycle, parse_kv, leer_pasos, compile_cycle
+from core.sensores import SensoresCache, lector_callbacks, TTL_POR_DEFECTO
+
+# =========================
+#   PERSISTENCIA .TXT
+# =========================
+
+CICLOS_DIR = "ciclos"
+
+def ensure_demo_files():
+    """Crea carpeta y dos ciclos demo si no existen."""
+    os.makedirs(CICLOS_DIR, exist_ok=True)
+    demo1 = os.path.join(CICLOS_DIR, "Ciclo_Rapido.txt")
+    demo2 = os.path.join(CICLOS_DIR, "Ciclo_Industrial.txt")
+    if not os.path.exists(demo1):
+        with open(demo1, "w", encoding="utf-8") as f:
+            f.write(
+                "# Ciclo rápido de ejemplo\n"
+                "nombre=Ciclo Rápido\n"
+                "accion=prelavado;duracion=120;agua=fria\n"
+                "accion=lavado;duracion=600;quimico=A\n"
+                "accion=enjuague;duracion=300;agua=fria\n"
+                "accion=centrifugado;duracion=180;velocidad=alto\n"
+            )
+    if not os.path.exists(demo2):
+        with open(demo2, "w", encoding="utf-8") as f:
+            f.write(
+                "# Ciclo industrial de ejemplo\n"
+                "nombre=Ciclo Industrial\n"
+                "accion=prelavado;duracion=240;agua=fria\n"
+                "accion=lavado;duracion=900;quimico=B\n"
+                "accion=enjuague;duracion=300;agua=caliente\n"
+                "accion=enjuague;duracion=300;agua=fria\n"
+                "accion=centrifugado;duracion=240;velocidad=alto\n"
+            )
+
+def load_cycle_from_txt(path: str) -> Tuple[Cycle, List[str]]:
+    """(ciclo, líneas rechazadas): quien carga decide si lo usa, nunca en silencio."""
+    nombre = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
+    with open(path, "r", encoding="utf-8") as f:
+        return leer_pasos(f.read(), nombre)
+
+def save_cycle_to_txt(cycle: Cycle, path: str):
+    lines = [f"nombre={cycle.nombre}"]
+    for s in cycle.pasos:
+        segs = [f"accion={s.accion}", f"duracion={s.duracion}"]
+        if s.agua: segs.append(f"agua={s.agua}")
+        if s.quimico: segs.append(f"quimico={s.quimico}")
+        if s.velocidad: segs.append(f"velocidad={s.velocidad}")
+        lines.append(";".join(segs))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def list_cycles() -> List[str]:
+    ensure_demo_files()
+    files = [f for f in os.listdir(CICLOS_DIR) if f.lower().endswith(".txt")]
+    return sorted(files)
+
+# =========================
+#   ABSTRACCIÓN DE HARDWARE
+# =========================
+
+class HardwareIO:
+    """
+    Capa para aislar el hardware.
+    Sustituye las funciones por GPIO/Modbus/PLC según tu implementación.
+    """
+    def __init__(self):
+        # Callbacks externos opcionales
+        self.read_emergency_stop: Optional[Callable[[], bool]] = None
+        self.read_suction_sensor: Optional[Callable[[], bool]] = None
+        # Snapshot de sensores con TTL (core/sensores.py): todas las lecturas de un
+        # tick salen de una sola consulta. None => cada lectura llama su callback.
+        self.sensores: Optional[SensoresCache] = None
+
+    def usar_snapshot(self, leer: Optional[Callable[[], Dict[str, object]]] = None,
+                      ttl_s: float = TTL_POR_DEFECTO) -> SensoresCache:
+        """
+        leer => lector de todas las entradas de una vez (p. ej.
+        core.sensores.lector_serial(sm.enviar_comando)). Sin él se agrupan los
+        callbacks read_* actuales en un snapshot.
+        """
+        if leer is None:
+            cbs = {}
+            if self.read_emergency_stop:
+                cbs["EMERGENCIA"] = self.read_emergency_stop
+            if self.read_suction_sensor:
+                cbs["SUCCION"] = self.read_suction_sensor
+            leer = lector_callbacks(cbs)
+        self.sensores = SensoresCache(leer, ttl_s)
+        return self.sensores
+
+    # --- Actuadores ---
+    def fill(self, temp: Optional[str]):
+        # Implementa válvulas de entrada
+        print(f"[HW] Llenando con agua: {temp or 'N/A'}")
+
+    def add_chemical(self, ident: Optional[str]):
+        if ident:
+            print(f"[HW] Dosificando químico {ident}")
+
+    def drain_open(self, enable: bool):
+        print(f"[HW] Drenaje {'ABIERTO' if enable else 'CERRADO'}")
+
+    def spin(self, level: Optional[str]):
+        if level:
+            print(f"[HW] Centrifugado: {level}")
+
+    def stop_all(self):
+        print("[HW] Paro total: todos los actuadores a estado seguro")
+
+    # --- Sensores/monitoreo ---
+    def is_emergency_pressed(self) -> bool:
+        if self.sensores:
+            return self.sensores.emergencia()
+        if self.read_emergency_stop:
+            return bool(self.read_emergency_stop())
+        return False
+
+    def has_suction(self) -> bool:
+        if self.sensores:
+            return bool(self.sensores.leer("SUCCION", True))
+        if self.read_suction_sensor:
+            return bool(self.read_suction_sensor())
+        return True  # por defecto asumimos OK
@@ -7,297 +7,210 @@ Autor: pensado para Iván (AXIS 3D) - Proyecto Automatización Lavadora UNIMAC
 """
 
 import os
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Callable
+import queue
+import threading
 import time
 
-# =========================
-#   MODELOS DE DOMINIO
-# =========================
+# Raíz del proyecto en sys.path (para que encuentre core/ al correr este archivo directo)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-@dataclass
-class Step:
-    accion: str
-    duracion: int  # segundos
-    agua: Optional[str] = None         # 'fria' | 'caliente' | None
-    quimico: Optional[str] = None      # 'A' | 'B' | ...
-    velocidad: Optional[str] = None    # 'bajo' | 'medio' | 'alto'
-
-    def to_human(self, idx: int) -> str:
-        parts = [f"Paso {idx}: {self.accion.capitalize()} - {self.duracion}s"]
-        if self.agua:
-            parts.append(f"Agua {self.agua}")
-        if self.quimico:
-            parts.append(f"Químico {self.quimico}")
-        if self.velocidad:
-            parts.append(self.velocidad.capitalize())
-        return " ".join(parts)
-
-
-@dataclass
-class Cycle:
-    nombre: str
-    pasos: List[Step] = field(default_factory=list)
-
-    @property
-    def total_duracion(self) -> int:
-        return sum(p.duracion for p in self.pasos)
+from gui.dominio import (Cycle, CICLOS_DIR, ensure_demo_files, leer_pasos, load_cycle_from_txt,
+                         save_cycle_to_txt, list_cycles, HardwareIO, compile_cycle)
+from core.engine import CycleEngine, Evento
+from core.backends import HardwareIOBackend
+from core.eta import ModeloETA
+from core.interlocks import ErrorInterlock, exigir
+from core.ipc import ClienteControlador
+from core.perfilado import VigiaBucle, perfilar_ventana
 
 # =========================
-#   PERSISTENCIA .TXT
+#   EJECUTOR DE CICLOS
 # =========================
 
-CICLOS_DIR = "ciclos"
-
-def ensure_demo_files():
-    """Crea carpeta y dos ciclos demo si no existen."""
-    os.makedirs(CICLOS_DIR, exist_ok=True)
-    demo1 = os.path.join(CICLOS_DIR, "Ciclo_Rapido.txt")
-    demo2 = os.path.join(CICLOS_DIR, "Ciclo_Industrial.txt")
-    if not os.path.exists(demo1):
-        with open(demo1, "w", encoding="utf-8") as f:
-            f.write(
-                "# Ciclo rápido de ejemplo\n"
-                "nombre=Ciclo Rápido\n"
-                "accion=prelavado;duracion=120;agua=fria\n"
-                "accion=lavado;duracion=600;quimico=A\n"
-                "accion=enjuague;duracion=300;agua=fria\n"
-                "accion=centrifugado;duracion=180;velocidad=alto\n"
-            )
-    if not os.path.exists(demo2):
-        with open(demo2, "w", encoding="utf-8") as f:
-            f.write(
-                "# Ciclo industrial de ejemplo\n"
-                "nombre=Ciclo Industrial\n"
-                "accion=prelavado;duracion=240;agua=fria\n"
-                "accion=lavado;duracion=900;quimico=B\n"
-                "accion=enjuague;duracion=300;agua=caliente\n"
-                "accion=enjuague;duracion=300;agua=fria\n"
-                "accion=centrifugado;duracion=240;velocidad=alto\n"
-            )
+class Executor:
+    """
+    Adaptador de la GUI sobre core/engine.CycleEngine con HardwareIO como backend.
+    Mantiene los callbacks que usa WasherUI; la lógica de tiempos vive en el motor.
+    """
+    IDLE = CycleEngine.IDLE
+    RUNNING = CycleEngine.RUNNING
+    PAUSED = CycleEngine.PAUSED
+    STOPPED = CycleEngine.STOPPED
 
-def parse_kv(segment: str) -> Dict[str, str]:
-    out = {}
-    for par in segment.split(";"):
-        if not par.strip():
-            continue
-        if "=" in par:
-            k, v = par.split("=", 1)
-            out[k.strip().lower()] = v.strip()
-    return out
-
-def load_cycle_from_txt(path: str) -> Cycle:
-    nombre = os.path.splitext(os.path.basename(path))[0].replace("_", " ")
-    pasos: List[Step] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if line.lower().startswith("nombre="):
-                nombre = line.split("=", 1)[1].strip()
-                continue
-            kv = parse_kv(line)
-            accion = kv.get("accion")
-            dur = kv.get("duracion")
-            if not accion or not dur:
-                continue
-            try:
-                dur = int(dur)
-            except ValueError:
-                continue
-            pasos.append(Step(
-                accion=accion,
-                duracion=dur,
-                agua=kv.get("agua"),
-                quimico=kv.get("quimico"),
-                velocidad=kv.get("velocidad"),
-            ))
-    return Cycle(nombre=nombre, pasos=pasos)
-
-def save_cycle_to_txt(cycle: Cycle, path: str):
-    lines = [f"nombre={cycle.nombre}"]
-    for s in cycle.pasos:
-        segs = [f"accion={s.accion}", f"duracion={s.duracion}"]
-        if s.agua: segs.append(f"agua={s.agua}")
-        if s.quimico: segs.append(f"quimico={s.quimico}")
-        if s.velocidad: segs.append(f"velocidad={s.velocidad}")
-        lines.append(";".join(segs))
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines) + "\n")
-
-def list_cycles() -> List[str]:
-    ensure_demo_files()
-    files = [f for f in os.listdir(CICLOS_DIR) if f.lower().endswith(".txt")]
-    return sorted(files)
+    def __init__(self, hw: HardwareIO, on_status: Callable[[str], None], on_tick: Callable[[int, int, int], None], on_step_change: Callable[[int], None], on_finish: Callable[[], None]):
+        self.hw = hw
+        self.on_status = on_status
+        self.on_tick = on_tick
+        self.on_step_change = on_step_change
+        self.on_finish = on_finish
 
-# =========================
-#   ABSTRACCIÓN DE HARDWARE
-# =========================
+        self.engine = CycleEngine(HardwareIOBackend(hw))
+        self.engine.suscribir(self._on_evento)
+        # "Tiempo restante" aprendido de corridas anteriores (se guarda al terminar cada ciclo)
+        ModeloETA(os.environ.get("LAVADORA_ETA", os.path.join(ROOT, "datos", "eta.json"))).conectar(self.engine)
+        self.cycle: Optional[Cycle] = None
 
-class HardwareIO:
-    """
-    Capa para aislar el hardware.
-    Sustituye las funciones por GPIO/Modbus/PLC según tu implementación.
-    """
-    def __init__(self):
-        # Callbacks externos opcionales
-        self.read_emergency_stop: Optional[Callable[[], bool]] = None
-        self.read_suction_sensor: Optional[Callable[[], bool]] = None
+    # --- Estado expuesto a la GUI ---
 
-    # --- Actuadores ---
-    def fill(self, temp: Optional[str]):
-        # Implementa válvulas de entrada
-        print(f"[HW] Llenando con agua: {temp or 'N/A'}")
+    @property
+    def state(self) -> str:
+        return self.engine.state
 
-    def add_chemical(self, ident: Optional[str]):
-        if ident:
-            print(f"[HW] Dosificando químico {ident}")
+    @property
+    def step_index(self) -> int:
+        return self.engine.idx
 
-    def drain_open(self, enable: bool):
-        print(f"[HW] Drenaje {'ABIERTO' if enable else 'CERRADO'}")
+    @property
+    def step_remaining(self) -> int:
+        return int(self.engine.restante_fase() + 0.999)
 
-    def spin(self, level: Optional[str]):
-        if level:
-            print(f"[HW] Centrifugado: {level}")
+    @property
+    def total_remaining(self) -> int:
+        return int(self.engine.restante_estimado() + 0.999)
 
-    def stop_all(self):
-        print("[HW] Paro total: todos los actuadores a estado seguro")
+    # --- Control ---
 
-    # --- Sensores/monitoreo ---
-    def is_emergency_pressed(self) -> bool:
-        if self.read_emergency_stop:
-            return bool(self.read_emergency_stop())
-        return False
+    def load_cycle(self, cycle: Cycle):
+        tl = compile_cycle(cycle)
+        exigir(tl)          # ErrorInterlock: el ciclo no se carga
+        self.cycle = cycle
+        self.engine.cargar(tl)
 
-    def has_suction(self) -> bool:
-        if self.read_suction_sensor:
-            return bool(self.read_suction_sensor())
-        return True  # por defecto asumimos OK
+    def reset_runtime(self):
+        if self.cycle:
+            self.engine.cargar(self.engine.timeline)
 
-# =========================
-#   EJECUTOR DE CICLOS
-# =========================
+    def start(self):
+        self.engine.iniciar()
 
-class Executor:
-    IDLE = "IDLE"
-    RUNNING = "RUNNING"
-    PAUSED = "PAUSED"
-    STOPPED = "STOPPED"
+    def pause(self):
+        self.engine.pausar()
 
-    def __init__(self, hw: HardwareIO, on_status: Callable[[str], None], on_tick: Callable[[int, int, int], None], on_step_change: Callable[[int], None], on_finish: Callable[[], None]):
-        self.hw = hw
+    def stop(self):
+        self.engine.detener()
+
+    def tick(self):
+        """Debe llamarse periódicamente (GUI.after)."""
+        self.engine.tick()
+
+    def _on_evento(self, ev: Evento):
+        if ev.tipo == "estado":
+            self.on_status(ev.datos["texto"])
+        elif ev.tipo == "tick":
+            self.on_tick(ev.datos["idx"], ev.datos["restante_fase"], ev.datos["restante_total"])
+        elif ev.tipo == "cambio_fase":
+            self.on_step_change(ev.datos["idx"])
+        elif ev.tipo == "fin":
+            self.on_finish()
+
+class RemoteExecutor:
+    """
+    Mismo contrato que Executor, pero el ciclo corre en el controlador
+    (python -m core.ipc). Cerrar o reiniciar la GUI no interrumpe la carga.
+    Los deltas llegan por un hilo de suscripción y se aplican en tick(),
+    siempre desde el hilo de Tk.
+    """
+    IDLE = CycleEngine.IDLE
+    RUNNING = CycleEngine.RUNNING
+    PAUSED = CycleEngine.PAUSED
+    STOPPED = CycleEngine.STOPPED
+
+    def __init__(self, cliente: ClienteControlador, maquina: str, on_status: Callable[[str], None], on_tick: Callable[[int, int, int], None], on_step_change: Callable[[int], None], on_finish: Callable[[], None]):
+        self.cliente = cliente
+        self.maquina = maquina
         self.on_status = on_status
         self.on_tick = on_tick
         self.on_step_change = on_step_change
         self.on_finish = on_finish
 
-        self.state = Executor.IDLE
         self.cycle: Optional[Cycle] = None
-        self.step_index: int = 0
-        self.step_remaining: int = 0
-        self.total_remaining: int = 0
-        self._last_tick = time.time()
+        self._estado: Dict[str, object] = {"estado": CycleEngine.IDLE, "fase_idx": 0,
+                                           "restante_fase": 0, "restante_total": 0}
+        self._pendientes: "queue.Queue[dict]" = queue.Queue()
+        threading.Thread(target=self._escuchar, name="suscripcion", daemon=True).start()
+
+    @property
+    def state(self) -> str:
+        return self._estado["estado"]
+
+    @property
+    def step_index(self) -> int:
+        return self._estado["fase_idx"]
+
+    @property
+    def step_remaining(self) -> int:
+        return self._estado["restante_fase"]
+
+    @property
+    def total_remaining(self) -> int:
+        return self._estado["restante_total"]
 
     def load_cycle(self, cycle: Cycle):
+        exigir(compile_cycle(cycle))
         self.cycle = cycle
-        self.reset_runtime()
-
-    def reset_runtime(self):
-        self.state = Executor.IDLE
-        self.step_index = 0
-        self.step_remaining = self.cycle.pasos[0].duracion if (self.cycle and self.cycle.pasos) else 0
-        self.total_remaining = self.cycle.total_duracion if self.cycle else 0
-        self._last_tick = time.time()
 
     def start(self):
         if not self.cycle or not self.cycle.pasos:
             self.on_status("No hay ciclo cargado.")
             return
-        self.state = Executor.RUNNING
-        self._last_tick = time.time()
-        self._apply_step(self.cycle.pasos[self.step_index])
-        self.on_status("Ejecutando")
+        self._pedir(self.cliente.iniciar, timeline=compile_cycle(self.cycle))
 
     def pause(self):
-        if self.state == Executor.RUNNING:
-            self.state = Executor.PAUSED
-            self.hw.stop_all()
-            self.on_status("Pausado")
-        elif self.state == Executor.PAUSED:
-            self.state = Executor.RUNNING
-            # Reaplicar el paso actual
-            self._apply_step(self.cycle.pasos[self.step_index])
-            self._last_tick = time.time()
-            self.on_status("Reanudado")
+        self._estado.update(self._pedir(self.cliente.pausar) or {})
 
     def stop(self):
-        self.state = Executor.STOPPED
-        self.hw.stop_all()
-        # Secuencia de paro seguro (ejemplo): abrir drenaje y detener giro
-        self.hw.drain_open(True)
-        self.on_status("Detenido (paro seguro)")
+        self._estado.update(self._pedir(self.cliente.detener) or {})
+
+    def _pedir(self, op, **kw) -> Optional[dict]:
+        # Un controlador caído o que rechaza la orden se informa en la barra de estado,
+        # nunca como excepción dentro de un callback de Tk
+        try:
+            return op(self.maquina, **kw)
+        except RuntimeError as e:
+            self.on_status(str(e))
+        except OSError as e:
+            self.on_status(f"Sin conexión con el controlador ({e})")
+        return None
 
     def tick(self):
-        """Debe llamarse periódicamente (GUI.after)."""
-        # Vigilancias rápidas
-        if self.hw.is_emergency_pressed():
-            self.stop()
-        if self.state != Executor.RUNNING:
+        while True:
+            try:
+                msg = self._pendientes.get_nowait()
+            except queue.Empty:
+                return
+            self._aplicar(msg)
+
+    def _escuchar(self):
+        try:
+            for msg in self.cliente.eventos():
+                if msg.get("tipo") == "snapshot":
+                    msg = {"tipo": "delta", "delta": msg["maquinas"].get(self.maquina, {})}
+                elif msg.get("maquina") != self.maquina:
+                    continue
+                self._pendientes.put(msg)
+        except OSError:
+            self._pendientes.put({"tipo": "estado", "texto": "Sin conexión con el controlador"})
+
+    def _aplicar(self, msg: dict):
+        tipo = msg.get("tipo")
+        if tipo == "delta":
+            delta = msg["delta"]
+            cambio_fase = "fase_idx" in delta and delta["fase_idx"] != self._estado["fase_idx"]
+            self._estado.update(delta)
+            if cambio_fase:
+                self.on_step_change(self.step_index)
             self.on_tick(self.step_index, self.step_remaining, self.total_remaining)
-            return
-
-        now = time.time()
-        elapsed = now - self._last_tick
-        if elapsed >= 1.0:
-            secs = int(elapsed)
-            self._last_tick = now
-            self.step_remaining = max(0, self.step_remaining - secs)
-            self.total_remaining = max(0, self.total_remaining - secs)
-
-            if self.step_remaining <= 0:
-                self._next_step()
-
-        self.on_tick(self.step_index, self.step_remaining, self.total_remaining)
-
-    # --- Helpers internos ---
-
-    def _apply_step(self, step: Step):
-        # Apaga todo de base
-        self.hw.stop_all()
-
-        acc = step.accion.lower()
-        if acc in ("prelavado", "lavado", "enjuague"):
-            # Llenado + (opcional) químico, sin giro fuerte
-            self.hw.fill(step.agua)
-            self.hw.add_chemical(step.quimico)
-        elif acc in ("centrifugado", "spin"):
-            self.hw.drain_open(True)
-            self.hw.spin(step.velocidad)
-        elif acc in ("drenaje", "descarga"):
-            self.hw.drain_open(True)
-        else:
-            # Paso genérico: permitir acciones personalizadas en el futuro
-            pass
-
-        # tiempo del paso
-        self.step_remaining = step.duracion
+        elif tipo == "estado":
+            self.on_status(msg["texto"])
+        elif tipo == "fin":
+            self.on_finish()
 
-    def _next_step(self):
-        self.step_index += 1
-        if not self.cycle or self.step_index >= len(self.cycle.pasos):
-            self.finish()
-            return
-        self.on_step_change(self.step_index)
-        self._apply_step(self.cycle.pasos[self.step_index])
-
-    def finish(self):
-        self.state = Executor.IDLE
-        self.hw.stop_all()
-        self.on_status("Ciclo terminado")
-        self.on_finish()
 
 # =========================
 #   GUI TKINTER
@@ -305,6 +218,7 @@ class Executor:
 
 class WasherUI(tk.Tk):
     TICK_MS = 200  # 5 Hz para respuesta rápida sin hilos
+    PERFIL_S = 10  # ventana del perfilador por muestreo (F12)
 
     def __init__(self):
         super().__init__()
@@ -313,17 +227,25 @@ class WasherUI(tk.Tk):
         self.minsize(840, 520)
 
         self.hw = HardwareIO()
-        self.executor = Executor(
-            hw=self.hw,
+        callbacks = dict(
             on_status=self._update_status_text,
             on_tick=self._on_tick,
             on_step_change=self._on_step_change,
             on_finish=self._on_finish
         )
+        if ClienteControlador.disponible():
+            # Controlador corriendo: la GUI es solo un cliente
+            maquina = os.environ.get("LAVADORA_MAQUINA", "M1")
+            self.executor = RemoteExecutor(ClienteControlador(), maquina, **callbacks)
+        else:
+            self.executor = Executor(hw=self.hw, **callbacks)
 
         self.selected_cycle: Optional[Cycle] = None
+        # Detector de atascos del bucle (LAVADORA_VIGIA_MS=umbral); None = apagado
+        self.vigia = VigiaBucle.desde_entorno("gui")
         self._build_ui()
         self._load_cycle_list()
+        self.bind("<F12>", lambda _e: self._perfilar())
         self.after(self.TICK_MS, self._loop)
 
     # --- UI building ---
@@ -399,7 +321,14 @@ class WasherUI(tk.Tk):
             return
         filename = list_cycles()[idx[0]]
         path = os.path.join(CICLOS_DIR, filename)
-        self.selected_cycle = load_cycle_from_txt(path)
+        cycle, problemas = load_cycle_from_txt(path)
+        if problemas:
+            # no se carga un ciclo más corto sin avisar: se corrige el archivo primero
+            self.selected_cycle = None
+            self._render_details(None)
+            messagebox.showerror("Ciclo inválido", f"{filename}:\n" + "\n".join(problemas))
+            return
+        self.selected_cycle = cycle
         self._render_details(self.selected_cycle)
 
     def _render_details(self, cycle: Optional[Cycle]):
@@ -450,7 +379,11 @@ class WasherUI(tk.Tk):
         if not self.selected_cycle:
             messagebox.showwarning("Sin ciclo", "Selecciona un ciclo primero.")
             return
-        self.executor.load_cycle(self.selected_cycle)
+        try:
+            self.executor.load_cycle(self.selected_cycle)
+        except ErrorInterlock as e:
+            messagebox.showerror("Ciclo inseguro", "\n".join(str(v) for v in e.violaciones))
+            return
         self.executor.start()
         self.btn_run.configure(state="disabled")
         self.btn_pause.configure(state="normal", text="⏸  Pausar")
@@ -508,11 +441,36 @@ class WasherUI(tk.Tk):
             self.selected_cycle = None
             self._render_details(None)
 
+    def _perfilar(self):
+        """F12: perfila el hilo de la GUI PERFIL_S segundos y deja un .folded para flamegraph."""
+        ruta = os.path.join(ROOT, "datos", "perfiles", time.strftime("gui-%Y%m%d-%H%M%S.folded"))
+        self._update_status_text(f"Perfilando {self.PERFIL_S}s…")
+        hilo = perfilar_ventana(self.PERFIL_S, ruta, hilos=[threading.get_ident()])
+
+        def avisar():     # sondeo desde el hilo de Tk: nada de Tk desde el hilo del perfilador
+            if hilo.is_alive():
+                self.after(250, avisar)
+            else:
+                self._update_status_text(f"Perfil guardado en {ruta}")
+        self.after(self.PERFIL_S * 1000, avisar)
+
     # --- Main loop for executor ---
     def _loop(self):
-        self.executor.tick()
+        v = self.vigia
+        if v is None:
+            self.executor.tick()
+        else:
+            v.latido(self.TICK_MS / 1000.0)
+            with v.medir("tick"):
+                self.executor.tick()
         self.after(self.TICK_MS, self._loop)
 
+    def destroy(self):
+        if self.vigia:
+            self.vigia.parar()
+            print(self.vigia.resumen())
+        super().destroy()
+
 # =========================
 #   EDITOR DE CICLOS
 # =========================
@@ -544,39 +502,15 @@ class CycleEditor(tk.Toplevel):
 
     def _save(self):
         # Guarda a un Cycle en memoria (no escribe archivo aquí)
-        content = self.text.get("1.0", "end").strip().splitlines()
-        nombre = "Ciclo Personalizado"
-        pasos: List[Step] = []
-        for line in content:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if line.lower().startswith("nombre="):
-                nombre = line.split("=", 1)[1].strip()
-                continue
-            kv = parse_kv(line)
-            accion = kv.get("accion")
-            dur = kv.get("duracion")
-            if not accion or not dur:
-                continue
-            try:
-                dur = int(dur)
-            except ValueError:
-                messagebox.showerror("Error", f"Duración inválida en línea:\n{line}")
-                return
-            pasos.append(Step(
-                accion=accion,
-                duracion=dur,
-                agua=kv.get("agua"),
-                quimico=kv.get("quimico"),
-                velocidad=kv.get("velocidad"),
-            ))
-
-        if not pasos:
+        cycle, problemas = leer_pasos(self.text.get("1.0", "end"), "Ciclo Personalizado")
+        if problemas:
+            messagebox.showerror("Error", "Líneas inválidas:\n" + "\n".join(problemas))
+            return
+        if not cycle.pasos:
             messagebox.showwarning("Vacío", "El ciclo no contiene pasos válidos.")
             return
 
-        self.on_save(Cycle(nombre=nombre, pasos=pasos))
+        self.on_save(cycle)
         self.destroy()
 
 # =========================
@@ -1,11 +1,33 @@
-from core.cycle_manager import asegurar_carpeta_ciclos, listar_ciclos, crear_ciclo, eliminar_ciclo
-from Serial.serial_manager import SerialManager
+from core.cycle_manager import asegurar_carpeta_ciclos, listar_ciclos, crear_ciclo, eliminar_ciclo, CICLOS_DIR, biblioteca
+from core.ipc import ClienteControlador
+
+MAQUINA = "M1"  # máquina del controlador que maneja este menú
+
+def _elegir_ciclo(ciclos: list[str], accion: str) -> str | None:
+    print(f"\nCiclos disponibles para {accion} :")
+    for i, ciclo in enumerate(ciclos, 1):
+        print(f"{i}. {ciclo}")
+    try:
+        opcion = int(input(f"Selecciona el número del ciclo a {accion}: "))
+        if 1 <= opcion <= len(ciclos):
+            return ciclos[opcion - 1]
+        print("⚠️ Número inválido.")
+    except ValueError:
+        print("⚠️ Ingresa un número válido.")
+    return None
 
 def main():
     asegurar_carpeta_ciclos()
 
-    # Inicializar conexión serial
-    serial_manager = SerialManager(port="COM3")  # Ajusta tu puerto aquí
+    # Si el controlador (python -m core.ipc) está corriendo, él es dueño del
+    # puerto serie y este menú es solo un cliente. Si no, conexión directa.
+    cliente = ClienteControlador() if ClienteControlador.disponible() else None
+    serial_manager = None
+    if cliente is None:
+        from Serial.serial_manager import SerialManager
+        serial_manager = SerialManager(port="COM3")  # Ajusta tu puerto aquí
+    else:
+        print(f"✅ Conectado al controlador ({', '.join(cliente.maquinas())})")
 
     while True:
         print("\n--- MENÚ ---")
@@ -14,7 +36,11 @@ def main():
         print("3. Eliminar ciclo")
         print("4. Enviar comando al ESP32")
         print("5. Salir")
-        
+        if cliente:
+            print("6. Ejecutar ciclo (controlador)")
+            print("7. Estado de las máquinas")
+            print("8. Detener ciclo")
+
         opcion = input("Selecciona una opción: ")
 
         if opcion == "1":
@@ -31,29 +57,64 @@ def main():
                 print("⚠️ No hay ciclos para eliminar.")
                 continue
 
-            print("\nCiclos disponibles para eliminar :")
-            for i, ciclo in enumerate(ciclos, 1):
-                print(f"{i}. {ciclo}")
-
-            try:
-                opcion = int(input("Selecciona el número del ciclo a eliminar: "))
-                if 1 <= opcion <= len(ciclos):
-                    nombre = ciclos[opcion - 1]
-                    print(eliminar_ciclo(nombre))
-                else:
-                    print("⚠️ Número inválido.")
-            except ValueError:
-                print("⚠️ Ingresa un número válido.")
+            nombre = _elegir_ciclo(ciclos, "eliminar")
+            if nombre:
+                print(eliminar_ciclo(nombre))
 
         elif opcion == "4":
             comando = input("Escribe el comando a enviar al ESP32: ")
-            respuesta = serial_manager.enviar_comando(comando)
-            print(f"ESP32 respondió: {respuesta}")
+            try:
+                if cliente:
+                    respuesta = cliente.comando(MAQUINA, comando)
+                else:
+                    respuesta = serial_manager.enviar_comando(comando)
+                print(f"ESP32 respondió: {respuesta}")
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️ {e}")
 
         elif opcion == "5":
-            serial_manager.cerrar()
+            # Con controlador, salir del menú NO detiene el ciclo en curso
+            if cliente:
+                cliente.cerrar()
+            else:
+                serial_manager.cerrar()
             break
 
+        elif opcion == "6" and cliente:
+            ciclos = listar_ciclos()
+            if not ciclos:
+                print("⚠️ No hay ciclos para ejecutar.")
+                continue
+            nombre = _elegir_ciclo(ciclos, "ejecutar")
+            if nombre:
+                try:
+                    bib = biblioteca()
+                    if bib is not None:
+                        est = cliente.iniciar(MAQUINA, timeline=bib.timeline(nombre))
+                    else:
+                        est = cliente.iniciar(MAQUINA, ciclo=str(CICLOS_DIR / f"{nombre}.txt"))
+                    print(f"▶ {MAQUINA}: {est['ciclo']} ({est['restante_total']}s)")
+                except KeyError:
+                    print(f"⚠️ El ciclo '{nombre}' no existe en la biblioteca.")
+                except (OSError, RuntimeError) as e:
+                    print(f"⚠️ {e}")
+
+        # el controlador puede haberse caído o reiniciado: avisar sin cerrar el menú
+        elif opcion == "7" and cliente:
+            try:
+                for maq, est in cliente.estado().items():
+                    print(f"{maq}: {est['estado']} - {est['ciclo'] or '-'} - {est['fase'] or '-'} "
+                          f"- restante {est['restante_total']}s")
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️ {e}")
+
+        elif opcion == "8" and cliente:
+            try:
+                cliente.detener(MAQUINA)
+                print(f"■ {MAQUINA} detenida (paro seguro)")
+            except (OSError, RuntimeError) as e:
+                print(f"⚠️ No se pudo detener {MAQUINA}: {e}")
+
         else:
             print("⚠️ Opción no válida. ")
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+# test/test_biblioteca.py
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from core.biblioteca import Biblioteca
+from core.interlocks import ErrorInterlock
+from core.timeline import compilar_archivo
+from core.pasos import compile_cycle, leer_pasos
+
+PASOS = ("nombre=Ciclo Rápido\n"
+         "accion=prelavado;duracion=120;agua=fria\n"
+         "accion=lavado;duracion=600;quimico=B\n"
+         "accion=centrifugado;duracion=180;velocidad=alto\n")
+
+
+def test_importar_buscar_revisiones_y_exportar():
+    with tempfile.TemporaryDirectory() as tmp:
+        bib = Biblioteca(Path(tmp) / "ciclos.db")
+        assert bib.importar_carpeta(ROOT / "ciclos") == {}
+        bib.guardar("rapido", PASOS)
+        assert bib.listar() == ["prueba", "rapido", "test"]
+        # los pasos se leen con el parser de la GUI; el nombre es el de la biblioteca
+        tl = bib.timeline("rapido")
+        assert tl.nombre == "rapido" and tl.fases == compile_cycle(leer_pasos(PASOS, "x")[0]).fases
+        assert bib.timeline("test").total_s == compilar_archivo(ROOT / "ciclos" / "test.txt").total_s
+
+        assert [f.nombre for f in bib.buscar(quimico="B", vel="ALTA", formato="pasos")] == ["rapido"]
+        assert [f.nombre for f in bib.buscar(max_total_s=100)] == ["test"]
+
+        texto = bib.texto("test")
+        assert bib.guardar("test", texto) == 1                  # sin cambios, sin revisión nueva
+        assert bib.guardar("test", texto.replace("AGITAR_S=2", "AGITAR_S=12", 1)) == 2
+        assert bib.ficha("test").total_s == bib.timeline("test", 1).total_s + 10
+
+        assert bib.exportar_carpeta(Path(tmp) / "out") == 3
+        assert (Path(tmp) / "out" / "rapido.txt").read_text(encoding="utf-8") == PASOS
+        bib.cerrar()
+
+
+def test_guardar_rechaza_ciclos_invalidos():
+    with tempfile.TemporaryDirectory() as tmp:
+        bib = Biblioteca(Path(tmp) / "ciclos.db")
+        # ninguna línea se puede leer: antes quedaba guardado como un ciclo vacío
+        with pytest.raises(ValueError, match="falta 'accion'"):
+            bib.guardar("roto", "nombre=Roto\nlavar 10 minutos\n")
+        # sin pasos: enclavamiento ciclo_vacio, antes del INSERT
+        with pytest.raises(ErrorInterlock) as e:
+            bib.guardar("vacio", "nombre=Vacío\n# sin pasos todavía\n")
+        assert [v.regla for v in e.value.violaciones] == ["ciclo_vacio"]
+        assert bib.listar() == []
+        bib.cerrar()
+
+
+if __name__ == "__main__":
+    test_importar_buscar_revisiones_y_exportar()
+    test_guardar_rechaza_ciclos_invalidos()
+    print("OK")
@@ -0,0 +1,106 @@
+# test/test_captura.py
+import os
+import sys
+import tempfile
+from collections import deque
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SerialBackend
+from core.executor import Executor
+from core.params_parser import load_params_txt
+from Serial.captura import GrabadorCaptura, PuertoReplay, RelojAcelerado, leer_captura, reproducir
+from Serial.serial_manager import SerialManager
+
+
+class _ESP32Eco:
+    """Puerto tipo serial.Serial que responde 'OK <comando>' a cada línea."""
+    def __init__(self):
+        self.salida = deque()
+
+    def write(self, data: bytes):
+        self.salida.extend(f"OK {l}" for l in data.decode().splitlines())
+
+    def readline(self) -> bytes:
+        return (self.salida.popleft() + "\n").encode() if self.salida else b""
+
+    def close(self):
+        pass
+
+
+def _grabar(ruta: str, comandos):
+    sm = SerialManager(ser=_ESP32Eco(), grabar=ruta)
+    for c in comandos:
+        sm.enviar_comando(c)
+    sm.cerrar()
+
+
+def _replay(ruta: str, comandos):
+    puerto = PuertoReplay(ruta, velocidad=0, log=None)
+    sm = SerialManager(ser=puerto)
+    return [sm.enviar_comando(c) for c in comandos], puerto.divergencias
+
+
+def test_replay_resincroniza_tras_comando_de_mas_o_de_menos():
+    grabados = ["PARO_TOTAL", "VALVULA_AGUA_ON", "DOSIF_A_ON", "MOTOR_BAJA_AUTO_ON", "MOTOR_OFF", "BOMBA_ON"]
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "sesion.lvcap")
+        _grabar(ruta, grabados)
+
+        resp, divs = _replay(ruta, grabados)
+        assert divs == [] and resp == [f"OK {c}" for c in grabados]
+
+        # un comando de más: una sola divergencia y el resto sigue alineado
+        con_extra = grabados[:2] + ["DOSIF_B_ON"] + grabados[2:]
+        resp, divs = _replay(ruta, con_extra)
+        assert [(d.indice, d.esperado, d.recibido) for d in divs] == [(3, None, b"DOSIF_B_ON\n")]
+        assert resp[3:] == [f"OK {c}" for c in grabados[2:]]
+
+        # un comando de menos: se marca el que faltó y nada más
+        sin_dosif = [c for c in grabados if c != "DOSIF_A_ON"]
+        resp, divs = _replay(ruta, sin_dosif)
+        assert [(d.esperado, d.recibido) for d in divs] == [(b"DOSIF_A_ON\n", b"")]
+        assert resp == [f"OK {c}" for c in sin_dosif]
+
+
+def test_reproducir_ciclo_completo_sin_esperas():
+    params = load_params_txt(ROOT / "ciclos" / "test.txt")
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "ciclo.lvcap")
+        reloj = RelojAcelerado(0)
+        sm = SerialManager(ser=_ESP32Eco(), grabar=ruta)
+        exe = Executor(backend=SerialBackend(sm), reloj=reloj, dormir=reloj.dormir)
+        exe.ejecutar(params)
+        exe.cerrar()
+        assert reloj() >= params.lavado.agitar_s        # el tiempo virtual sí avanzó
+
+        assert reproducir(ruta, params, velocidad=0) == []
+
+
+def test_silencio_largo_conserva_el_tiempo():
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "turno.lvcap")
+        g = GrabadorCaptura(ruta)
+        g.registrar(0, b"STATUS?\n")
+        g._ultimo -= int(3 * 3600 * 1e9)        # 3 h sin tráfico: más que el tope de 32 bits en µs
+        g.registrar(1, b"OK\n")
+        g.cerrar()
+        (t0, d0, _), (t1, d1, data) = list(leer_captura(ruta))
+        assert (d0, d1, data) == (0, 1, b"OK\n")
+        assert abs((t1 - t0) - 3 * 3600) < 1.0
+
+        esperas = []
+        puerto = PuertoReplay(ruta, velocidad=60.0, dormir=esperas.append, log=None)
+        puerto.write(b"STATUS?\n")
+        assert puerto.readline() == b"OK\n" and abs(sum(esperas) - 180.0) < 0.1
+
+
+if __name__ == "__main__":
+    test_replay_resincroniza_tras_comando_de_mas_o_de_menos()
+    test_reproducir_ciclo_completo_sin_esperas()
+    test_silencio_largo_conserva_el_tiempo()
+    print("OK")
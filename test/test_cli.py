@@ -0,0 +1,42 @@
+# test/test_cli.py
+import subprocess
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre cli.py)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def _py(codigo: str) -> str:
+    return subprocess.run([sys.executable, "-c", codigo], cwd=ROOT, capture_output=True,
+                          text=True, check=True).stdout
+
+
+def test_import_rapido_y_sin_dependencias_pesadas():
+    # proceso limpio: el import de cli no arrastra serial/tkinter/sqlite3/numpy
+    salida = _py(
+        "import sys, time\n"
+        "t = time.perf_counter(); import cli; ms = (time.perf_counter() - t) * 1000\n"
+        "pesados = [m for m in ('serial', 'tkinter', 'sqlite3', 'numpy', 'core') if m in sys.modules]\n"
+        "print(round(ms, 2), cli.PRESUPUESTO_IMPORT_MS, ','.join(pesados))\n"
+    ).split()
+    assert float(salida[0]) < float(salida[1]), salida
+    assert len(salida) == 2, f"módulos cargados al importar cli: {salida[2:]}"
+
+
+def test_estimate_no_toca_hardware_ni_gui():
+    salida = _py(
+        "import sys, cli\n"
+        "rc = cli.main(['estimate', 'prueba', '--json'])\n"
+        "print(rc, 'serial' in sys.modules, 'tkinter' in sys.modules)\n"
+    ).strip().splitlines()
+    assert salida[-1] == "0 False False"
+    assert '"nominal_s": 101' in salida[0]
+
+
+if __name__ == "__main__":
+    test_import_rapido_y_sin_dependencias_pesadas()
+    test_estimate_no_toca_hardware_ni_gui()
+    print("OK")
@@ -0,0 +1,84 @@
+# test/test_cola.py
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.cola import ColaTrabajos
+from core.controlador import Controlador
+from core.engine import CycleEngine
+from core.timeline import compilar_archivo
+
+CICLO = str(ROOT / "ciclos" / "test.txt")
+
+
+def test_orden_cancelacion_y_persistencia():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Path(tmp) / "cola.jsonl"
+        cola = ColaTrabajos(journal)
+        a = cola.encolar("M1", CICLO, prioridad=5)
+        b = cola.encolar("M1", CICLO, prioridad=1)
+        c = cola.encolar("M1", CICLO, prioridad=1)
+        cola.encolar("M2", CICLO)
+        assert cola.siguiente("M1").id == b.id
+        assert cola.cancelar(b.id)
+        assert cola.sacar("M1").id == c.id
+        cola.cerrar()
+
+        # Al reiniciar se reconstruye desde el journal
+        cola2 = ColaTrabajos(journal)
+        assert [t.id for t in cola2.listar("M1")] == [a.id]
+        assert len(cola2) == 2
+        assert cola2.encolar("M1", CICLO).id > a.id
+        cola2.cerrar()
+
+
+def test_journal_truncado_no_pierde_registros_posteriores():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = Path(tmp) / "cola.jsonl"
+        cola = ColaTrabajos(journal)
+        a = cola.encolar("M1", CICLO)
+        cola.encolar("M1", CICLO)
+        cola.cerrar()
+        # corte de luz a mitad del último registro
+        datos = journal.read_bytes()
+        journal.write_bytes(datos[:-10])
+
+        cola2 = ColaTrabajos(journal)
+        assert [t.id for t in cola2.listar()] == [a.id]
+        c = cola2.encolar("M2", CICLO)
+        cola2.cerrar()
+
+        cola3 = ColaTrabajos(journal)
+        assert [t.id for t in cola3.listar()] == [a.id, c.id]
+        cola3.cerrar()
+
+
+def test_trabajos_consecutivos_sin_hueco():
+    reloj = [0.0]
+    ctrl = Controlador(reloj=lambda: reloj[0])
+    ctrl.agregar_maquina("M1")
+    ctrl.activar_cola(ColaTrabajos())
+    total = compilar_archivo(Path(CICLO)).total_s
+    ctrl.encolar("M1", CICLO)
+    ctrl.encolar("M1", CICLO)
+
+    ctrl.tick()
+    eng = ctrl.maquinas["M1"]
+    assert eng.state == CycleEngine.RUNNING and len(ctrl.cola) == 1
+    reloj[0] = total
+    ctrl.tick()
+    # terminó el primero y el segundo arrancó en el mismo tick
+    assert eng.state == CycleEngine.RUNNING and len(ctrl.cola) == 0
+    assert ctrl.corredores["M1"].actual.id == 2
+
+
+if __name__ == "__main__":
+    test_orden_cancelacion_y_persistencia()
+    test_journal_truncado_no_pierde_registros_posteriores()
+    test_trabajos_consecutivos_sin_hueco()
+    print("OK")
@@ -0,0 +1,68 @@
+# test/test_consumo.py
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SimuladorBackend
+from core.consumo import Calibracion, ContadorConsumo, consumo_plan, reporte_consumo
+from core.engine import CycleEngine
+from core.historial import Historial
+from core.timeline import compilar_archivo
+
+CICLO = ROOT / "ciclos" / "test.txt"
+
+
+def test_real_coincide_con_plan_y_pausa_no_cuenta():
+    tl = compilar_archivo(CICLO)
+    cal = Calibracion(agua_l_s=0.5, dosif_ml_s={"A": 2.0, "B": 2.0, "C": 2.0, "D": 2.0})
+    t = [0.0]
+    eng = CycleEngine(SimuladorBackend(log=None), "M1", reloj=lambda: t[0])
+    contador = ContadorConsumo({"M1": cal}, guardar_corridas=True)
+    contador.conectar(eng)
+
+    eng.cargar(tl)
+    eng.iniciar()
+    t[0] += 1.0
+    eng.pausar()            # 100 s en pausa con la válvula de agua cortada
+    t[0] += 100.0
+    eng.pausar()
+    while eng.state == CycleEngine.RUNNING:
+        t[0] = eng.proximo_evento()
+        eng.tick()
+
+    plan = consumo_plan(tl, cal)
+    (_, maquina, _, completo, cantidades), = contador.corridas
+    assert maquina == "M1" and completo
+    for r, v in contador.acumulado.items():
+        assert abs(v - plan[r]) < 1e-6, (r, v, plan[r])
+
+
+def test_reporte_recorre_el_rango_una_vez():
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        inicio = datetime(2026, 9, 1, 8)
+        for d in range(30):
+            for ciclo in ("test", "prueba"):
+                h.agregar("consumos", t=(inicio + timedelta(days=d)).timestamp(), maquina="M1",
+                          ciclo=ciclo, agua_l=10.0, dosif_a_ml=1.0)
+        listados = []
+        dias = h.dias
+        h.dias = lambda *a: listados.append(a) or dias(*a)
+
+        por_dia = reporte_consumo(h, por="dia", desde=date(2026, 9, 1), hasta=date(2026, 9, 30))
+        assert len(listados) == 1                 # antes: un listado del directorio por día
+        assert len(por_dia) == 30 and por_dia["2026-09-15"]["VALVULA_AGUA"] == 20.0
+        por_ciclo = reporte_consumo(h, por="ciclo", precios={"VALVULA_AGUA": 0.5})
+        assert por_ciclo["test"]["corridas"] == 30 and por_ciclo["prueba"]["costo"] == 150.0
+
+
+if __name__ == "__main__":
+    test_real_coincide_con_plan_y_pausa_no_cuenta()
+    test_reporte_recorre_el_rango_una_vez()
+    print("OK")
@@ -0,0 +1,114 @@
+# test/test_creditos.py
+import sys
+from collections import deque
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SerialBackend
+from Serial.serial_manager import SerialManager
+
+
+class _ESP32Falso:
+    """Puerto tipo serial.Serial: buffer de `capacidad` comandos, telemetría intercalada."""
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self.buffer = deque()
+        self.salida = deque()
+        self.escrituras = 0
+        self.perdidos = 0
+
+    def write(self, data: bytes):
+        self.escrituras += 1
+        for linea in data.decode().splitlines():
+            if linea == "CREDITS?":
+                self.salida.append(f"CREDITS={self.capacidad}")
+            elif len(self.buffer) >= self.capacidad:
+                self.perdidos += 1          # desborde: el firmware lo tira en silencio
+            else:
+                self.buffer.append(linea)
+
+    def readline(self) -> bytes:
+        if not self.salida and self.buffer:
+            cmd = self.buffer.popleft()
+            self.salida.append("#TEL;EMERGENCIA=0;TEMP=40")
+            self.salida.append(f"OK {cmd}")
+        return (self.salida.popleft() + "\n").encode() if self.salida else b""
+
+    def reset_input_buffer(self):
+        self.salida.clear()
+
+    def close(self):
+        pass
+
+
+class _ESP32Lento(_ESP32Falso):
+    """Responde tarde a los comandos de `lentos`: el timeout vence antes de la respuesta."""
+    def __init__(self, capacidad: int, lentos=()):
+        super().__init__(capacidad)
+        self.lentos = set(lentos)
+
+    def readline(self) -> bytes:
+        if not self.salida and self.buffer and self.buffer[0] in self.lentos:
+            cmd = self.buffer.popleft()
+            self.salida.append(f"OK {cmd}")     # llega después del timeout
+            return b""
+        return super().readline()
+
+
+def test_lote_respeta_creditos_y_separa_telemetria():
+    esp = _ESP32Falso(capacidad=3)
+    tel = []
+    sm = SerialManager(ser=esp, creditos=0, al_telemetria=tel.append)
+    assert sm.creditos == 3
+
+    cmds = [f"DOSIF_{q}_ON" for q in "ABCD"] + ["MOTOR_BAJA_AUTO_ON", "BOMBA_OFF"]
+    assert sm.enviar_lote(cmds) == [f"OK {c}" for c in cmds]
+    assert esp.perdidos == 0 and len(tel) == len(cmds)
+    assert esp.escrituras < 1 + len(cmds)          # varios comandos por escritura
+    m = sm.metricas()
+    assert m["cola_max"] == 3 and m["en_vuelo"] == 0 and m["enviados"] == 6
+
+    # sin control de flujo y con un lote mayor que el buffer, el firmware pierde comandos
+    esp2 = _ESP32Falso(capacidad=3)
+    sm2 = SerialManager(ser=esp2, creditos=10)
+    resp = sm2.enviar_lote(cmds)
+    assert esp2.perdidos == 3 and resp.count("⚠️ Sin respuesta") == 3
+
+    # la telemetría empujada alimenta el snapshot de sensores (core/sensores.py)
+    be = SerialBackend(SerialManager(ser=_ESP32Falso(2), creditos=2))
+    cache = be.activar_sensores()
+    be.enviar("MOTOR_OFF")
+    snap = cache.snapshot()
+    assert snap.origen == "telemetria" and snap.valores["TEMP"] == 40 and cache.consultas == 0
+
+
+def test_lineas_asincronas_desconocidas_no_rompen_el_lote():
+    esp = _ESP32Falso(capacidad=2)
+    be = SerialBackend(SerialManager(ser=esp, creditos=2))
+    cache = be.activar_sensores()
+    esp.salida.extend(["#BOOT", "#TEL;basura", "#TEL;EMERGENCIA=0;TEMP=31"])
+    assert be.enviar_lote(["MOTOR_OFF", "BOMBA_ON"]) == ["OK MOTOR_OFF", "OK BOMBA_ON"]
+    assert be.sm.en_vuelo == 0
+    assert be.enviar_lote(["BOMBA_OFF", "MOTOR_OFF"]) == ["OK BOMBA_OFF", "OK MOTOR_OFF"]
+    assert cache.snapshot().valores["TEMP"] == 40 and cache.consultas == 0
+
+
+def test_timeout_resincroniza_respuestas_tardias():
+    esp = _ESP32Lento(capacidad=1, lentos={"B"})
+    sm = SerialManager(ser=esp)
+    assert sm.enviar_comando("A") == "OK A"
+    assert sm.enviar_comando("B") == "⚠️ Sin respuesta"
+    # la respuesta tardía de B se descarta; C recibe la suya
+    assert sm.enviar_comando("C") == "OK C"
+    assert sm.metricas()["sin_respuesta"] == 1 and sm.en_vuelo == 0
+
+
+if __name__ == "__main__":
+    test_lote_respeta_creditos_y_separa_telemetria()
+    test_lineas_asincronas_desconocidas_no_rompen_el_lote()
+    test_timeout_resincroniza_respuestas_tardias()
+    print("OK")
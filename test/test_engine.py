@@ -0,0 +1,163 @@
+# test/test_engine.py
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.params_parser import load_params_txt
+from core.timeline import compilar, fase_de_paso, Timeline, DRENADO_ENJUAGUE_S
+from core.engine import CycleEngine
+from core.backends import Backend
+from core.eta import ModeloETA
+
+
+class RelojVirtual:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+    def dormir(self, s: float):
+        self.t += s
+
+
+class BackendGrabador(Backend):
+    def __init__(self):
+        self.comandos = []
+        self.paro = False
+
+    def enviar(self, comando: str) -> str:
+        self.comandos.append(comando)
+        return "OK"
+
+    def paro_total(self):
+        self.comandos.append("PARO_TOTAL")
+
+    def emergencia(self) -> bool:
+        return self.paro
+
+
+def _params():
+    return load_params_txt(ROOT / "ciclos" / "test.txt")
+
+
+def test_compilar_duracion_total():
+    p = _params()
+    tl = compilar(p)
+    esperado = (p.lavado.llenado_s + sum(p.lavado.dosificar.values()) + p.lavado.agitar_s
+                + p.enjuague.repeticiones * (p.enjuague.llenado_s + p.enjuague.agitar_s + DRENADO_ENJUAGUE_S)
+                + p.centrifugado.balanceo_s + 10 + p.centrifugado.centrifugado_s)
+    assert tl.total_s == esperado
+    assert tl.restantes[-1] == tl.fases[-1].duracion_s
+
+
+def test_ejecutar_bloqueante_con_reloj_virtual():
+    reloj, be = RelojVirtual(), BackendGrabador()
+    eng = CycleEngine(be, reloj=reloj)
+    tl = compilar(_params())
+    eng.ejecutar(tl, dormir=reloj.dormir)
+    assert eng.state == CycleEngine.IDLE
+    assert abs(reloj.t - tl.total_s) < 0.05 + 1e-6
+    assert be.comandos[0] == "VALVULA_AGUA_ON"
+    assert be.comandos.count("MOTOR_BAJA_FIJA_ON") == 1
+
+
+def test_tick_cruza_varias_fases_y_pausa():
+    reloj, be = RelojVirtual(), BackendGrabador()
+    eng = CycleEngine(be, reloj=reloj)
+    tl = Timeline("demo", (fase_de_paso("lavado", 5, "fria", "A"),
+                           fase_de_paso("enjuague", 5),
+                           fase_de_paso("centrifugado", 5, velocidad="alto")))
+    eng.cargar(tl)
+    eng.iniciar()
+    reloj.t = 11.0
+    eng.tick()
+    assert eng.idx == 2 and eng.restante_total() == 4.0
+    eng.pausar()
+    reloj.t = 100.0
+    eng.pausar()
+    assert eng.restante_fase() == 4.0
+    assert eng.actuadores["MOTOR"] == "ALTA_FIJA"
+
+
+def test_reiniciar_tras_terminar_corre_el_ciclo_completo():
+    reloj, be = RelojVirtual(), BackendGrabador()
+    eng = CycleEngine(be, reloj=reloj)
+    tl = Timeline("demo", (fase_de_paso("lavado", 5, "fria"), fase_de_paso("drenaje", 3)))
+    eng.cargar(tl)
+    eng.iniciar()
+    reloj.t = 8.0
+    eng.tick()
+    assert eng.state == CycleEngine.IDLE
+    snap = eng.snapshot()
+    assert snap["restante_total"] == 0 and snap["fase"] is None
+    # sin cargar() de nuevo: vuelve a correr desde la primera fase
+    eng.iniciar()
+    assert eng.idx == 0 and eng.restante_total() == tl.total_s
+    reloj.t = 16.0
+    eng.tick()
+    assert eng.state == CycleEngine.IDLE
+
+
+def test_emergencia_detiene():
+    reloj, be = RelojVirtual(), BackendGrabador()
+    eng = CycleEngine(be, reloj=reloj)
+    eng.cargar(compilar(_params()))
+    eng.iniciar()
+    be.paro = True
+    eng.tick()
+    assert eng.state == CycleEngine.STOPPED
+    assert eng.actuadores["BOMBA"] is True and eng.actuadores["MOTOR"] == "OFF"
+
+
+def test_eta_aprende_latencia_de_comandos():
+    reloj = RelojVirtual()
+
+    class BackendLento(BackendGrabador):
+        def enviar(self, comando: str) -> str:
+            reloj.t += 0.5          # medio segundo de ida y vuelta serie
+            return super().enviar(comando)
+
+    eng = CycleEngine(BackendLento(), maquina="M1", reloj=reloj)
+    modelo = ModeloETA()
+    modelo.conectar(eng)
+    tl = compilar(_params(), nombre="test")
+    duraciones = []
+    for _ in range(2):
+        t0 = reloj.t
+        eng.ejecutar(tl, dormir=reloj.dormir)
+        duraciones.append(reloj.t - t0)
+
+    eng.cargar(tl)
+    assert eng.restante_total() == tl.total_s
+    # el nominal no ve la latencia; la ETA aprendida sí
+    assert abs(eng.restante_estimado() - duraciones[-1]) < 2.0
+    assert abs(modelo.duracion(str(ROOT / "ciclos" / "test.txt")) - duraciones[-1]) < 2.0
+
+
+def test_eta_tolera_archivo_danado():
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "datos" / "eta.json"
+        ruta.parent.mkdir()
+        ruta.write_text('[[["M1", "c", 0], [1.5', encoding="utf-8")    # escritura cortada
+        modelo = ModeloETA(ruta)
+        assert modelo.stats == {}
+        modelo.observar("M1", "c", 0, "Llenado", 10, 12)
+        modelo.guardar()
+        assert ModeloETA(ruta).stats[("M1", "c", 0)] == [2.0, 1]
+
+
+if __name__ == "__main__":
+    test_compilar_duracion_total()
+    test_ejecutar_bloqueante_con_reloj_virtual()
+    test_tick_cruza_varias_fases_y_pausa()
+    test_reiniciar_tras_terminar_corre_el_ciclo_completo()
+    test_emergencia_detiene()
+    test_eta_aprende_latencia_de_comandos()
+    test_eta_tolera_archivo_danado()
+    print("OK")
@@ -0,0 +1,109 @@
+# test/test_historial.py
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SerialBackend, SimuladorBackend
+from core.engine import CycleEngine
+from core.eta import ModeloETA
+from core.historial import Historial, RegistradorHistorial, RegistradorTelemetria
+from core.potencia import ControlAdmision
+from core.timeline import Timeline, fase_de_paso
+
+
+class _ESP32Status:
+    """SerialManager mínimo: responde STATUS? con una temperatura que sube."""
+    al_telemetria = None
+
+    def __init__(self):
+        self.temp = 30.0
+
+    def enviar_comando(self, comando: str) -> str:
+        self.temp += 1
+        return f"EMERGENCIA=0;TEMP={self.temp};MODO=auto"
+
+
+def test_snapshots_de_sensores_llegan_a_la_tabla_telemetria():
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        pared = [datetime(2026, 10, 1, 8).timestamp()]
+        be = SerialBackend(_ESP32Status())
+        cache = be.activar_sensores(ttl_s=0.0)
+        RegistradorTelemetria(h, periodo_s=1.0, reloj_pared=lambda: pared[0]).conectar(
+            CycleEngine(be, maquina="M1"))
+
+        for _ in range(10):             # 10 lecturas en 5 s: una muestra por segundo
+            be.emergencia()
+            pared[0] += 0.5
+        cache.empujar({"TEMP": 99})     # la telemetría empujada también se muestrea
+
+        medias = h.media_por("telemetria", "valor", por="sensor")
+        assert set(medias) == {"EMERGENCIA", "TEMP"}     # MODO no es numérico
+        cols = next(h.columnas("telemetria", ("t", "valor", "sensor")))
+        temp = h.id_de("sensor", "TEMP")
+        valores = [v for v, s in zip(cols["valor"], cols["sensor"]) if s == temp]
+        assert valores == [31.0, 33.0, 35.0, 37.0, 39.0, 99.0]
+
+
+def test_fases_sin_pausas_ni_esperas_de_cupo():
+    reloj = [0.0]
+    control = ControlAdmision(8.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        motores = []
+        for m in ("A", "B"):
+            eng = CycleEngine(SimuladorBackend(log=None), maquina=m, reloj=lambda: reloj[0])
+            eng.admision = control.solicitar
+            RegistradorHistorial(h, reloj_pared=lambda: 1.8e9 + reloj[0]).conectar(eng)
+            eng.cargar(Timeline("c", (fase_de_paso("lavado", 10),
+                                      fase_de_paso("centrifugado", 30, velocidad="alto"))))
+            motores.append(eng)
+        a, b = motores
+        a.iniciar()
+        reloj[0] = 5.0
+        a.pausar()                     # 20 s de pausa del operador en el lavado de A
+        reloj[0] = 25.0
+        a.pausar()
+        b.iniciar()                    # B llega al giro mientras A gira: espera cupo
+        while a.state == CycleEngine.RUNNING or b.state == CycleEngine.RUNNING:
+            reloj[0] += 1.0
+            for eng in motores:
+                eng.tick()
+        assert control.retraso_acumulado.get("B", 0) > 0
+
+        reales = [(m, i, r) for arrs in h.columnas("fases", ("maquina", "idx", "real_s"))
+                  for m, i, r in zip(arrs["maquina"], arrs["idx"], arrs["real_s"])]
+        assert sorted((h.nombre_de("maquina", m), int(i), round(r)) for m, i, r in reales) == \
+            [("A", 0, 10), ("A", 1, 30), ("B", 0, 10), ("B", 1, 30)]
+        # el modelo sembrado desde el historial no ve pausas ni esperas como desvío
+        modelo = ModeloETA()
+        assert modelo.entrenar(h) == 4
+        assert all(abs(d) <= 1.0 for d, _ in modelo.stats.values())
+
+
+def test_catalogo_se_persiste_antes_que_las_columnas():
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        t = datetime(2026, 10, 1, 8).timestamp()
+        h.agregar("comandos", t=t, maquina="M7", comando="BOMBA_ON", latencia_ms=3.0)
+        # corte al escribir las columnas: la carpeta del día no se puede crear
+        (Path(tmp) / "2026-10-01").write_text("", encoding="utf-8")
+        try:
+            h.flush()
+            assert False, "debía fallar la escritura de columnas"
+        except OSError:
+            pass
+        assert Historial(tmp).catalogo["maquina"] == ["M7"]
+
+
+if __name__ == "__main__":
+    test_snapshots_de_sensores_llegan_a_la_tabla_telemetria()
+    test_fases_sin_pausas_ni_esperas_de_cupo()
+    test_catalogo_se_persiste_antes_que_las_columnas()
+    print("OK")
@@ -0,0 +1,130 @@
+# test/test_ipc.py
+import os
+import socket
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.controlador import Controlador
+import core.ipc as ipc_mod
+from core.ipc import ClienteControlador, ServidorIPC
+from core.timeline import compilar_archivo
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="socket Unix no disponible")
+
+
+def test_ida_y_vuelta_por_socket():
+    reloj = [0.0]
+    ctrl = Controlador(reloj=lambda: reloj[0])
+    ctrl.agregar_maquina("M1")
+    ctrl.agregar_maquina("M2")
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "lavadora.sock")
+        srv = ServidorIPC(ctrl, ruta)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        cli = ClienteControlador(ruta)
+        try:
+            assert ClienteControlador.disponible(ruta)
+            assert cli.maquinas() == ["M1", "M2"]
+            eventos = cli.eventos()
+            msg = next(eventos)
+            assert msg["tipo"] == "snapshot" and set(msg["maquinas"]) == {"M1", "M2"}
+
+            tl = compilar_archivo(ROOT / "ciclos" / "test.txt")
+            snap = cli.iniciar("M1", timeline=tl)       # la Timeline viaja serializada
+            assert snap["estado"] == "RUNNING" and snap["fases"] == len(tl.fases)
+            msg = next(eventos)
+            while msg["tipo"] != "delta":
+                msg = next(eventos)
+            assert msg["maquina"] == "M1" and msg["delta"]["estado"] == "RUNNING"
+            assert "maquina" not in msg["delta"]        # solo lo que cambió
+
+            assert cli.pausar("M1")["estado"] == "PAUSED"
+            assert cli.estado("M1")["M1"]["estado"] == "PAUSED"
+            assert cli.detener("M1")["estado"] == "STOPPED"
+            with pytest.raises(RuntimeError):
+                cli.comando("M9", "BOMBA_ON")           # el error viaja como {"ok": false}
+            assert cli.comando("M2", "BOMBA_ON")        # y la conexión sigue sirviendo
+        finally:
+            cli.cerrar()
+            srv.shutdown()
+            srv.server_close()
+            ctrl.parar()
+        assert not os.path.exists(ruta)
+
+
+def test_suscriptor_trabado_no_toma_el_lock():
+    entrando, soltar = threading.Event(), threading.Event()
+
+    class _SocketTrabado:
+        # el cliente no lee: la escritura del snapshot queda bloqueada
+        def __init__(self, wfile):
+            self.wfile = wfile
+
+        def write(self, data):
+            if data.startswith(b'{"tipo":"snapshot"'):
+                entrando.set()
+                soltar.wait(5)
+            return self.wfile.write(data)
+
+        def __getattr__(self, nombre):
+            return getattr(self.wfile, nombre)
+
+    setup_original = ipc_mod._Manejador.setup
+
+    def setup(self):
+        setup_original(self)
+        self.wfile = _SocketTrabado(self.wfile)
+
+    ctrl = Controlador(reloj=lambda: 0.0)
+    ctrl.agregar_maquina("M1")
+    ipc_mod._Manejador.setup = setup
+    with tempfile.TemporaryDirectory() as tmp:
+        srv = ServidorIPC(ctrl, os.path.join(tmp, "lavadora.sock"))
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        try:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.connect(srv.ruta)
+            s.sendall(b'{"op":"suscribir"}\n')
+            assert entrando.wait(5)
+            assert ctrl.lock.acquire(timeout=1)      # tick() y los comandos siguen
+            ctrl.lock.release()
+            soltar.set()
+            s.close()
+        finally:
+            soltar.set()
+            ipc_mod._Manejador.setup = setup_original
+            srv.shutdown()
+            srv.server_close()
+            ctrl.parar()
+
+
+def test_cliente_sin_controlador_no_rompe_la_gui():
+    from gui.dominio import Cycle, Step
+    from gui.ui_lavadora import RemoteExecutor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        estados = []
+        ex = RemoteExecutor(ClienteControlador(os.path.join(tmp, "no-existe.sock"), timeout=0.5), "M1",
+                            on_status=estados.append, on_tick=lambda *a: None,
+                            on_step_change=lambda i: None, on_finish=lambda: None)
+        ex.load_cycle(Cycle("c", [Step("drenaje", 5)]))
+        ex.start()
+        ex.pause()
+        ex.stop()
+        assert len(estados) == 3 and all("controlador" in e.lower() for e in estados)
+
+
+if __name__ == "__main__":
+    test_ida_y_vuelta_por_socket()
+    test_suscriptor_trabado_no_toma_el_lock()
+    test_cliente_sin_controlador_no_rompe_la_gui()
+    print("OK")
@@ -0,0 +1,58 @@
+# test/test_perfilado.py
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.perfilado import Muestreador, VigiaBucle, volcar_colapsado
+
+
+def escaneo_lento(s: float):
+    time.sleep(s)
+
+
+def test_vigia_captura_pila_del_atasco():
+    avisos = []
+    v = VigiaBucle("prueba", umbral_ms=40, intervalo_muestra_s=0.005, avisar=avisos.append).arrancar()
+    try:
+        for _ in range(3):                   # iteraciones sanas
+            v.latido(0.01)
+            with v.medir("tick"):
+                time.sleep(0.005)
+        v.latido(0.01)
+        with v.medir("tick"):
+            escaneo_lento(0.2)               # el bucle se traba aquí
+        v.latido(0.01)
+    finally:
+        v.parar()
+    assert len(v.atascos) == 1
+    a = v.atascos[0]
+    assert "escaneo_lento" in a.pila_principal() and a.duracion_ms >= 150
+    assert v.etapas["tick"].n == 4 and v.etapas["tick"].sobre_umbral == 1
+    assert avisos and "escaneo_lento" in avisos[0]
+
+
+def test_muestreador_vuelca_formato_colapsado():
+    fin = time.monotonic() + 0.15
+    h = threading.Thread(target=lambda: escaneo_lento(max(0.0, fin - time.monotonic())))
+    h.start()
+    m = Muestreador(0.002, hilos=[h.ident]).arrancar()
+    h.join()
+    pilas = m.parar()
+    assert m.muestras > 10
+    with tempfile.TemporaryDirectory() as d:
+        ruta = volcar_colapsado(pilas, str(Path(d) / "p.folded"))
+        pila, n = Path(ruta).read_text().splitlines()[0].rsplit(" ", 1)
+    assert pila.endswith("test_perfilado.py:escaneo_lento") and int(n) > 5
+
+
+if __name__ == "__main__":
+    test_vigia_captura_pila_del_atasco()
+    test_muestreador_vuelca_formato_colapsado()
+    print("OK")
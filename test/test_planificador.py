@@ -0,0 +1,57 @@
+# test/test_planificador.py
+import sys
+import time
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.planificador import Planificador, MaquinaPlan, Carga
+from core.timeline import compilar_archivo
+
+TEST = str(ROOT / "ciclos" / "test.txt")
+PRUEBA = str(ROOT / "ciclos" / "prueba.txt")
+
+
+def test_reparte_y_respeta_capacidad_y_stock():
+    plan = Planificador([
+        MaquinaPlan("M1"),
+        MaquinaPlan("M2", ciclos={"test"}),
+        MaquinaPlan("M3", stock={"A": 0}),
+    ]).planificar([Carga(str(i), TEST if i % 2 else PRUEBA) for i in range(12)])
+    assert not plan.sin_asignar and len(plan.asignaciones) == 12
+    por_maq = plan.por_maquina()
+    assert all(a.carga.ciclo == TEST for a in por_maq.get("M2", []))
+    assert "M3" not in por_maq   # ambos ciclos dosifican A
+    # ninguna máquina solapa cargas
+    for lista in por_maq.values():
+        assert all(x.fin <= y.inicio for x, y in zip(lista, lista[1:]))
+    dur = {c: compilar_archivo(Path(c)).total_s for c in (TEST, PRUEBA)}
+    assert plan.makespan <= sum(dur[a.carga.ciclo] for a in plan.asignaciones) / 2 + max(dur.values())
+
+
+def test_replanifica_por_falla():
+    p = Planificador([MaquinaPlan("M1"), MaquinaPlan("M2")])
+    p.planificar([Carga(str(i), TEST) for i in range(6)])
+    plan = p.replanificar(ahora=1.0, maquina="M2", falla=True)
+    assert len(plan.asignaciones) == 6
+    assert all(a.maquina == "M1" or a.inicio <= 1.0 for a in plan.asignaciones)
+    assert not any(a.maquina == "M2" for a in plan.asignaciones)
+
+
+def test_cientos_de_cargas_rapido():
+    p = Planificador([MaquinaPlan(f"M{i}") for i in range(12)])
+    cargas = [Carga(str(i), TEST if i % 3 else PRUEBA, llegada=i * 30.0) for i in range(600)]
+    t0 = time.perf_counter()
+    plan = p.planificar(cargas)
+    assert time.perf_counter() - t0 < 0.5
+    assert len(plan.asignaciones) == 600
+
+
+if __name__ == "__main__":
+    test_reparte_y_respeta_capacidad_y_stock()
+    test_replanifica_por_falla()
+    test_cientos_de_cargas_rapido()
+    print("OK")
@@ -0,0 +1,113 @@
+# test/test_potencia.py
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SimuladorBackend
+from core.engine import CycleEngine
+from core.potencia import ControlAdmision, kw_de_fase
+from core.timeline import Timeline, fase_de_paso
+
+
+class RelojVirtual:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def _ciclo_gui() -> Timeline:
+    # Pasos de la GUI: el paso anterior al giro es un llenado, no un drenado
+    return Timeline("gui", (fase_de_paso("lavado", 10),
+                            fase_de_paso("centrifugado", 30, velocidad="alto"),
+                            fase_de_paso("drenaje", 5)))
+
+
+def _flota(tope_kw: float = 8.0):
+    reloj = RelojVirtual()
+    control = ControlAdmision(tope_kw)
+    motores = []
+    for m in ("A", "B"):
+        eng = CycleEngine(SimuladorBackend(log=None), maquina=m, reloj=reloj)
+        eng.admision = control.solicitar
+        motores.append(eng)
+    return reloj, control, motores
+
+
+def _avanzar(reloj, motores, hasta: float, paso: float = 1.0, al_paso=None):
+    while reloj.t < hasta:
+        reloj.t += paso
+        for eng in motores:
+            eng.tick()
+        if al_paso:
+            al_paso()
+
+
+def _kw(motores) -> float:
+    return sum(kw_de_fase(e.fase) for e in motores
+               if e.state == CycleEngine.RUNNING and e._retencion is None)
+
+
+def test_tope_escalona_giros():
+    reloj, control, (a, b) = _flota()
+    picos = []
+    for eng in (a, b):
+        eng.cargar(_ciclo_gui())
+        eng.iniciar()
+    _avanzar(reloj, (a, b), 120, al_paso=lambda: picos.append(_kw((a, b))))
+    assert max(picos) <= control.tope_kw
+    assert a.state == b.state == CycleEngine.IDLE
+    assert control.retraso_acumulado.get("B", 0) >= 30
+
+
+def test_retenida_espera_en_estado_seguro():
+    reloj, _, (a, b) = _flota()
+    for eng in (a, b):
+        eng.cargar(_ciclo_gui())
+        eng.iniciar()
+    _avanzar(reloj, (a, b), 15)
+    # A entró al giro; B terminó su llenado y espera cupo
+    assert a.actuadores["MOTOR"] == "ALTA_FIJA"
+    assert b._retencion is not None and b.idx == 0
+    assert b.actuadores["VALVULA_AGUA"] is False
+    assert b.actuadores["MOTOR"] == "OFF" and b.actuadores["BOMBA"] is True
+    # la pausa durante la retención vuelve al estado seguro, nunca a la fase
+    b.pausar()
+    b.pausar()
+    assert b.actuadores["VALVULA_AGUA"] is False and b.actuadores["BOMBA"] is True
+    _avanzar(reloj, (a, b), 45)
+    assert b.idx == 1 and b.actuadores["MOTOR"] == "ALTA_FIJA"
+
+
+def test_reanudar_giro_pide_cupo():
+    reloj, control, (a, b) = _flota()
+    a.cargar(_ciclo_gui())
+    a.iniciar()
+    _avanzar(reloj, (a,), 15)
+    assert a.actuadores["MOTOR"] == "ALTA_FIJA"
+    # pausa a mitad del giro: el cupo se libera y B arranca su giro
+    a.pausar()
+    control.liberar("A")
+    b.cargar(Timeline("giro", (fase_de_paso("centrifugado", 20, velocidad="alto"),)))
+    b.iniciar()
+    assert b.actuadores["MOTOR"] == "ALTA_FIJA"
+    # al reanudar, A no puede volver a girar hasta que B termine
+    a.pausar()
+    assert a.state == CycleEngine.RUNNING and a._retencion is not None
+    assert a.actuadores["MOTOR"] == "OFF"
+    picos = []
+    _avanzar(reloj, (a, b), reloj.t + 60, al_paso=lambda: picos.append(_kw((a, b))))
+    assert max(picos) <= control.tope_kw
+    assert a.state == CycleEngine.IDLE and b.state == CycleEngine.IDLE
+
+
+if __name__ == "__main__":
+    test_tope_escalona_giros()
+    test_retenida_espera_en_estado_seguro()
+    test_reanudar_giro_pide_cupo()
+    print("OK")
@@ -0,0 +1,85 @@
+# test/test_retencion.py
+import sys
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.historial import Historial
+from core.retencion import Compactador
+
+
+def test_compacta_dias_viejos_a_rollups():
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        t0 = datetime(2026, 10, 1, 8).timestamp()
+        for i in range(600):                       # 5 min a 2 Hz
+            h.agregar("telemetria", t=t0 + i * 0.5, maquina="M1", sensor="temp", valor=40 + (i % 60) / 10)
+        h.flush()
+
+        c = Compactador(h, crudo_dias=3, hoy=lambda: date(2026, 10, 10))
+        assert c.paso()
+        assert not c.paso()
+        assert not (Path(tmp) / "2026-10-01" / "telemetria").exists()
+
+        minutos = c.serie("M1", "temp", datetime(2026, 10, 1), datetime(2026, 10, 2))
+        assert len(minutos) == 5
+        assert all(b.cuenta == 120 for b in minutos)
+        assert abs(minutos[0].minimo - 40.0) < 1e-6 and abs(minutos[0].maximo - 45.9) < 0.011
+        hora = c.serie("M1", "temp", datetime(2026, 9, 1), datetime(2026, 10, 2))
+        assert len(hora) == 1 and hora[0].cuenta == 600
+
+
+def test_minutos_purgados_caen_al_rollup_de_hora():
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        t0 = datetime(2026, 8, 1, 8).timestamp()
+        for i in range(240):                       # 2 h, una muestra por minuto
+            h.agregar("telemetria", t=t0 + i * 30, maquina="M1", sensor="temp", valor=20.0)
+        h.flush()
+
+        c = Compactador(h, crudo_dias=3, minuto_dias=30, resolucion={"temp": 0.1},
+                        hoy=lambda: date(2026, 10, 10))
+        while c.paso():
+            pass
+        assert not (Path(tmp) / "rollups" / "minuto" / "2026-08-01.rlp").exists()
+        serie = c.serie("M1", "temp", datetime(2026, 8, 1), datetime(2026, 8, 2), nivel="minuto")
+        assert [b.cuenta for b in serie] == [120, 120]
+        assert h.ids_de("sensor", ["temp"]) == {"temp": h.id_de("sensor", "temp")}
+
+
+def test_parar_espera_el_paso_en_curso():
+    import threading
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        h = Historial(tmp)
+        t0 = datetime(2026, 10, 1, 8).timestamp()
+        for i in range(10):
+            h.agregar("telemetria", t=t0 + i, maquina="M1", sensor="temp", valor=40.0)
+        h.flush()
+        c = Compactador(h, crudo_dias=3, hoy=lambda: date(2026, 10, 10))
+        escribiendo = threading.Event()
+        escribir = c._escribir
+
+        def lento(*a):
+            escribiendo.set()
+            time.sleep(0.2)
+            escribir(*a)
+        c._escribir = lento
+        c.arrancar(pausa=0.01)
+        assert escribiendo.wait(5)
+        c.parar()                       # al salir el controlador: el día queda compactado entero
+        assert not (Path(tmp) / "2026-10-01" / "telemetria").exists()
+        assert c.leer("hora", "2026-10-01")
+
+
+if __name__ == "__main__":
+    test_compacta_dias_viejos_a_rollups()
+    test_minutos_purgados_caen_al_rollup_de_hora()
+    test_parar_espera_el_paso_en_curso()
+    print("OK")
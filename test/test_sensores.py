@@ -0,0 +1,76 @@
+# test/test_sensores.py
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SerialBackend
+from core.sensores import LecturaObsoleta, SensoresCache, parsear_status
+from gui.dominio import HardwareIO
+
+
+class _SMFalso:
+    """SerialManager mínimo: responde STATUS? y cuenta las idas y vueltas."""
+    def __init__(self):
+        self.enviados = []
+        self.respuesta = "EMERGENCIA=0;SUCCION=1;TEMP=35.5"
+
+    def enviar_comando(self, comando):
+        self.enviados.append(comando)
+        if self.respuesta is None:
+            raise OSError("timeout")
+        return self.respuesta
+
+
+def test_un_status_por_ttl_y_lectura_critica_fresca():
+    assert parsear_status("EMERGENCIA=1;TEMP=35.5") == {"EMERGENCIA": 1, "TEMP": 35.5}
+    t = [0.0]
+    sm = _SMFalso()
+    be = SerialBackend(sm)
+    cache = be.activar_sensores(ttl_s=0.25)
+    cache.reloj = lambda: t[0]
+
+    for _ in range(5):                       # varias lecturas en el mismo tick
+        assert be.emergencia() is False
+        assert cache.leer("SUCCION") == 1
+    assert sm.enviados == ["STATUS?"] and cache.aciertos == 9
+
+    t[0] = 0.3                               # venció el TTL
+    assert cache.leer("TEMP") == 35.5 and len(sm.enviados) == 2
+    t[0] = 0.31                              # 10 ms después: dentro del TTL...
+    assert cache.leer("TEMP") == 35.5 and len(sm.enviados) == 2
+    assert cache.leer("TEMP", max_edad=0) == 35.5 and len(sm.enviados) == 3   # ...pero se exige fresco
+
+    cache.empujar({"EMERGENCIA": 1})         # telemetría empujada: sin consulta
+    assert be.emergencia() is True and len(sm.enviados) == 3
+
+    sm.respuesta = None                      # el ESP32 deja de contestar
+    t[0] = 10.0
+    assert cache.leer("TEMP", max_edad=100) == 35.5      # lo viejo vale si se acepta
+    try:
+        cache.leer("TEMP")
+        assert False, "debía levantar LecturaObsoleta"
+    except LecturaObsoleta:
+        pass
+    assert be.emergencia() is True           # sin datos frescos: a estado seguro
+
+
+def test_hardwareio_agrupa_callbacks_en_un_snapshot():
+    llamadas = []
+    hw = HardwareIO()
+    hw.read_emergency_stop = lambda: llamadas.append("paro") or False
+    hw.read_suction_sensor = lambda: llamadas.append("succion") or True
+    cache = hw.usar_snapshot(ttl_s=1.0)
+    cache.reloj = lambda: 0.0
+    for _ in range(3):
+        assert not hw.is_emergency_pressed() and hw.has_suction()
+    assert llamadas == ["paro", "succion"]
+
+
+if __name__ == "__main__":
+    test_un_status_por_ttl_y_lectura_critica_fresca()
+    test_hardwareio_agrupa_callbacks_en_un_snapshot()
+    print("OK")
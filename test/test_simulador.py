@@ -0,0 +1,40 @@
+# test/test_simulador.py
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.simulador import Escenario, barrer, simular
+from core.timeline import compilar_archivo
+
+CICLO = str(ROOT / "ciclos" / "test.txt")
+
+
+def test_turno_chico_determinista():
+    total = compilar_archivo(Path(CICLO)).total_s
+    # 3 cargas juntas y 2 máquinas: la tercera espera a que se libere la primera
+    esc = Escenario(maquinas=2, turno_h=1, llegadas=[(0.0, CICLO)] * 3, nombre="chico")
+    r = simular(esc)
+    assert r.cargas_llegadas == r.cargas_completadas == 3
+    assert r.makespan_s == 2 * total
+    assert r.espera_media_s == total / 3 and r.cola_max == 1
+    assert r.utilizacion["M1"] == 2 * total / 3600 and r.utilizacion["M2"] == total / 3600
+    assert simular(esc) == r                       # reloj virtual: mismo resultado siempre
+
+
+def test_barrido_en_paralelo_igual_al_secuencial():
+    escenarios = [Escenario(maquinas=m, turno_h=2, cargas_por_hora=6, mezcla={CICLO: 1.0},
+                            semilla=7, nombre=f"{m} maquinas") for m in (1, 2, 3)]
+    secuencial = barrer(escenarios, procesos=1)
+    assert barrer(escenarios, procesos=2) == secuencial
+    completadas = [r.cargas_completadas for r in secuencial]
+    assert completadas == sorted(completadas) and completadas[-1] > 0
+
+
+if __name__ == "__main__":
+    test_turno_chico_determinista()
+    test_barrido_en_paralelo_igual_al_secuencial()
+    print("OK")
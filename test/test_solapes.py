@@ -0,0 +1,94 @@
+# test/test_solapes.py
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.interlocks import verificar
+from core.params_parser import load_params_text
+from core.solapes import ReglasSolape, optimizar
+from core.timeline import Fase, Timeline, compilar
+
+CICLO = """[LAVADO]
+LLENADO_S=30
+AGITAR_S=60
+VEL=MEDIA
+
+[ENJUAGUE]
+REPETICIONES=2
+LLENADO_S=20
+AGITAR_S=30
+VEL=BAJA
+
+[CENTRIFUGADO]
+BALANCEO_S=15
+CENTRIFUGADO_S=60
+VEL=ALTA
+"""
+
+
+def test_solapes_de_enjuague_y_centrifugado():
+    tl = compilar(load_params_text(CICLO), nombre="largo")
+    res = optimizar(tl, ReglasSolape(drenado_anticipado_s=5))
+    assert [s.tipo for s in res.aplicados] == ["drenado_anticipado"] * 2 + ["drenado_en_balanceo"]
+    assert res.ahorro_s == 5 + 5 + 10 and res.timeline.total_s == tl.total_s - 20
+    assert verificar(res.timeline) == []
+    # sin rampa el motor para antes del giro
+    assert "MOTOR_OFF" in res.timeline.fases[-2].off
+
+    con_rampa = optimizar(tl, ReglasSolape(rampa_sin_paro=True, rampa_ahorro_s=5))
+    assert con_rampa.ahorro_s == 25 and con_rampa.aplicados[-1].tipo == "rampa_giro"
+    assert "MOTOR_OFF" not in con_rampa.timeline.fases[-2].off
+
+
+def test_rampa_con_balanceo_mas_corto_que_el_drenado():
+    # balanceo de 2 s: quedan 8 s de drenado breve entre el balanceo y el giro
+    tl = compilar(load_params_text(CICLO.replace("BALANCEO_S=15", "BALANCEO_S=2")), nombre="corto")
+    res = optimizar(tl, ReglasSolape(drenado_anticipado_s=0, rampa_sin_paro=True, rampa_ahorro_s=5))
+    assert [s.tipo for s in res.aplicados] == ["drenado_en_balanceo", "rampa_giro"]
+    assert res.ahorro_s == 2 + 5 and verificar(res.timeline) == []
+    balanceo, drenado, giro = res.timeline.fases[-3:]
+    assert "MOTOR_OFF" not in balanceo.off and "MOTOR_OFF" not in drenado.off
+    assert drenado.duracion_s == 8 and drenado.on[0] == "MOTOR_BAJA_AUTO_ON" and "BOMBA_ON" in drenado.on
+    assert giro.duracion_s == tl.fases[-1].duracion_s - 5
+
+
+def test_rechaza_solape_que_viola_enclavamientos():
+    # agitación con la válvula abierta: drenar a la vez sería llenar y drenar juntos
+    tl = Timeline("dudoso", (
+        Fase("LAVADO", "Agitar con llenado", 30, ("VALVULA_AGUA_ON", "MOTOR_BAJA_AUTO_ON"),
+             ("MOTOR_OFF", "VALVULA_AGUA_OFF")),
+        Fase("LAVADO", "Drenado", 20, ("BOMBA_ON",), ("BOMBA_OFF",)),
+    ))
+    res = optimizar(tl)
+    assert res.aplicados == [] and res.timeline == tl and res.ahorro_s == 0
+    (solape, violaciones), = res.rechazados
+    assert solape.idx == 0 and "llenado_con_drenaje" in {v.regla for v in violaciones}
+
+
+def test_rechazo_no_oculta_otro_solape_en_la_misma_fase():
+    # balanceo con la válvula abierta: drenar durante el balanceo se rechaza,
+    # pero la rampa al giro en esa misma fase sigue siendo segura
+    tl = Timeline("balanceo con agua", (
+        Fase("CENTRIFUGADO", "Balanceo", 5, ("VALVULA_AGUA_ON", "MOTOR_BAJA_AUTO_ON"),
+             ("MOTOR_OFF", "VALVULA_AGUA_OFF")),
+        Fase("CENTRIFUGADO", "Drenado breve", 10, ("BOMBA_ON",), ("BOMBA_OFF",)),
+        Fase("CENTRIFUGADO", "Giro (ALTA)", 60, ("MOTOR_ALTA_FIJA_ON",), ("MOTOR_OFF",)),
+    ))
+    res = optimizar(tl, ReglasSolape(rampa_sin_paro=True, rampa_ahorro_s=5))
+    (solape, violaciones), = res.rechazados
+    assert solape.tipo == "drenado_en_balanceo" and solape.idx == 0
+    assert "llenado_con_drenaje" in {v.regla for v in violaciones}
+    assert [(s.tipo, s.idx) for s in res.aplicados] == [("rampa_giro", 0)]
+    assert res.ahorro_s == 5 and "MOTOR_OFF" not in res.timeline.fases[0].off
+
+
+if __name__ == "__main__":
+    test_solapes_de_enjuague_y_centrifugado()
+    test_rampa_con_balanceo_mas_corto_que_el_drenado()
+    test_rechaza_solape_que_viola_enclavamientos()
+    test_rechazo_no_oculta_otro_solape_en_la_misma_fase()
+    print("OK")
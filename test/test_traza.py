@@ -0,0 +1,56 @@
+# test/test_traza.py
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.backends import SimuladorBackend
+from core.engine import CycleEngine
+from core.timeline import compilar_archivo
+from core.traza import TrazaCiclos
+
+
+class _Lento(SimuladorBackend):
+    """Cada comando tarda 50 ms en el reloj virtual."""
+    def __init__(self, t):
+        super().__init__(log=None)
+        self.t = t
+
+    def enviar(self, comando):
+        self.t[0] += 0.05
+        return "OK"
+
+
+def test_traza_chrome_de_un_ciclo():
+    tl = compilar_archivo(ROOT / "ciclos" / "test.txt")
+    t = [0.0]
+    eng = CycleEngine(_Lento(t), "M1", reloj=lambda: t[0])
+    with tempfile.TemporaryDirectory() as d:
+        trazas = TrazaCiclos(d)
+        trazas.conectar(eng)
+        eng.ejecutar(tl, dormir=lambda s: t.__setitem__(0, t[0] + s))
+        trazas.cerrar()
+        ruta, = Path(d).glob("M1-test-*.json")
+        traza = json.loads(ruta.read_text(encoding="utf-8"))
+
+    spans = [e for e in traza["traceEvents"] if e["ph"] == "X"]
+    por_cat = lambda cat: [e for e in spans if e["cat"] == cat]
+    assert [e["name"] for e in por_cat("etapa")] == [
+        "LAVADO", "ENJUAGUE 1/3", "ENJUAGUE 2/3", "ENJUAGUE 3/3", "CENTRIFUGADO"]
+    assert len(por_cat("fase")) == len(tl.fases) == len(por_cat("espera"))
+    # cada fase real = plan + latencia de sus comandos (deriva > 0, ninguna negativa)
+    assert all(e["args"]["deriva_s"] >= 0.05 - 1e-6 for e in por_cat("fase"))
+    assert all(abs(e["args"]["latencia_ms"] - 50.0) < 1e-6 for e in por_cat("comando"))
+    huecos = por_cat("hueco")
+    assert huecos and huecos[0]["name"] == "MOTOR_OFF → MOTOR_BAJA_AUTO_ON"
+    assert traza["otherData"]["completo"] and traza["otherData"]["plan_s"] == tl.total_s
+
+
+if __name__ == "__main__":
+    test_traza_chrome_de_un_ciclo()
+    print("OK")
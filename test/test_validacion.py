@@ -0,0 +1,72 @@
+# test/test_validacion.py
+import sys
+import tempfile
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.interlocks import ERROR, AVISO, ErrorInterlock, exigir, verificar
+from core.timeline import Fase, Timeline
+from core.validacion import validar
+
+
+def test_enclavamientos_estaticos():
+    tl = Timeline("malo", (
+        Fase("LAVADO", "Llenado", 10, ("VALVULA_AGUA_ON",), ("VALVULA_AGUA_OFF",)),
+        Fase("LAVADO", "Agitar con llenado", 30, ("VALVULA_AGUA_ON", "MOTOR_BAJA_AUTO_ON"), ("MOTOR_OFF",)),
+        Fase("ENJUAGUE", "Nada", 0),
+        Fase("CENTRIFUGADO", "Giro", 60, ("MOTOR_ALTA_FIJA_ON",), ("MOTOR_OFF",)),
+    ))
+    vs = {(v.regla, v.severidad, v.idx) for v in verificar(tl)}
+    assert ("motor_con_llenado", ERROR, 1) in vs
+    assert ("fase_cero", AVISO, 2) in vs
+    assert ("giro_sin_drenado", ERROR, 3) in vs
+    try:
+        exigir(tl)
+        assert False, "debía rechazar el ciclo"
+    except ErrorInterlock as e:
+        assert len(e.violaciones) == 3     # la válvula sigue abierta también durante el giro
+
+
+def test_validacion_masiva_en_paralelo():
+    with tempfile.TemporaryDirectory() as tmp:
+        carpeta = Path(tmp)
+        for p in (ROOT / "ciclos").glob("*.txt"):
+            (carpeta / p.name).write_text(p.read_text(encoding="utf-8"), encoding="utf-8")
+        (carpeta / "roto.txt").write_text(
+            "nombre=Roto\n"
+            "accion=lavado;duracion=60s;agua=fria\n"         # la GUI la descartaría en silencio
+            "accion=enjuague;duracion=120;agua=tibia\n"
+            "accion=centrifugado;duracion=90;velocidad=alto\n", encoding="utf-8")
+        (carpeta / "sin_secciones.txt").write_text("[LAVADO]\nLLENADO_S=10\n", encoding="utf-8")
+
+        informe = validar([carpeta], procesos=2)
+        por_archivo = {Path(a.origen).name: a for a in informe.archivos}
+        assert not informe.ok
+        assert por_archivo["test.txt"].ok and por_archivo["prueba.txt"].ok
+        reglas = [p.regla for p in por_archivo["roto.txt"].problemas]
+        assert reglas.count("sintaxis") == 2 and "giro_sin_drenado" in reglas
+        assert not por_archivo["sin_secciones.txt"].ok
+
+
+def test_cargadores_no_descartan_lineas_en_silencio():
+    import cli
+    from gui.dominio import load_cycle_from_txt
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "roto.txt"
+        ruta.write_text("accion=lavado;duracion=60s\n"
+                        "accion=drenaje;duracion=30\n", encoding="utf-8")
+        ciclo, problemas = load_cycle_from_txt(str(ruta))
+        assert len(ciclo.pasos) == 1 and problemas == ["línea 1: duración no entera '60s'"]
+        assert cli.main(["estimate", str(ruta)]) == 1       # la CLI rechaza el ciclo entero
+
+
+if __name__ == "__main__":
+    test_enclavamientos_estaticos()
+    test_validacion_masiva_en_paralelo()
+    test_cargadores_no_descartan_lineas_en_silencio()
+    print("OK")
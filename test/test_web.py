@@ -0,0 +1,116 @@
+# test/test_web.py
+import http.client
+import json
+import socket
+import sys
+import threading
+from pathlib import Path
+
+# Agregar raíz del proyecto al sys.path (para que encuentre core/ y Serial/)
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.controlador import Controlador
+from core.timeline import compilar_archivo
+from core import web as web_mod
+from core.web import PAGINA, ServidorWeb
+
+
+def _evento(resp) -> tuple:
+    """Lee un evento SSE (event, data) ignorando latidos y retry."""
+    tipo, data = None, None
+    while True:
+        linea = resp.readline().decode("utf-8").rstrip("\n")
+        if linea.startswith("event: "):
+            tipo = linea[7:]
+        elif linea.startswith("data: "):
+            data = json.loads(linea[6:])
+        elif linea == "" and tipo:
+            return tipo, data
+
+
+def test_snapshot_y_deltas_por_sse():
+    reloj = [0.0]
+    ctrl = Controlador(reloj=lambda: reloj[0])
+    ctrl.agregar_maquina("M1")
+    ctrl.agregar_maquina("M2")
+    web = ServidorWeb(ctrl, "127.0.0.1", 0).arrancar()
+    try:
+        con = http.client.HTTPConnection("127.0.0.1", web.puerto, timeout=5)
+        con.request("GET", "/eventos")
+        resp = con.getresponse()
+        assert resp.getheader("Content-Type") == "text/event-stream"
+        tipo, snap = _evento(resp)
+        assert tipo == "snapshot" and set(snap) == {"M1", "M2"}
+        assert snap["M1"]["estado"] == "IDLE" and snap["M1"]["alarmas"] == []
+
+        ctrl.iniciar("M1", timeline=compilar_archivo(ROOT / "ciclos" / "test.txt"))
+        tipo, d = _evento(resp)
+        assert tipo == "delta" and d["maquina"] == "M1"
+        assert d["delta"]["estado"] == "RUNNING"
+        assert "maquina" not in d["delta"]           # solo lo que cambió
+
+        ctrl.detener("M1")
+        while "alarmas" not in d["delta"]:
+            tipo, d = _evento(resp)
+        assert d["delta"]["alarmas"] == ["Detenida (paro seguro)"]
+        assert web.estado()["M1"]["estado"] == "STOPPED"
+        con.close()
+    finally:
+        web.parar()
+        ctrl.parar()
+
+
+def test_espectador_trabado_no_toma_el_lock():
+    entrando, soltar = threading.Event(), threading.Event()
+
+    class _SocketTrabado:
+        # el navegador no lee: la primera escritura (el snapshot) queda bloqueada
+        def __init__(self, wfile):
+            self.wfile = wfile
+
+        def write(self, data):
+            if data.startswith(b"retry"):
+                entrando.set()
+                soltar.wait(5)
+            return self.wfile.write(data)
+
+        def __getattr__(self, nombre):
+            return getattr(self.wfile, nombre)
+
+    setup_original = web_mod._Manejador.setup
+
+    def setup(self):
+        setup_original(self)
+        self.wfile = _SocketTrabado(self.wfile)
+
+    ctrl = Controlador(reloj=lambda: 0.0)
+    ctrl.agregar_maquina("M1")
+    web_mod._Manejador.setup = setup
+    web = ServidorWeb(ctrl, "127.0.0.1", 0).arrancar()
+    try:
+        s = socket.create_connection(("127.0.0.1", web.puerto), timeout=5)
+        s.sendall(b"GET /eventos HTTP/1.1\r\nHost: x\r\n\r\n")
+        assert entrando.wait(5)
+        assert ctrl.lock.acquire(timeout=1)      # el controlador sigue pudiendo hacer tick
+        ctrl.lock.release()
+        soltar.set()
+        s.close()
+    finally:
+        soltar.set()
+        web_mod._Manejador.setup = setup_original
+        web.parar()
+        ctrl.parar()
+
+
+def test_pagina_escapa_nombres():
+    # ciclos y fases vienen de archivos editables: nunca van crudos a innerHTML
+    assert "esc(s.ciclo" in PAGINA and "esc(s.fase)" in PAGINA and "${s.ciclo" not in PAGINA
+
+
+if __name__ == "__main__":
+    test_snapshot_y_deltas_por_sse()
+    test_espectador_trabado_no_toma_el_lock()
+    test_pagina_escapa_nombres()
+    print("OK")